@@ -1,18 +1,30 @@
+import asyncio
+from contextlib import nullcontext
+import json
 from pathlib import Path
+import sys
+from typing import TextIO
 import click
+import httpx
 
 from click_default_group import DefaultGroup
 from rich.console import Console
 
 from posting.app import Posting
-from posting.collection import Collection
+from posting.bench import render_report, run_benchmark
+from posting.client_pool import ClientPool
+from posting.collection import Collection, CollectionConfig, load_request_from_yaml
 from posting.config import Settings
+from posting.data_file import DataFileError, iter_rows
 from posting.importing.open_api import import_openapi_spec
 from posting.locations import (
     config_file,
     default_collection_directory,
     theme_directory,
 )
+from posting.runner import DependencyCycleError, RequestRunner, select_requests
+from posting.transport import Resolver, ResolvingBackend
+from posting.variables import SubstitutionError, load_variables
 
 
 def create_config_file() -> None:
@@ -122,15 +134,229 @@ def import_spec(spec_path: str, output: str | None) -> None:
         console.print_exception()
 
 
+@cli.command()
+@click.argument("collection", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--env",
+    "-e",
+    type=click.Path(exists=True),
+    help="Path to the .env environment file(s)",
+    multiple=True,
+)
+@click.option(
+    "--filter",
+    "-f",
+    "patterns",
+    help="Only run requests whose path or name matches this glob pattern",
+    multiple=True,
+)
+@click.option(
+    "--concurrency",
+    "-c",
+    type=click.IntRange(min=1),
+    help="Maximum number of requests to send at once",
+    default=None,
+)
+@click.option(
+    "--per-host",
+    type=click.IntRange(min=1),
+    help="Maximum number of requests to send to a single host at once",
+    default=None,
+)
+@click.option(
+    "--data",
+    "data_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Send each request once per row of this CSV or JSONL file, with the row's columns as variables",
+    default=None,
+)
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the results to this file instead of stdout",
+    default=None,
+)
+def run(
+    collection: str,
+    env: tuple[str, ...],
+    patterns: tuple[str, ...],
+    concurrency: int | None,
+    per_host: int | None,
+    data_path: str | None,
+    report_path: str | None,
+) -> None:
+    """Send the requests in a collection without starting the TUI.
+
+    Each result is written to stdout (or the --report file) as a line of JSON,
+    in the order the responses arrive. The exit code is 1 if any request failed
+    or received a 4xx/5xx response.
+    """
+    create_config_file()
+    collection_path = Path(collection).resolve()
+    env_paths = tuple(Path(e).resolve() for e in env)
+    settings = Settings(_env_file=env_paths)  # type: ignore[call-arg]
+    variables = load_variables(env_paths, settings.use_host_environment)
+
+    collection_tree = Collection.from_directory(str(collection_path))
+    requests = select_requests(collection_tree, patterns)
+
+    runner_settings = settings.runner
+    max_in_flight = concurrency or runner_settings.concurrency
+    per_host_limit = per_host or runner_settings.per_host_limit
+
+    rows = iter_rows(Path(data_path)) if data_path else None
+
+    async def send_requests(report: TextIO) -> bool:
+        # Keep enough connections alive for every concurrent request to reuse one.
+        client_pool = ClientPool(
+            limits=httpx.Limits(
+                max_connections=max(max_in_flight, 100),
+                max_keepalive_connections=max(max_in_flight, 20),
+            ),
+            network_backend=ResolvingBackend(
+                Resolver(
+                    settings.dns_cache_ttl, overrides=collection_tree.config.resolve
+                )
+            ),
+        )
+        runner = RequestRunner(
+            client_pool,
+            variables,
+            settings.ssl,
+            per_host_limit=per_host_limit,
+            collection_config=collection_tree.config,
+        )
+        # Requests which capture values for others are sent in dependency order.
+        chained = any(request.captures for request in requests)
+        run_requests = runner.run_chain if chained else runner.run
+        sent = failed = 0
+        try:
+            async for result in run_requests(
+                requests, concurrency=max_in_flight, rows=rows
+            ):
+                sent += 1
+                failed += not result.ok
+                click.echo(json.dumps(result.to_dict(root=collection_path)), report)
+        finally:
+            await client_pool.aclose()
+            if report_path:
+                click.echo(
+                    f"{sent} requests sent, {failed} failed. "
+                    f"Results written to {report_path}.",
+                    err=True,
+                )
+        return not failed
+
+    try:
+        with click.open_file(report_path or "-", "w", encoding="utf-8") as report:
+            all_ok = asyncio.run(send_requests(report))
+    except DataFileError as e:
+        click.echo(f"Couldn't read {data_path}: {e}", err=True)
+        sys.exit(1)
+    except DependencyCycleError as e:
+        click.echo(f"Couldn't run the requests: {e}", err=True)
+        sys.exit(1)
+    sys.exit(0 if all_ok else 1)
+
+
+@cli.command()
+@click.argument("request_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--env",
+    "-e",
+    type=click.Path(exists=True),
+    help="Path to the .env environment file(s)",
+    multiple=True,
+)
+@click.option(
+    "--duration",
+    "-d",
+    type=click.FloatRange(min=0, min_open=True),
+    help="How long to send requests for, in seconds",
+    default=10.0,
+    show_default=True,
+)
+@click.option(
+    "--concurrency",
+    "-c",
+    type=click.IntRange(min=1),
+    help="Maximum number of requests in flight at once [default: 10, or 100 with --rps]",
+    default=None,
+)
+@click.option(
+    "--rps",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Start requests at this rate, instead of as fast as possible",
+    default=None,
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    help="Print the report as JSON",
+)
+def bench(
+    request_file: str,
+    env: tuple[str, ...],
+    duration: float,
+    concurrency: int | None,
+    rps: float | None,
+    as_json: bool,
+) -> None:
+    """Load test a single request and report its latency distribution."""
+    create_config_file()
+    console = Console()
+    env_paths = tuple(Path(e).resolve() for e in env)
+    settings = Settings(_env_file=env_paths)  # type: ignore[call-arg]
+    variables = load_variables(env_paths, settings.use_host_environment)
+
+    request_path = Path(request_file).resolve()
+    request_model = load_request_from_yaml(str(request_path))
+    collection_config = CollectionConfig.for_request_file(request_path)
+    try:
+        request_model.apply_template(variables)
+    except SubstitutionError as e:
+        console.print(f"Couldn't prepare the request: {e}", style="red")
+        sys.exit(1)
+
+    max_in_flight = concurrency or (100 if rps else 10)
+    status = (
+        nullcontext()
+        if as_json
+        else console.status(f"Sending requests for {duration:g}s...")
+    )
+    with status:
+        report = asyncio.run(
+            run_benchmark(
+                request_model,
+                settings.ssl,
+                duration=duration,
+                concurrency=max_in_flight,
+                rps=rps,
+                collection_config=collection_config,
+                dns_cache_ttl=settings.dns_cache_ttl,
+            )
+        )
+
+    if as_json:
+        click.echo(json.dumps(report.to_dict()))
+    else:
+        console.print(render_report(report))
+
+
 def make_posting(
     collection: Path,
     env: tuple[str, ...] = (),
     using_default_collection: bool = False,
 ) -> Posting:
     """Return a Posting instance with the given collection and environment."""
-    collection_tree = Collection.from_directory(str(collection.resolve()))
-
     env_paths = tuple(Path(e).resolve() for e in env)
     settings = Settings(_env_file=env_paths)  # type: ignore[call-arg]
 
+    collection_tree = Collection.from_directory(
+        str(collection.resolve()),
+        lazy_threshold=settings.collection_browser.lazy_load_threshold,
+    )
+
     return Posting(settings, env_paths, collection_tree, not using_default_collection)
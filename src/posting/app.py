@@ -1,7 +1,10 @@
+import asyncio
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Literal, Union, cast
+from typing import Any, Literal
 import subprocess
 import itertools
+import time
 import httpx
 from rich.console import Group
 from rich.text import Text
@@ -10,6 +13,7 @@ from textual.command import CommandPalette
 from textual.css.query import NoMatches
 from textual.design import ColorSystem
 from textual.events import Click
+from textual.message import Message
 from textual.reactive import Reactive, reactive
 from textual.app import App, ComposeResult
 from textual.binding import Binding
@@ -17,6 +21,7 @@ from textual.containers import Horizontal, Vertical
 from textual.screen import Screen
 from textual.signal import Signal
 from textual.widget import Widget
+from textual.worker import Worker
 from textual.widgets import (
     Button,
     Footer,
@@ -33,24 +38,40 @@ from posting.collection import (
     RequestModel,
 )
 
+from posting.client_pool import ClientKey, ClientPool
 from posting.commands import PostingProvider
 from posting.config import SETTINGS, Settings
 from posting.help_screen import HelpScreen
+from posting.http_cache import CacheStatus, HttpCache
 from posting.jump_overlay import JumpOverlay
 from posting.jumper import Jumper
+from posting.locations import http_cache_directory
 from posting.themes import BUILTIN_THEMES, Theme, load_user_themes
-from posting.types import CertTypes, PostingLayout
+from posting.tls import create_ssl_context
+from posting.transport import Resolver, ResolvingBackend, request_trace
+from posting.types import PostingLayout
 from posting.user_host import get_user_host_string
-from posting.variables import SubstitutionError, get_variables
-from posting.version import VERSION
+from posting.variables import get_variables
+from posting.version import USER_AGENT, VERSION
 from posting.widgets.collection.browser import (
     CollectionBrowser,
     CollectionTree,
 )
 from posting.widgets.datatable import PostingDataTable
-from posting.variables import load_variables
+from posting.file_watcher import FileSetWatcher
+from posting.variables import (
+    Environments,
+    VariableChanges,
+    load_variables,
+    parse_environment_file,
+    set_variables,
+)
 from posting.widgets.request.header_editor import HeadersTable
-from posting.messages import HttpResponseReceived
+from posting.messages import HttpResponseProgress, HttpResponseReceived
+from posting.runner import DependencyCycleError, RequestResult, RequestRunner
+from posting.rate_limit import RateLimiter
+from posting.retry import TraceCallback, send_with_retries
+from posting.streaming import StreamedBody, download_body, read_body, with_content
 from posting.widgets.request.method_selection import MethodSelector
 
 from posting.widgets.request.query_editor import ParamsTable
@@ -61,7 +82,8 @@ from posting.widgets.request.request_editor import RequestEditor
 from posting.widgets.request.request_metadata import RequestMetadata
 from posting.widgets.request.request_options import RequestOptions
 from posting.widgets.request.url_bar import UrlInput, UrlBar
-from posting.widgets.response.response_area import ResponseArea
+from posting.widgets.response.in_flight import InFlightRequest, InFlightRequests
+from posting.widgets.response.response_area import ResponseArea, human_readable_size
 from posting.widgets.response.response_trace import Event, ResponseTrace
 from posting.xresources import load_xresources_themes
 
@@ -140,17 +162,147 @@ class MainScreen(Screen[None]):
         collection: Collection,
         layout: PostingLayout,
         environment_files: tuple[Path, ...],
+        client_pool: ClientPool,
     ) -> None:
         super().__init__()
         self.collection = collection
+        self.client_pool = client_pool
+        """The pool of HTTP clients that requests are sent through."""
         self.cookies: httpx.Cookies = httpx.Cookies()
+        self.rate_limiter = RateLimiter(collection.config.rate_limits)
+        """Limits the rate of requests to hosts, as configured by the collection."""
         self._initial_layout: PostingLayout = layout
         self.environment_files = environment_files
         self.settings = SETTINGS.get()
+        http_cache_settings = self.settings.http_cache
+        self.http_cache: HttpCache | None = None
+        """The cache responses are stored in, if caching is enabled."""
+        if http_cache_settings.enabled:
+            self.http_cache = HttpCache(
+                http_cache_directory(), http_cache_settings.max_size
+            )
         load_variables(self.environment_files, self.settings.use_host_environment)
+        self.environments, self.environment = self._load_environments()
+        self._env_watcher: FileSetWatcher | None = None
+        self._env_watch_worker: Worker[None] | None = None
+        self._request_ids = itertools.count(1)
+
+    def _load_environments(self) -> tuple[Environments, str]:
+        """Return the environments which can be switched to, and the name of the
+        environment the app started with (the `--env` files)."""
+        collection_path = self.collection.path
+        environments = {
+            name: tuple((collection_path / file).resolve() for file in files)
+            for name, files in self.collection.config.environments.items()
+        }
+        startup_files = tuple(path.resolve() for path in self.environment_files)
+        startup_name = next(
+            (name for name, files in environments.items() if files == startup_files),
+            None,
+        )
+        if startup_name is None:
+            startup_name = " + ".join(path.name for path in startup_files) or "none"
+            environments = {startup_name: startup_files, **environments}
+        use_host_environment = self.settings.use_host_environment
+        return Environments(environments, use_host_environment), startup_name
+
+    def switch_environment(self, name: str) -> None:
+        """Replace the variables of the current environment with those of another."""
+        self.environment = name
+        self._use_variables(self.environments.variables(name))
+        files = ", ".join(path.name for path in self.environments.environments[name])
+        self.notify(
+            f"Using variables from {files}." if files else "No environment files.",
+            title=f"Switched to {name!r}",
+            timeout=3,
+        )
+
+    def _use_variables(self, variables: dict[str, str | None]) -> VariableChanges:
+        """Make the variables available, and tell widgets which ones changed."""
+        changes = VariableChanges.between(get_variables(), variables)
+        set_variables(variables)
+        if changes:
+            self.app.variables_changed_signal.publish(changes)
+        return changes
+
+    @dataclass
+    class EnvironmentFilesChanged(Message):
+        """Posted when environment files have changed on disk."""
+
+        file_variables: dict[Path, dict[str, str | None]]
+        """The variables now defined in each file which changed."""
+        errors: dict[Path, str]
+        """The files which changed but couldn't be read, and why."""
+
+    def check_environment_files(self) -> None:
+        """Look for environment files which have changed on disk, unless a check
+        is already in progress."""
+        if self._env_watch_worker is None or self._env_watch_worker.is_finished:
+            self._env_watch_worker = self._scan_environment_files()
+
+    @work(thread=True, group="environment-preload")
+    def _preload_environments(self) -> None:
+        """Parse the files of every environment, without blocking the UI."""
+        self.environments.preload()
+
+    @work(thread=True, group="environment-watcher")
+    def _scan_environment_files(self) -> None:
+        """Parse the environment files which have changed since the last check."""
+        watcher = self._env_watcher
+        if watcher is None:
+            return
+
+        changes = watcher.check()
+        if not changes:
+            return
+
+        file_variables: dict[Path, dict[str, str | None]] = {}
+        errors: dict[Path, str] = {}
+        # A deleted file no longer defines any variables.
+        for path in changes.added | changes.modified | changes.deleted:
+            try:
+                file_variables[path] = parse_environment_file(path)
+            except Exception as e:
+                errors[path] = str(e)
+        self.post_message(self.EnvironmentFilesChanged(file_variables, errors))
+
+    @on(EnvironmentFilesChanged)
+    def on_environment_files_changed(self, event: EnvironmentFilesChanged) -> None:
+        """Reload the variables of the current environment if its files changed."""
+        affected = self.environments.update_files(event.file_variables)
+        if self.environment in affected:
+            changes = self._use_variables(self.environments.variables(self.environment))
+            if changes:
+                file_names = ", ".join(
+                    path.name
+                    for path in self.environments.environments[self.environment]
+                    if path in event.file_variables
+                )
+                self.notify(
+                    f"Reloaded {file_names}.",
+                    title="Environment changed",
+                    timeout=3,
+                )
+
+        if event.errors:
+            self.notify(
+                ", ".join(path.name for path in sorted(event.errors)),
+                title="Couldn't reload environment files",
+                severity="warning",
+            )
 
     def on_mount(self) -> None:
         self.layout = self._initial_layout
+        # Parse the other environments' files now, so switching is instant.
+        self._preload_environments()
+
+        env_watch_interval = self.settings.env_watch_interval
+        environment_files = self.environments.files
+        if env_watch_interval is not None and environment_files:
+            self._env_watcher = FileSetWatcher(environment_files)
+            # The first check records the initial state of the files.
+            self.check_environment_files()
+            self.set_interval(env_watch_interval, self.check_environment_files)
 
         # Set the initial focus based on the settings.
         focus_on_startup = self.settings.focus.on_startup
@@ -169,50 +321,49 @@ class MainScreen(Screen[None]):
     def compose(self) -> ComposeResult:
         yield AppHeader()
         yield UrlBar()
+        yield InFlightRequests()
         with AppBody():
             yield CollectionBrowser(collection=self.collection)
             yield RequestEditor()
             yield ResponseArea()
         yield Footer()
 
-    async def send_request(self) -> None:
-        self.url_bar.clear_events()
+    async def send_request(self, request_id: int) -> None:
+        """Send the request currently in the UI.
+
+        Args:
+            request_id: The ID of the request in the in-flight list.
+        """
+        await self.show_trace(request_id)
+        trace = self.trace_for(request_id)
         request_options = self.request_options.to_model()
-        verify_ssl = request_options.verify_ssl
-        proxy_url = request_options.proxy_url or None
-        timeout = request_options.timeout
         auth = self.request_auth.to_httpx_auth()
+        auth_model = self.request_auth.to_model()
 
-        cert_config = SETTINGS.get().ssl
-        httpx_cert_config: list[str] = []
-        if certificate_path := cert_config.certificate_path:
-            httpx_cert_config.append(certificate_path)
-        if key_file := cert_config.key_file:
-            httpx_cert_config.append(key_file)
-        if password := cert_config.password:
-            httpx_cert_config.append(password.get_secret_value())
-
-        verify: str | bool = verify_ssl
-        if verify_ssl and cert_config.ca_bundle is not None:
-            # If verification is enabled and a CA bundle is supplied,
-            # use the CA bundle.
-            verify = cert_config.ca_bundle
-
-        cert = cast(CertTypes, tuple(httpx_cert_config))
         try:
-            async with httpx.AsyncClient(
-                verify=verify,
-                cert=cert,
-                proxy=proxy_url,
-                timeout=timeout,
-                auth=auth,
-            ) as client:
-                request = self.build_httpx_request(
-                    request_options, client, apply_template=True
-                )
-                request.headers["User-Agent"] = (
-                    f"Posting/{VERSION} (Terminal-based API client)"
-                )
+            request_model = self.build_request_model(request_options).render(
+                get_variables()
+            )
+            # Use the options with variables substituted (e.g. into the proxy URL).
+            request_options = request_model.options
+            proxy_url = request_options.proxy_url or None
+            download_path = request_options.download_path
+
+            client_key = ClientKey.from_options(
+                request_options,
+                SETTINGS.get().ssl,
+                auth_type=auth_model.type if auth_model else None,
+                collection_config=self.collection.config,
+            )
+            # Hostnames are resolved by the network backend, which reports
+            # the lookup to the trace of the request this task is sending.
+            request_trace.set(trace)
+            async with self.client_pool.client(client_key) as client:
+                request = self.build_httpx_request(request_model, client, trace)
+                if in_flight_request := self.in_flight_requests.get(request_id):
+                    # Show the URL with the variables substituted.
+                    in_flight_request.url = str(request.url)
+                request.headers["User-Agent"] = USER_AGENT
                 print("-- sending request --")
                 print(request)
                 print(request.headers)
@@ -220,37 +371,179 @@ class MainScreen(Screen[None]):
                 print("verify =", request_options.verify_ssl)
                 print("attach cookies =", request_options.attach_cookies)
                 print("proxy =", proxy_url)
-                print("timeout =", timeout)
                 print("auth =", auth)
-                response = await client.send(
-                    request=request,
-                    follow_redirects=request_options.follow_redirects,
-                )
+                if download_path and "accept-encoding" not in request.headers:
+                    # The body is saved exactly as it's received, so ask the
+                    # server not to compress it.
+                    request.headers["Accept-Encoding"] = "identity"
+
+                def post_progress(
+                    downloaded: int, total: int | None, rate: float
+                ) -> None:
+                    self.post_message(
+                        HttpResponseProgress(downloaded, total, rate, request_id)
+                    )
+
+                async def fetch() -> tuple[httpx.Response, StreamedBody]:
+                    # The total timeout is a deadline for the whole exchange,
+                    # including reading the body, rather than for any one phase.
+                    async with asyncio.timeout(request_options.total_timeout):
+                        response = await send_with_retries(
+                            lambda: self.rate_limiter.send(
+                                request.url.host,
+                                lambda: client.send(
+                                    request=request,
+                                    auth=auth,
+                                    follow_redirects=request_options.follow_redirects,
+                                    stream=True,
+                                ),
+                                trace=trace,
+                            ),
+                            request_options.retry,
+                            trace=trace,
+                        )
+                        try:
+                            if download_path:
+                                body = await download_body(
+                                    response,
+                                    Path(download_path).expanduser(),
+                                    overwrite=request_options.overwrite_download,
+                                    on_progress=post_progress,
+                                )
+                            else:
+                                # Read the body incrementally, keeping only as much
+                                # of it in memory as will be displayed.
+                                response_settings = SETTINGS.get().response
+                                body = await read_body(
+                                    response,
+                                    max_bytes=response_settings.max_display_bytes,
+                                    spill_to_file=response_settings.spill_to_file,
+                                    on_progress=post_progress,
+                                )
+                        finally:
+                            await response.aclose()
+                    return with_content(response, body.content), body
+
+                # Downloaded bodies aren't kept, so they can't be cached.
+                http_cache = None if download_path else self.http_cache
+                cache_status: CacheStatus | None = None
+                if http_cache is None:
+                    response, body = await fetch()
+                else:
+                    # The cache reads and writes files, so use it from a thread.
+                    # Auth is only added to the request when it's sent, so it's
+                    # passed to the cache separately.
+                    credentials = auth_model.model_dump_json() if auth_model else ""
+                    cache_entry = await asyncio.to_thread(
+                        http_cache.lookup, request, credentials
+                    )
+                    cached_response = None
+                    if cache_entry is not None and cache_entry.is_fresh(request):
+                        # If the entry can't be read, it's removed, and the
+                        # request is sent as if it wasn't cached.
+                        cached_response = await asyncio.to_thread(
+                            http_cache.to_response, request, cache_entry
+                        )
+                        if cached_response is None:
+                            cache_entry = None
+
+                    if cached_response is not None:
+                        response = cached_response
+                        body = StreamedBody(size=cache_entry.size, truncated=False)
+                        cache_status = "hit"
+                    else:
+                        if cache_entry is not None:
+                            http_cache.add_conditional_headers(request, cache_entry)
+                        response, body = await fetch()
+                        if cache_entry is not None and response.status_code == 304:
+                            cached_response = await asyncio.to_thread(
+                                http_cache.revalidated, request, cache_entry, response
+                            )
+                        if cached_response is not None:
+                            response = cached_response
+                            body = StreamedBody(size=cache_entry.size, truncated=False)
+                            cache_status = "revalidated"
+                        else:
+                            # If the cached body disappeared after the server
+                            # responded 304, that response is shown as it is.
+                            if not body.truncated:
+                                await asyncio.to_thread(
+                                    http_cache.store, request, response, credentials
+                                )
+                            cache_status = "miss"
+
                 print("response cookies =", response.cookies)
-                self.post_message(HttpResponseReceived(response))
+                self.post_message(
+                    HttpResponseReceived(
+                        response,
+                        body_size=body.size
+                        if body.truncated or body.download_path
+                        else None,
+                        overflow_path=body.overflow_path,
+                        download_path=body.download_path,
+                        cache_status=cache_status,
+                        request_id=request_id,
+                    )
+                )
+        except asyncio.CancelledError:
+            # The request was cancelled from the in-flight list.
+            self.in_flight_requests.finish(request_id, error="cancelled")
+            if request_id == self.in_flight_requests.displayed_id:
+                self.response_area.border_subtitle = "[dim]Cancelled[/]"
+                self.response_trace.trace_complete()
+            raise
         except httpx.ConnectTimeout as connect_timeout:
             log.error("Connect timeout", connect_timeout)
+            self.in_flight_requests.finish(request_id, error="connect timeout")
+            timeout = request_options.to_httpx_timeout().connect
             self.notify(
                 severity="error",
                 title="Connect timeout",
                 message=f"Couldn't connect within {timeout} seconds.",
             )
+        except TimeoutError as total_timeout:
+            log.error("Total timeout", total_timeout)
+            self.in_flight_requests.finish(request_id, error="timed out")
+            timeout = request_options.total_timeout
+            self.notify(
+                severity="error",
+                title="Request timed out",
+                message=f"The request didn't complete within {timeout} seconds.",
+            )
         except Exception as e:
             log.error("Error sending request", e)
             log.error("Type of error", type(e))
-            self.url_input.add_class("error")
-            self.url_input.focus()
+            self.in_flight_requests.finish(request_id, error=type(e).__name__)
+            if request_id == self.in_flight_requests.displayed_id:
+                self.url_input.add_class("error")
+                self.url_input.focus()
             self.notify(
                 severity="error",
                 title="Couldn't send request",
                 message=str(e),
             )
         else:
-            self.url_input.remove_class("error")
-
-    @work(exclusive=True)
-    async def send_via_worker(self) -> None:
-        await self.send_request()
+            if request_id == self.in_flight_requests.displayed_id:
+                self.url_input.remove_class("error")
+
+    def send_via_worker(self) -> None:
+        """Send the request in a worker.
+
+        Requests are sent concurrently, so sending a request doesn't cancel any
+        which are still in flight. Each appears in the in-flight list, where it
+        can be cancelled.
+        """
+        request_id = next(self._request_ids)
+        in_flight_request = InFlightRequest(
+            request_id,
+            method=self.selected_method,
+            url=self.url_input.value.strip(),
+            started=time.monotonic(),
+        )
+        self.in_flight_requests.add(in_flight_request)
+        in_flight_request.worker = self.run_worker(
+            self.send_request(request_id), group="send-request"
+        )
 
     @on(MethodSelector.MethodChanged)
     def on_method_selector_changed(self, event: MethodSelector.MethodChanged) -> None:
@@ -264,6 +557,33 @@ class MainScreen(Screen[None]):
 
     @on(HttpResponseReceived)
     def on_response_received(self, event: HttpResponseReceived) -> None:
+        """Record the response against its request, and display it if that's the
+        request being displayed."""
+        self.cookies.update(event.response.cookies)
+        if event.request_id is None:
+            self.show_response(event)
+            return
+
+        in_flight_requests = self.in_flight_requests
+        in_flight_requests.finish(event.request_id, result=event)
+        if event.request_id == in_flight_requests.displayed_id:
+            self.response_trace.trace_complete(event.cache_status)
+            in_flight_requests.show(event.request_id)
+            self.show_response(event)
+
+    @on(InFlightRequests.RequestSelected)
+    async def on_in_flight_request_selected(
+        self, event: InFlightRequests.RequestSelected
+    ) -> None:
+        """Display the trace of a request chosen from the in-flight list, and its
+        response if it has finished."""
+        request = event.request
+        self.in_flight_requests.show(request.request_id)
+        await self.show_trace(request.request_id)
+        if request.result is not None:
+            self.show_response(request.result)
+
+    def show_response(self, event: HttpResponseReceived) -> None:
         """Update the response area with the response."""
 
         # If the config to automatically move the focus on receipt
@@ -274,14 +594,150 @@ class MainScreen(Screen[None]):
         elif focus_on_response == "tabs":
             self.response_area.content_tabs.focus()
 
+        self.response_area.body_size = event.body_size
+        self.response_area.download_path = event.download_path
+        self.response_area.cache_status = event.cache_status
         self.response_area.response = event.response
-        self.cookies.update(event.response.cookies)
-        self.response_trace.trace_complete()
+
+        if event.download_path is not None:
+            size = human_readable_size(event.body_size or 0)
+            self.notify(
+                title="Response body saved",
+                message=f"Wrote {size} to {str(event.download_path)!r}.",
+                timeout=8,
+            )
+        elif event.body_size is not None:
+            shown = human_readable_size(len(event.response.content))
+            total = human_readable_size(event.body_size)
+            message = f"Showing the first {shown} of {total}."
+            if event.overflow_path is not None:
+                message += f"\nThe full body was saved to {str(event.overflow_path)!r}."
+            self.notify(title="Response body truncated", message=message, timeout=8)
+
+    @on(HttpResponseProgress)
+    def on_response_progress(self, event: HttpResponseProgress) -> None:
+        if event.request_id is not None:
+            self.in_flight_requests.update_progress(
+                event.request_id, event.bytes_downloaded, event.total_bytes
+            )
+        if event.request_id in (None, self.in_flight_requests.displayed_id):
+            self.response_area.show_download_progress(
+                event.bytes_downloaded, event.total_bytes, event.bytes_per_second
+            )
 
     @on(CollectionTree.RequestSelected)
     def on_request_selected(self, event: CollectionTree.RequestSelected) -> None:
         """Load a request model into the UI when a request is selected."""
         self.load_request_model(event.request)
+        if self.settings.preconnect:
+            self.preconnect(event.request)
+
+    @work(exclusive=True, group="preconnect")
+    async def preconnect(self, request_model: RequestModel) -> None:
+        """Open a connection to the host of a request in the background, so that
+        it's ready when the request is sent."""
+        network_backend = self.client_pool.network_backend
+        if not isinstance(network_backend, ResolvingBackend):
+            return
+
+        try:
+            request_model = request_model.render(get_variables())
+            url = httpx.URL(request_model.url)
+        except Exception:
+            return
+        options = request_model.options
+        if options.proxy_url or url.scheme not in {"http", "https"} or not url.host:
+            return
+
+        try:
+            ssl_context = None
+            if url.scheme == "https":
+                # The connection is only used by a client with the same SSL context.
+                client_key = ClientKey.from_options(
+                    options, self.settings.ssl, collection_config=self.collection.config
+                )
+                ssl_context = create_ssl_context(
+                    client_key.verify, client_key.cert, client_key.http2
+                )
+            await network_backend.preconnect(
+                url.raw_host.decode("ascii"),
+                url.port or (443 if url.scheme == "https" else 80),
+                ssl_context,
+                timeout=options.to_httpx_timeout().connect,
+            )
+        except Exception as e:
+            # The request will open its own connection when it's sent.
+            log.warning("Couldn't pre-connect", e)
+
+    @on(CollectionTree.RunCollection)
+    def on_run_collection(self, event: CollectionTree.RunCollection) -> None:
+        """Send every request in the collection the user chose to run."""
+        self.run_collection(event.collection, event.requests)
+
+    @work(group="run-collection")
+    async def run_collection(
+        self, collection: Collection, requests: list[RequestModel]
+    ) -> None:
+        if not requests:
+            self.notify(
+                f"There are no requests in {collection.name!r}.",
+                title="Nothing to run",
+                severity="warning",
+            )
+            return
+
+        runner_settings = self.settings.runner
+        runner = RequestRunner(
+            self.client_pool,
+            get_variables(),
+            self.settings.ssl,
+            per_host_limit=runner_settings.per_host_limit,
+            cookies=self.cookies,
+            collection_config=self.collection.config,
+            rate_limiter=self.rate_limiter,
+        )
+        self.notify(
+            f"Sending {len(requests)} requests.",
+            title=f"Running {collection.name!r}",
+            timeout=3,
+        )
+        chained = any(request.captures for request in requests)
+        run_requests = runner.run_chain if chained else runner.run
+        failed: list[RequestResult] = []
+        try:
+            async for result in run_requests(
+                requests, concurrency=runner_settings.concurrency
+            ):
+                if not result.ok:
+                    failed.append(result)
+        except DependencyCycleError as e:
+            self.notify(
+                str(e),
+                title=f"Couldn't run {collection.name!r}",
+                severity="error",
+                timeout=10,
+            )
+            return
+
+        if failed:
+            failure_lines = "\n".join(
+                f"{result.request.name or result.url}: "
+                f"{result.error or result.status_code}"
+                for result in failed[:5]
+            )
+            if len(failed) > 5:
+                failure_lines += f"\n...and {len(failed) - 5} more"
+            self.notify(
+                f"{len(failed)} of {len(requests)} requests failed.\n{failure_lines}",
+                title=f"Finished running {collection.name!r}",
+                severity="error",
+                timeout=10,
+            )
+        else:
+            self.notify(
+                f"All {len(requests)} requests succeeded.",
+                title=f"Finished running {collection.name!r}",
+            )
 
     @on(CollectionTree.RequestCacheUpdated)
     def on_request_cache_updated(
@@ -427,26 +883,51 @@ class MainScreen(Screen[None]):
 
     def build_httpx_request(
         self,
-        request_options: Options,
+        request_model: RequestModel,
         client: httpx.AsyncClient,
-        apply_template: bool,
+        trace: TraceCallback | None = None,
     ) -> httpx.Request:
-        """Build an httpx request from the UI."""
-        request_model = self.build_request_model(request_options)
-        if apply_template:
-            variables = get_variables()
-            try:
-                request_model.apply_template(variables)
-            except SubstitutionError as e:
-                log.error(e)
-                raise
+        """Build an httpx request from a request model built from the UI."""
         request = request_model.to_httpx(client)
-        request.extensions = {"trace": self.log_request_trace_event}
+        request.extensions["trace"] = trace or self.log_request_trace_event
         return request
 
-    async def log_request_trace_event(self, event: Event, info: dict[str, Any]) -> None:
+    def trace_for(self, request_id: int) -> TraceCallback:
+        """Return a trace callback for a request.
+
+        Every event is recorded against the request in the in-flight list, but
+        only the events of the request being displayed are shown as they arrive.
+        The others are shown if their request is selected (see `show_trace`).
+        """
+
+        async def trace(event: Event, info: dict[str, Any]) -> None:
+            timestamp = time.perf_counter_ns()
+            if (request := self.in_flight_requests.get(request_id)) is not None:
+                request.trace.append((event, info, timestamp))
+            if request_id == self.in_flight_requests.displayed_id:
+                await self.log_request_trace_event(event, info, timestamp)
+
+        return trace
+
+    async def show_trace(self, request_id: int) -> None:
+        """Replace the trace, and the URL bar's markers, with those of a request
+        in the in-flight list."""
+        self.response_trace.clear()
+        self.url_bar.clear_events()
+        request = self.in_flight_requests.get(request_id)
+        if request is None:
+            return
+        for event, info, timestamp in request.trace:
+            await self.log_request_trace_event(event, info, timestamp)
+        if not request.in_flight:
+            cache_status = request.result.cache_status if request.result else None
+            self.response_trace.trace_complete(cache_status)
+
+    async def log_request_trace_event(
+        self, event: Event, info: dict[str, Any], timestamp: int | None = None
+    ) -> None:
         """Log an event to the request trace."""
-        await self.response_trace.log_event(event, info)
+        await self.response_trace.log_event(event, info, timestamp)
         self.url_bar.log_event(event, info)
 
     def build_request_model(self, request_options: Options) -> RequestModel:
@@ -469,6 +950,7 @@ class MainScreen(Screen[None]):
             headers=headers,
             options=request_options,
             auth=self.request_auth.to_model(),
+            captures=open_request.captures if open_request else [],
             cookies=(
                 Cookie.from_httpx(self.cookies)
                 if request_options.attach_cookies
@@ -570,6 +1052,10 @@ class MainScreen(Screen[None]):
     def response_trace(self) -> ResponseTrace:
         return self.query_one(ResponseTrace)
 
+    @property
+    def in_flight_requests(self) -> InFlightRequests:
+        return self.query_one(InFlightRequests)
+
 
 class Posting(App[None]):
     COMMANDS = {PostingProvider}
@@ -620,6 +1106,12 @@ class Posting(App[None]):
         self.collection = collection
         self.collection_specified = collection_specified
         self.animation_level = settings.animation
+        self.client_pool = ClientPool(
+            network_backend=ResolvingBackend(
+                Resolver(settings.dns_cache_ttl, overrides=collection.config.resolve)
+            )
+        )
+        """HTTP clients shared by every send, so that connections are reused."""
 
     theme: Reactive[str | None] = reactive("posting", init=False)
     _jumping: Reactive[bool] = reactive(False, init=False, bindings=True)
@@ -644,13 +1136,21 @@ class Posting(App[None]):
             screen=self.screen,
         )
         self.theme_change_signal = Signal[Theme](self, "theme-changed")
+        self.variables_changed_signal = Signal[VariableChanges](
+            self, "variables-changed"
+        )
         self.theme = self.settings.theme
 
+    async def on_unmount(self) -> None:
+        # Close any connections which are still open in the client pool.
+        await self.client_pool.aclose()
+
     def get_default_screen(self) -> MainScreen:
         self.main_screen = MainScreen(
             collection=self.collection,
             layout=self.settings.layout,
             environment_files=self.environment_files,
+            client_pool=self.client_pool,
         )
         if not self.collection_specified:
             self.notify(
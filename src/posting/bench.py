@@ -0,0 +1,376 @@
+"""Load testing for a single request, used by the `posting bench` command."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from rich.console import Group, RenderableType
+from rich.table import Table
+from rich.text import Text
+
+from posting.client_pool import ClientKey, ClientPool
+from posting.collection import CollectionConfig, RequestModel
+from posting.config import CertificateSettings
+from posting.rate_limit import RateLimiter
+from posting.transport import Resolver, ResolvingBackend
+from posting.version import USER_AGENT
+
+
+REPORTED_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+"""The percentiles shown in the summary of a benchmark."""
+
+
+class LatencyHistogram:
+    """A histogram of latencies with bounded relative error, in the style of HdrHistogram.
+
+    Values are recorded in microseconds. Each power-of-two range of values is split
+    into `2 ** precision_bits` equally sized buckets, so the relative error of any
+    reported value is at most `1 / 2 ** precision_bits` (under 1% by default),
+    regardless of how many values are recorded or how large they are.
+    """
+
+    def __init__(self, precision_bits: int = 7) -> None:
+        self.precision_bits = precision_bits
+        self.counts: Counter[int] = Counter()
+        """Mapping of the lowest value in each bucket to the number of values in it."""
+        self.total_count = 0
+        self.min = 0
+        self.max = 0
+        self._sum = 0
+
+    def bucket_floor(self, value: int) -> int:
+        """Return the lowest value in the bucket that the value falls into."""
+        shift = max(value.bit_length() - self.precision_bits, 0)
+        return (value >> shift) << shift
+
+    def bucket_width(self, floor: int) -> int:
+        """Return the width of the bucket starting at the given value."""
+        return 1 << max(floor.bit_length() - self.precision_bits, 0)
+
+    def record(self, microseconds: int) -> None:
+        """Record a single latency, in microseconds."""
+        value = max(int(microseconds), 0)
+        self.counts[self.bucket_floor(value)] += 1
+        if self.total_count == 0:
+            self.min = self.max = value
+        else:
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+        self.total_count += 1
+        self._sum += value
+
+    @property
+    def mean(self) -> float:
+        """The mean of the recorded values."""
+        return self._sum / self.total_count if self.total_count else 0.0
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """Return the value below which the given percentage of values fall.
+
+        The value returned is the midpoint of the bucket containing the percentile,
+        clamped to the range of recorded values.
+        """
+        if self.total_count == 0:
+            return 0
+
+        target = max(percentile / 100 * self.total_count, 1)
+        running_total = 0
+        for floor in sorted(self.counts):
+            running_total += self.counts[floor]
+            if running_total >= target:
+                midpoint = floor + self.bucket_width(floor) // 2
+                return min(max(midpoint, self.min), self.max)
+        return self.max
+
+    def distribution(self, bin_count: int = 12) -> list[tuple[int, int, int]]:
+        """Group the recorded values into logarithmically sized bins for display.
+
+        Returns:
+            A list of `(low, high, count)` tuples, where each bin covers the
+            values `low <= value < high`.
+        """
+        if self.total_count == 0:
+            return []
+
+        low = max(self.min, 1)
+        high = max(self.max, low) + 1
+        ratio = (high / low) ** (1 / bin_count)
+        edges = sorted({int(low * ratio**index) for index in range(bin_count)})
+        edges.append(high)
+
+        bins: list[tuple[int, int, int]] = []
+        floors = sorted(self.counts)
+        position = 0
+        for bin_low, bin_high in zip(edges, edges[1:]):
+            count = 0
+            while position < len(floors) and floors[position] < bin_high:
+                count += self.counts[floors[position]]
+                position += 1
+            bins.append((bin_low, bin_high, count))
+        return bins
+
+
+@dataclass
+class BenchmarkReport:
+    """The results of a benchmark."""
+
+    request: RequestModel
+    """The request which was benchmarked (after variable substitution)."""
+    duration: float
+    """The wall-clock time the benchmark ran for, in seconds."""
+    concurrency: int
+    """The maximum number of requests in flight at once."""
+    target_rps: float | None
+    """The target request rate, or None if requests were sent as fast as possible."""
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    """The latencies of all completed requests (including those with error statuses)."""
+    status_codes: Counter[int] = field(default_factory=Counter)
+    """The number of responses received with each status code."""
+    exceptions: Counter[str] = field(default_factory=Counter)
+    """The number of requests which failed with each exception type."""
+
+    @property
+    def completed(self) -> int:
+        """The number of requests which received a response."""
+        return sum(self.status_codes.values())
+
+    @property
+    def total(self) -> int:
+        """The number of requests which were sent."""
+        return self.completed + sum(self.exceptions.values())
+
+    @property
+    def errors(self) -> int:
+        """The number of requests which failed or received a 4xx/5xx response."""
+        error_statuses = sum(
+            count for status, count in self.status_codes.items() if status >= 400
+        )
+        return error_statuses + sum(self.exceptions.values())
+
+    @property
+    def throughput(self) -> float:
+        """Requests completed per second."""
+        return self.completed / self.duration if self.duration else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the report to a JSON-serialisable dict. Latencies are in milliseconds."""
+        histogram = self.histogram
+        return {
+            "name": self.request.name,
+            "method": self.request.method,
+            "url": self.request.url,
+            "duration_s": round(self.duration, 3),
+            "concurrency": self.concurrency,
+            "target_rps": self.target_rps,
+            "requests": self.total,
+            "completed": self.completed,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.total, 4) if self.total else 0.0,
+            "throughput_rps": round(self.throughput, 2),
+            "latency_ms": {
+                "min": histogram.min / 1000,
+                "mean": round(histogram.mean / 1000, 3),
+                "max": histogram.max / 1000,
+                **{
+                    f"p{percentile:g}": histogram.value_at_percentile(percentile)
+                    / 1000
+                    for percentile in REPORTED_PERCENTILES
+                },
+            },
+            "status_codes": {
+                str(status): count for status, count in sorted(self.status_codes.items())
+            },
+            "exceptions": dict(self.exceptions.most_common()),
+        }
+
+
+async def run_benchmark(
+    request_model: RequestModel,
+    ssl_settings: CertificateSettings,
+    duration: float,
+    concurrency: int = 10,
+    rps: float | None = None,
+    collection_config: CollectionConfig | None = None,
+    dns_cache_ttl: float = 60.0,
+) -> BenchmarkReport:
+    """Repeatedly send a request and measure the latency of each send.
+
+    Variables should already have been substituted into the request model.
+
+    Without a target rate, `concurrency` requests are kept in flight for the whole
+    duration, each sent as soon as the previous one completes.
+
+    With a target rate, requests are started on a fixed schedule of `rps` per second
+    (never exceeding `concurrency` in flight). Latency is measured from the time each
+    request was *scheduled* to be sent, so if the server falls behind and requests
+    queue up, that delay is included in the results rather than hidden.
+
+    Args:
+        request_model: The request to send.
+        ssl_settings: The SSL configuration from the settings.
+        duration: How long to send requests for, in seconds.
+        concurrency: The maximum number of requests in flight at once.
+        rps: The target number of requests to start per second.
+        collection_config: The config of the collection the request is in, so
+            that its HTTP/2, `resolve` and rate limit settings apply, as they do
+            when the request is sent from the TUI or by `posting run`.
+        dns_cache_ttl: How long to remember the addresses a hostname resolved to.
+
+    Returns:
+        The report containing latencies and errors.
+    """
+    report = BenchmarkReport(
+        request=request_model,
+        duration=duration,
+        concurrency=concurrency,
+        target_rps=rps,
+    )
+    options = request_model.options
+    auth_model = request_model.auth
+    client_key = ClientKey.from_options(
+        options,
+        ssl_settings,
+        auth_type=auth_model.type if auth_model else None,
+        collection_config=collection_config,
+    )
+    client_pool = ClientPool(
+        limits=httpx.Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=concurrency,
+        ),
+        network_backend=ResolvingBackend(
+            Resolver(
+                dns_cache_ttl,
+                overrides=collection_config.resolve if collection_config else None,
+            )
+        ),
+    )
+    rate_limiter = RateLimiter(
+        collection_config.rate_limits if collection_config else None
+    )
+
+    async def send_once(client: httpx.AsyncClient, started: float) -> None:
+        request = request_model.to_httpx(client)
+        request.headers["User-Agent"] = USER_AGENT
+        auth = auth_model.to_httpx_auth() if auth_model else None
+        try:
+            response = await rate_limiter.send(
+                request.url.host,
+                lambda: client.send(
+                    request,
+                    auth=auth,
+                    follow_redirects=options.follow_redirects,
+                ),
+            )
+        except Exception as e:
+            report.exceptions[type(e).__name__] += 1
+            return
+
+        elapsed = time.perf_counter() - started
+        report.histogram.record(int(elapsed * 1_000_000))
+        report.status_codes[response.status_code] += 1
+
+    start = time.perf_counter()
+    deadline = start + duration
+    try:
+        async with client_pool.client(client_key) as client:
+            if rps is None:
+
+                async def worker() -> None:
+                    while time.perf_counter() < deadline:
+                        await send_once(client, time.perf_counter())
+
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+            else:
+                in_flight = asyncio.Semaphore(concurrency)
+                tasks: set[asyncio.Task[None]] = set()
+
+                async def send_scheduled(scheduled: float) -> None:
+                    try:
+                        await send_once(client, scheduled)
+                    finally:
+                        in_flight.release()
+
+                interval = 1 / rps
+                sent = 0
+                while (scheduled := start + sent * interval) < deadline:
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    await in_flight.acquire()
+                    task = asyncio.create_task(send_scheduled(scheduled))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    sent += 1
+
+                if tasks:
+                    await asyncio.gather(*tasks)
+    finally:
+        await client_pool.aclose()
+
+    report.duration = time.perf_counter() - start
+    return report
+
+
+def render_report(report: BenchmarkReport) -> RenderableType:
+    """Render a benchmark report for display in the terminal."""
+    request = report.request
+    histogram = report.histogram
+
+    def milliseconds(microseconds: float) -> str:
+        return f"{microseconds / 1000:.2f}ms"
+
+    mode = (
+        f"{report.target_rps:g} req/s target, up to {report.concurrency} in flight"
+        if report.target_rps
+        else f"{report.concurrency} concurrent"
+    )
+    heading = Text.assemble(
+        (f"{request.method} ", "bold"),
+        request.url,
+        (f"\n{report.total} requests in {report.duration:.2f}s ({mode})", "dim"),
+    )
+
+    summary = Table(show_header=False, box=None, padding=(0, 2, 0, 0))
+    summary.add_column(style="bold")
+    summary.add_column(justify="right")
+    summary.add_row("Throughput", f"{report.throughput:.2f} req/s")
+    error_rate = report.errors / report.total if report.total else 0.0
+    summary.add_row("Errors", f"{report.errors} ({error_rate:.2%})")
+    summary.add_row("Min", milliseconds(histogram.min))
+    summary.add_row("Mean", milliseconds(histogram.mean))
+    for percentile in REPORTED_PERCENTILES:
+        summary.add_row(
+            f"p{percentile:g}", milliseconds(histogram.value_at_percentile(percentile))
+        )
+    summary.add_row("Max", milliseconds(histogram.max))
+
+    outcomes = Table(title="Outcomes", title_justify="left", box=None)
+    outcomes.add_column("Outcome")
+    outcomes.add_column("Count", justify="right")
+    for status, count in sorted(report.status_codes.items()):
+        style = "green" if status < 400 else "red"
+        outcomes.add_row(Text(str(status), style=style), str(count))
+    for exception_name, count in report.exceptions.most_common():
+        outcomes.add_row(Text(exception_name, style="red"), str(count))
+
+    distribution = Table(title="Latency distribution", title_justify="left", box=None)
+    distribution.add_column("Latency", justify="right")
+    distribution.add_column("Count", justify="right")
+    distribution.add_column("")
+    bins = histogram.distribution()
+    largest_bin = max((count for _, _, count in bins), default=0)
+    for low, high, count in bins:
+        bar_width = round(count / largest_bin * 40) if largest_bin else 0
+        distribution.add_row(
+            f"{milliseconds(low)} - {milliseconds(high)}",
+            str(count),
+            Text("█" * bar_width, style="cyan"),
+        )
+
+    return Group(heading, Text(), summary, Text(), outcomes, Text(), distribution)
@@ -0,0 +1,142 @@
+"""Capture values from responses into variables, for use by later requests.
+
+This is what allows requests to be chained: a login request can capture a token
+from its response body, and the requests which refer to `$token` are sent once
+the token has been captured (see `RequestRunner.run_chain`).
+
+Values are found using a JSONPath into the JSON body, the name of a response
+header, or a regular expression matched against the body text. Only a subset of
+JSONPath is supported: the root (`$`), child names (`.name` or `['name']`) and
+array indices (`[0]`, or `[-1]` for the last item).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from typing import Iterable
+
+import httpx
+
+from posting.collection import Capture
+from posting.variables import variable_value_from_json
+
+_JSON_PATH_STEP = re.compile(
+    r"""\.(?P<name>[^.\[\]]+)|\[(?P<index>-?\d+)\]|\[(?P<quote>['"])(?P<key>.*?)(?P=quote)\]"""
+)
+
+
+class CaptureError(Exception):
+    """Raised when a value can't be captured from a response."""
+
+
+@lru_cache(maxsize=256)
+def parse_json_path(path: str) -> tuple[str | int, ...]:
+    """Split a JSONPath such as `$.items[0]['id']` into its steps.
+
+    Raises:
+        CaptureError: If the path is invalid, or uses unsupported syntax.
+    """
+    path = path.strip()
+    if not path.startswith("$"):
+        raise CaptureError(f"JSONPath {path!r} must start with '$'")
+
+    steps: list[str | int] = []
+    position = 1
+    while position < len(path):
+        match = _JSON_PATH_STEP.match(path, position)
+        if match is None:
+            raise CaptureError(
+                f"Unsupported JSONPath {path!r} (at {path[position:]!r})"
+            )
+        if (index := match.group("index")) is not None:
+            steps.append(int(index))
+        else:
+            steps.append(match.group("name") or match.group("key"))
+        position = match.end()
+    return tuple(steps)
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(expression: str) -> re.Pattern[str]:
+    """Compile the regular expression of a capture.
+
+    Raises:
+        CaptureError: If the regular expression is invalid.
+    """
+    try:
+        return re.compile(expression)
+    except re.error as e:
+        raise CaptureError(f"Invalid regular expression {expression!r}: {e}")
+
+
+def _find_json_value(document: object, path: str) -> object:
+    value = document
+    for step in parse_json_path(path):
+        if isinstance(step, int):
+            if not isinstance(value, list) or not -len(value) <= step < len(value):
+                raise CaptureError(f"{path} not found in the response")
+        elif not isinstance(value, dict) or step not in value:
+            raise CaptureError(f"{path} not found in the response")
+        value = value[step]  # type: ignore[index]
+    return value
+
+
+def _body_text(response: httpx.Response) -> str:
+    try:
+        return response.text
+    except httpx.ResponseNotRead:
+        raise CaptureError(
+            "The response body was downloaded to a file, so values can't be "
+            "captured from it"
+        )
+
+
+def capture_value(capture: Capture, response: httpx.Response) -> str:
+    """Return the value the capture refers to in the response.
+
+    Raises:
+        CaptureError: If the value isn't in the response.
+    """
+    match capture.source:
+        case "header":
+            value = response.headers.get(capture.expression)
+            if value is None:
+                raise CaptureError(
+                    f"The response has no {capture.expression!r} header"
+                )
+            return value
+        case "regex":
+            pattern = compile_pattern(capture.expression)
+            found = pattern.search(_body_text(response))
+            if found is None:
+                raise CaptureError(
+                    f"{capture.expression!r} didn't match the response body"
+                )
+            return found.group(1) if pattern.groups else found.group()
+        case _:
+            try:
+                document = json.loads(_body_text(response))
+            except json.JSONDecodeError as e:
+                raise CaptureError(f"The response body isn't valid JSON: {e}")
+            return variable_value_from_json(
+                _find_json_value(document, capture.expression)
+            )
+
+
+def capture_values(
+    captures: Iterable[Capture], response: httpx.Response
+) -> dict[str, str]:
+    """Return the captured values from the response, keyed by variable name.
+
+    Raises:
+        CaptureError: If any of the values isn't in the response.
+    """
+    values: dict[str, str] = {}
+    for capture in captures:
+        try:
+            values[capture.variable] = capture_value(capture, response)
+        except CaptureError as e:
+            raise CaptureError(f"Couldn't capture {capture.variable!r}: {e}")
+    return values
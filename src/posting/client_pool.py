@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, cast
+
+import httpcore
+import httpx
+from httpx._utils import get_environment_proxies
+
+from posting.collection import CollectionConfig, Options
+from posting.config import CertificateSettings
+from posting.tls import create_ssl_context
+from posting.transport import PoolTransport
+from posting.types import CertTypes
+
+
+@dataclass(frozen=True)
+class ClientKey:
+    """The configuration which determines whether two requests can share a client.
+
+    Requests whose keys compare equal are sent through the same `httpx.AsyncClient`,
+    and therefore share its connection pool (and its keep-alive connections).
+
+    Timeouts aren't part of the key, since they're applied to each request
+    individually (see `Options.to_httpx_timeout`)."""
+
+    verify: str | bool
+    """Whether to verify SSL certificates, or the path of the CA bundle to verify with."""
+    cert: CertTypes
+    """The client certificate configuration."""
+    proxy: str | None
+    """The proxy URL, if any."""
+    auth_type: str | None
+    """The type of auth used by requests sent through the client."""
+    http2: bool = False
+    """Whether the client may use HTTP/2. Requests to the same host sent through
+    an HTTP/2 client are multiplexed over a single connection."""
+
+    @classmethod
+    def from_options(
+        cls,
+        options: Options,
+        ssl_settings: CertificateSettings,
+        auth_type: str | None = None,
+        collection_config: CollectionConfig | None = None,
+    ) -> ClientKey:
+        """Build the key for a request with the given options.
+
+        Args:
+            options: The options of the request being sent.
+            ssl_settings: The SSL configuration from the settings.
+            auth_type: The type of auth the request uses (e.g. "basic").
+            collection_config: The config of the collection the request is in.
+
+        Returns:
+            The key identifying the client the request should be sent with.
+        """
+        httpx_cert_config: list[str] = []
+        if certificate_path := ssl_settings.certificate_path:
+            httpx_cert_config.append(certificate_path)
+        if key_file := ssl_settings.key_file:
+            httpx_cert_config.append(key_file)
+        if password := ssl_settings.password:
+            httpx_cert_config.append(password.get_secret_value())
+
+        verify: str | bool = options.verify_ssl
+        if options.verify_ssl and ssl_settings.ca_bundle is not None:
+            # If verification is enabled and a CA bundle is supplied,
+            # use the CA bundle.
+            verify = ssl_settings.ca_bundle
+
+        return cls(
+            verify=verify,
+            cert=cast(CertTypes, tuple(httpx_cert_config)),
+            proxy=options.proxy_url or None,
+            auth_type=auth_type,
+            http2=options.http2 or bool(collection_config and collection_config.http2),
+        )
+
+
+@dataclass
+class _PooledClient:
+    client: httpx.AsyncClient
+    last_used: float
+    in_use: int = 0
+
+
+class ClientPool:
+    """A pool of long-lived `httpx.AsyncClient`s, keyed by `ClientKey`.
+
+    Reusing clients between sends means we also reuse their open connections,
+    so repeat requests to the same host skip the TCP and TLS handshakes.
+
+    Clients which haven't been used for `idle_timeout` seconds are closed the
+    next time a client is acquired from the pool. If more than `max_clients`
+    clients are open, the least recently used ones are closed. Clients which
+    are currently sending a request are never closed by eviction.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = 300.0,
+        max_clients: int = 8,
+        limits: httpx.Limits | None = None,
+        network_backend: httpcore.AsyncNetworkBackend | None = None,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        """Seconds a client may go unused before it's closed."""
+        self.max_clients = max_clients
+        """The maximum number of clients to keep open at once."""
+        self.limits = limits or httpx.Limits()
+        """The connection limits applied to each client in the pool."""
+        self.network_backend = network_backend
+        """The network backend connections are opened with (see
+        `posting.transport.ResolvingBackend`), or None to use httpcore's default."""
+        self._clients: OrderedDict[ClientKey, _PooledClient] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._clients
+
+    @asynccontextmanager
+    async def client(self, key: ClientKey) -> AsyncIterator[httpx.AsyncClient]:
+        """Borrow the client for the given key, creating it if required.
+
+        The client remains owned by the pool - callers should not close it.
+
+        Args:
+            key: The configuration of the client to return.
+
+        Yields:
+            An open client matching the key.
+        """
+        now = time.monotonic()
+        await self.evict_idle(now)
+
+        pooled = self._clients.get(key)
+        if pooled is None or pooled.client.is_closed:
+            pooled = _PooledClient(client=self.create_client(key), last_used=now)
+            self._clients[key] = pooled
+        self._clients.move_to_end(key)
+
+        pooled.in_use += 1
+        try:
+            await self._enforce_max_clients()
+            yield pooled.client
+        finally:
+            pooled.in_use -= 1
+            pooled.last_used = time.monotonic()
+
+    def create_client(self, key: ClientKey) -> httpx.AsyncClient:
+        """Create a new client for the given key."""
+        # The SSL context is shared with every other client with the same SSL
+        # configuration, so the CA bundle is only loaded once, and TLS sessions
+        # are resumed even after this client is closed.
+        ssl_context = create_ssl_context(key.verify, key.cert, key.http2)
+        # The proxy is handled by the transport rather than the client, so that
+        # connections to it are opened with the network backend too.
+        def create_transport(proxy: str | None) -> PoolTransport:
+            return PoolTransport(
+                ssl_context,
+                limits=self.limits,
+                http2=key.http2,
+                proxy=proxy,
+                network_backend=self.network_backend,
+            )
+
+        # httpx only reads proxies from the environment (`HTTP_PROXY`, `NO_PROXY`
+        # and so on) when it creates the transport itself, so mount a transport
+        # for each of them. Hosts mounted as None use the default transport.
+        mounts: dict[str, httpx.AsyncBaseTransport | None] = {}
+        if key.proxy is None:
+            mounts = {
+                pattern: None if proxy is None else create_transport(proxy)
+                for pattern, proxy in get_environment_proxies().items()
+            }
+        client = httpx.AsyncClient(
+            verify=ssl_context,
+            limits=self.limits,
+            http2=key.http2,
+            transport=create_transport(key.proxy),
+            mounts=mounts,
+        )
+        # Cookies are attached by Posting itself (see `Options.attach_cookies`),
+        # so a long-lived client must not store cookies between sends.
+        client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return client
+
+    async def evict_idle(self, now: float | None = None) -> None:
+        """Close and remove clients which have been idle for too long."""
+        if now is None:
+            now = time.monotonic()
+
+        expired = [
+            key
+            for key, pooled in self._clients.items()
+            if not pooled.in_use and now - pooled.last_used > self.idle_timeout
+        ]
+        for key in expired:
+            pooled = self._clients.pop(key)
+            await pooled.client.aclose()
+
+    async def _enforce_max_clients(self) -> None:
+        """Close the least recently used idle clients until the pool is within bounds."""
+        excess = len(self._clients) - self.max_clients
+        if excess <= 0:
+            return
+
+        lru_idle = [key for key, pooled in self._clients.items() if not pooled.in_use]
+        for key in lru_idle[:excess]:
+            pooled = self._clients.pop(key)
+            await pooled.client.aclose()
+
+    async def aclose(self) -> None:
+        """Close every client in the pool."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for pooled in clients:
+            await pooled.client.aclose()
@@ -1,18 +1,33 @@
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from itertools import islice
+import hashlib
+import json
 from pathlib import Path
-from string import Template
-from typing import Any, Literal, get_args
+import pickle
+from typing import Any, Iterator, Literal, Mapping, TypeVar, get_args
 import httpx
-from pydantic import BaseModel, Field, HttpUrl, SecretStr
+from pydantic import BaseModel, Field, HttpUrl, PrivateAttr, SecretStr
 import rich
 import yaml
 import os
+import sys
+from posting.file_watcher import FileFingerprint
+from posting.locations import cache_directory
+from posting.templates import RenderMemo, compile_template, render_template
 from posting.tuple_to_multidict import tuples_to_dict
 from posting.variables import SubstitutionError
 
 from posting.version import VERSION
 
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+"""The fastest safe YAML loader available (the libyaml-based one, if installed)."""
+
+_PROCESS_POOL_THRESHOLD = 256
+"""The number of request files which must be parsed before a process pool is used."""
+
 HttpRequestMethod = Literal["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"]
 VALID_HTTP_METHODS = get_args(HttpRequestMethod)
 
@@ -37,6 +52,16 @@ class Auth(BaseModel):
     basic: BasicAuth | None = Field(default=None)
     digest: DigestAuth | None = Field(default=None)
 
+    def to_httpx_auth(self) -> httpx.Auth | None:
+        """Convert the auth model to an httpx auth instance."""
+        match self.type:
+            case "basic" if self.basic is not None:
+                return httpx.BasicAuth(self.basic.username, self.basic.password)
+            case "digest" if self.digest is not None:
+                return httpx.DigestAuth(self.digest.username, self.digest.password)
+            case _:
+                return None
+
 
 class BasicAuth(BaseModel):
     username: str = Field(default="")
@@ -76,12 +101,164 @@ class Cookie(BaseModel):
         return [Cookie(name=name, value=value) for name, value in cookies.items()]
 
 
+class Capture(BaseModel):
+    """Captures a value from a response into a variable, so that requests sent
+    after it (e.g. by `posting run`) can refer to the value."""
+
+    variable: str
+    """The name of the variable to store the value in."""
+    source: Literal["json", "header", "regex"] = Field(default="json")
+    """Where the value is found: in the JSON body, in a response header, or in
+    the body text."""
+    expression: str
+    """A JSONPath such as `$.data.token` (for "json"), the name of a header (for
+    "header"), or a regular expression (for "regex"). If the regular expression
+    contains a group, the text matched by the first group is captured."""
+
+
+class RetryPolicy(BaseModel):
+    """When and how often to retry a request which failed in a way that might
+    succeed if it was sent again."""
+
+    max_attempts: int = Field(default=1, ge=1)
+    """The maximum number of times to send the request, including the first
+    attempt. The default of 1 disables retries."""
+    backoff_base: float = Field(default=0.5, ge=0)
+    """The delay (in seconds) before the first retry. The delay doubles with
+    each subsequent retry."""
+    backoff_max: float = Field(default=30.0, ge=0)
+    """The longest delay (in seconds) between two attempts, including delays
+    requested by the server via the Retry-After header."""
+    jitter: bool = Field(default=True)
+    """If enabled, each delay is chosen at random between zero and the backoff
+    delay, so that many clients retrying at once don't do so in lockstep."""
+    retry_statuses: list[int] = Field(default_factory=lambda: [429, 502, 503, 504])
+    """The response status codes which cause the request to be retried."""
+    retry_exceptions: list[str] = Field(
+        default_factory=lambda: ["ConnectError", "ConnectTimeout", "RemoteProtocolError"]
+    )
+    """The names of the httpx exceptions which cause the request to be retried.
+    Subclasses are included, so e.g. "TransportError" retries any network error."""
+    respect_retry_after: bool = Field(default=True)
+    """If enabled, wait for as long as the Retry-After header of a retried
+    response asks (up to `backoff_max`) instead of using the backoff delay."""
+
+
 class Options(BaseModel):
     follow_redirects: bool = Field(default=True)
     verify_ssl: bool = Field(default=True)
     attach_cookies: bool = Field(default=True)
     proxy_url: str = Field(default="")
     timeout: float = Field(default=5.0)
+    """The timeout (in seconds) for each phase of the request which doesn't
+    have a more specific timeout set below."""
+    connect_timeout: float | None = Field(default=None)
+    """The maximum time to wait for a connection to be established."""
+    read_timeout: float | None = Field(default=None)
+    """The maximum time to wait between chunks of the response being received."""
+    write_timeout: float | None = Field(default=None)
+    """The maximum time to wait between chunks of the request being sent."""
+    pool_timeout: float | None = Field(default=None)
+    """The maximum time to wait for a connection from the connection pool."""
+    total_timeout: float | None = Field(default=None)
+    """The deadline for the entire request, from sending it to receiving the
+    last byte of the response body. If None, there is no overall deadline."""
+    download_path: str = Field(default="")
+    """A file to write the response body to, instead of displaying it."""
+    overwrite_download: bool = Field(default=False)
+    """Whether to replace the file at `download_path` if it already exists.
+    If disabled, the download fails rather than overwrite the file."""
+    http2: bool = Field(default=False)
+    retry: RetryPolicy = Field(default_factory=RetryPolicy)
+
+    def to_httpx_timeout(self) -> httpx.Timeout:
+        """Convert the per-phase timeouts to an httpx timeout.
+
+        Phases without their own timeout use `timeout`.
+        """
+        phase_timeouts = {
+            "connect": self.connect_timeout,
+            "read": self.read_timeout,
+            "write": self.write_timeout,
+            "pool": self.pool_timeout,
+        }
+        return httpx.Timeout(
+            self.timeout,
+            **{
+                phase: timeout
+                for phase, timeout in phase_timeouts.items()
+                if timeout is not None
+            },
+        )
+
+
+COLLECTION_CONFIG_FILE = "posting.collection.yaml"
+"""The name of the file, in the root of a collection, which configures the collection."""
+
+
+class RateLimit(BaseModel):
+    """A limit on the rate that requests are sent to a host."""
+
+    rate: float = Field(gt=0)
+    """The sustained number of requests per second."""
+    burst: int = Field(default=1, ge=1)
+    """The number of requests which may be sent at once after a quiet period,
+    before the rate applies."""
+
+
+class CollectionConfig(BaseModel):
+    """Configuration which applies to every request in a collection.
+
+    This is read from the `posting.collection.yaml` file in the root directory
+    of the collection, if there is one.
+    """
+
+    http2: bool = Field(default=False)
+    """If enabled, HTTP/2 is used for every request in the collection (when the
+    server supports it), as if the `http2` option was set on each request."""
+    rate_limits: dict[str, RateLimit] = Field(default_factory=dict)
+    """Limits on the rate that requests are sent to each host, keyed by host name.
+    The key "*" applies to each host which doesn't have a limit of its own."""
+    resolve: dict[str, str] = Field(default_factory=dict)
+    """Addresses to connect to instead of resolving hostnames, like curl's
+    `--resolve`. Keys are either a host name, or a host name and port separated
+    by a colon (e.g. `api.example.com:443`), and values are IP addresses."""
+    environments: dict[str, list[str]] = Field(default_factory=dict)
+    """Sets of environment files which can be switched between from the command
+    palette, keyed by environment name. Relative paths are relative to the
+    collection directory."""
+
+    @classmethod
+    def from_directory(cls, directory: Path) -> CollectionConfig:
+        """Load the config for the collection in the given directory.
+
+        If the collection has no config file, or it can't be loaded, the default
+        config is returned.
+        """
+        config_path = directory / COLLECTION_CONFIG_FILE
+        if not config_path.is_file():
+            return cls()
+
+        try:
+            with open(config_path, "r", encoding="utf-8") as file:
+                data = yaml.load(file, Loader=_YAML_LOADER) or {}
+            return cls(**data)
+        except Exception as e:
+            print(f"Failed to load {config_path}: {e}", file=sys.stderr)
+            return cls()
+
+    @classmethod
+    def for_request_file(cls, request_path: Path) -> CollectionConfig:
+        """Load the config for the collection containing a request file.
+
+        The config file is looked for in the directory of the request file, then
+        in each of its parent directories. If there's no config file, the default
+        config is returned.
+        """
+        for directory in request_path.resolve().parents:
+            if (directory / COLLECTION_CONFIG_FILE).is_file():
+                return cls.from_directory(directory)
+        return cls()
 
 
 class RequestBody(BaseModel):
@@ -100,6 +277,10 @@ class RequestBody(BaseModel):
         return httpx_args
 
 
+PairT = TypeVar("PairT", Header, QueryParam, FormItem)
+CredentialsT = TypeVar("CredentialsT", BasicAuth, DigestAuth)
+
+
 class RequestModel(BaseModel):
     name: str = Field(default="")
     """The name of the request. This is used to identify the request in the UI.
@@ -147,53 +328,142 @@ class RequestModel(BaseModel):
     options: Options = Field(default_factory=Options)
     """The options for the request."""
 
-    def apply_template(self, variables: dict[str, Any]) -> None:
-        """Apply the template to the request model."""
+    captures: list[Capture] = Field(default_factory=list)
+    """Values to capture from the response into variables."""
+
+    _render_memo: RenderMemo = PrivateAttr(default_factory=dict)
+    """The results of rendering the request's fields, reused by `render` while the
+    values of the variables they refer to don't change."""
+
+    def template_fields(self) -> Iterator[tuple[str, str]]:
+        """Yield the path and value of each field which variables are substituted
+        into, such as ("url", ...) or ("headers[0].value", ...)."""
+        yield "url", self.url
+        yield "description", self.description
+        yield "options.proxy_url", self.options.proxy_url
+        yield "options.download_path", self.options.download_path
+        if self.body:
+            if self.body.content:
+                yield "body.content", self.body.content
+            for index, item in enumerate(self.body.form_data or []):
+                yield f"body.form_data[{index}].name", item.name
+                yield f"body.form_data[{index}].value", item.value
+        for index, header in enumerate(self.headers):
+            yield f"headers[{index}].name", header.name
+            yield f"headers[{index}].value", header.value
+        for index, param in enumerate(self.params):
+            yield f"params[{index}].name", param.name
+            yield f"params[{index}].value", param.value
+        if self.auth:
+            if self.auth.basic:
+                yield "auth.basic.username", self.auth.basic.username
+                yield "auth.basic.password", self.auth.basic.password
+            if self.auth.digest:
+                yield "auth.digest.username", self.auth.digest.username
+                yield "auth.digest.password", self.auth.digest.password
+
+    def variable_index(self) -> dict[str, tuple[str, ...]]:
+        """Return the variables referenced by each field of the request, keyed by
+        the path of the field (see `template_fields`).
+
+        Fields which don't reference any variables are left out.
+        """
+        index: dict[str, tuple[str, ...]] = {}
+        for path, value in self.template_fields():
+            if "$" in value:
+                if variables := compile_template(value).variables:
+                    index[path] = variables
+        return index
+
+    def render(self, variables: Mapping[str, Any]) -> RequestModel:
+        """Return a copy of the request with the variables substituted into it.
+
+        The request itself isn't modified. Parts of the request which variables
+        aren't substituted into (e.g. cookies) are shared with the copy.
+
+        Raises:
+            SubstitutionError: If the request refers to a variable which isn't
+                defined, or contains an invalid placeholder.
+        """
+
+        memo = self._render_memo
+
+        def render(text: str) -> str:
+            return render_template(text, variables, memo)
+
+        def render_pair(item: PairT) -> PairT:
+            return item.model_copy(
+                update={"name": render(item.name), "value": render(item.value)}
+            )
+
+        def render_credentials(
+            credentials: CredentialsT | None,
+        ) -> CredentialsT | None:
+            if credentials is None:
+                return None
+            return credentials.model_copy(
+                update={
+                    "username": render(credentials.username),
+                    "password": render(credentials.password),
+                }
+            )
+
         try:
-            template = Template(self.url)
-            self.url = template.substitute(variables)
-
-            template = Template(self.description)
-            self.description = template.substitute(variables)
-            template = Template(self.options.proxy_url)
-            self.options.proxy_url = template.substitute(variables)
-
-            if self.body:
-                if self.body.content:
-                    template = Template(self.body.content)
-                    self.body.content = template.substitute(variables)
-                if self.body.form_data:
-                    for item in self.body.form_data:
-                        template = Template(item.name)
-                        item.name = template.substitute(variables)
-                        template = Template(item.value)
-                        item.value = template.substitute(variables)
-
-            for header in self.headers:
-                template = Template(header.name)
-                header.name = template.substitute(variables)
-                template = Template(header.value)
-                header.value = template.substitute(variables)
-            for param in self.params:
-                template = Template(param.name)
-                param.name = template.substitute(variables)
-                template = Template(param.value)
-                param.value = template.substitute(variables)
-
-            if self.auth:
-                if self.auth.basic:
-                    template = Template(self.auth.basic.username)
-                    self.auth.basic.username = template.substitute(variables)
-                    template = Template(self.auth.basic.password)
-                    self.auth.basic.password = template.substitute(variables)
-                if self.auth.digest:
-                    template = Template(self.auth.digest.username)
-                    self.auth.digest.username = template.substitute(variables)
-                    template = Template(self.auth.digest.password)
-                    self.auth.digest.password = template.substitute(variables)
+            options = self.options.model_copy(
+                update={
+                    "proxy_url": render(self.options.proxy_url),
+                    "download_path": render(self.options.download_path),
+                }
+            )
+            body = self.body
+            if body is not None:
+                form_data = body.form_data
+                if form_data:
+                    form_data = [render_pair(item) for item in form_data]
+                body = body.model_copy(
+                    update={
+                        "content": body.content and render(body.content),
+                        "form_data": form_data,
+                    }
+                )
+            auth = self.auth
+            if auth is not None:
+                auth = auth.model_copy(
+                    update={
+                        "basic": render_credentials(auth.basic),
+                        "digest": render_credentials(auth.digest),
+                    }
+                )
+            return self.model_copy(
+                update={
+                    "url": render(self.url),
+                    "description": render(self.description),
+                    "options": options,
+                    "body": body,
+                    "headers": [render_pair(header) for header in self.headers],
+                    "params": [render_pair(param) for param in self.params],
+                    "auth": auth,
+                }
+            )
         except (KeyError, ValueError) as e:
             raise SubstitutionError(f"Variable not defined: {e}")
 
+    def apply_template(self, variables: Mapping[str, Any]) -> None:
+        """Substitute the variables into the request, modifying it in place.
+
+        Raises:
+            SubstitutionError: If the request refers to a variable which isn't
+                defined, or contains an invalid placeholder.
+        """
+        rendered = self.render(variables)
+        self.url = rendered.url
+        self.description = rendered.description
+        self.options = rendered.options
+        self.body = rendered.body
+        self.headers = rendered.headers
+        self.params = rendered.params
+        self.auth = rendered.auth
+
     def to_httpx(self, client: httpx.AsyncClient) -> httpx.Request:
         """Convert the request model to an httpx request."""
         return client.build_request(
@@ -217,6 +487,7 @@ class RequestModel(BaseModel):
                     if cookie.enabled
                 ]
             ),
+            timeout=self.options.to_httpx_timeout(),
         )
 
     def save_to_disk(self, path: Path) -> None:
@@ -263,6 +534,14 @@ class Collection(BaseModel):
     requests: list[RequestModel] = Field(default_factory=list)
     children: list[Collection] = Field(default_factory=list)
     readme: str | None = Field(default=None)
+    config: CollectionConfig = Field(default_factory=CollectionConfig)
+    """The collection config. Only the root collection of a directory has one."""
+
+    _unscanned: bool = PrivateAttr(default=False)
+    """True if the collection's directory hasn't been read yet, so its requests and
+    sub-collections aren't known. Only collections loaded lazily start unscanned."""
+    _cache: RequestFileCache | None = PrivateAttr(default=None)
+    """The cache to use when loading the request files found by a scan."""
 
     @classmethod
     def from_openapi_spec(
@@ -311,11 +590,34 @@ class Collection(BaseModel):
         return readme.strip()
 
     @classmethod
-    def from_directory(cls, directory: str) -> Collection:
+    def from_directory(
+        cls,
+        directory: str,
+        use_cache: bool = True,
+        lazy_threshold: int | None = None,
+    ) -> Collection:
         """Load all request models into a tree structure from a directory containing .posting.yaml files.
 
+        Request files which haven't changed since they were last loaded are read from
+        an on-disk cache, skipping YAML parsing and validation. The remaining files
+        are parsed in parallel when there are enough of them to make it worthwhile.
+        Collections loaded later (by `load_requests` or `load_all`, which may run
+        while the app is running) are parsed in the calling thread instead.
+
+        If the directory contains more than `lazy_threshold` request files, only the
+        top level of the directory is read: its requests, and a sub-collection for
+        each folder in it. The contents of a sub-collection are read by calling
+        `load_requests` on it (the collection browser does this when the folder is
+        expanded), or by calling `load_all` on any collection above it. Counting the
+        request files stops as soon as the threshold is passed, so large collections
+        are never walked in full on startup. When loading lazily, every folder is
+        shown as a sub-collection (except hidden ones), even if it has no requests.
+
         Args:
             directory_path: The path to the directory containing .posting.yaml files.
+            use_cache: Whether to use the on-disk cache of parsed requests.
+            lazy_threshold: The number of request files above which sub-collections
+                are loaded lazily. If None, everything is loaded immediately.
 
         Returns:
             Collection: The root collection containing all loaded requests and subcollections.
@@ -327,34 +629,64 @@ class Collection(BaseModel):
             directory = str(directory_path)
 
         request_files = directory_path.rglob("*.posting.yaml")
+        if lazy_threshold is None:
+            request_files = list(request_files)
+            lazy = False
+        else:
+            request_files = list(islice(request_files, lazy_threshold + 1))
+            lazy = len(request_files) > lazy_threshold
+
         collection_name = directory_path.name
-        root_collection = Collection(name=collection_name, path=directory_path)
-
-        for file_path in request_files:
-            try:
-                path_string = str(file_path)
-                request = load_request_from_yaml(path_string)
-                path_parts = (
-                    path_string[len(directory) :].strip(os.path.sep).split(os.path.sep)
-                )
-                current_level = root_collection
-                subpath = root_collection.path
-                for part in path_parts[:-1]:
-                    subpath = subpath / part
-                    found = False
-                    for child in current_level.children:
-                        if child.name == part:
-                            current_level = child
-                            found = True
-                            break
-
-                    if not found:
-                        new_collection = Collection(name=part, path=subpath)
-                        current_level.children.append(new_collection)
-                        current_level = new_collection
-                current_level.requests.append(request)
-            except Exception as e:
-                print(f"Failed to load {file_path}: {e}")
+        root_collection = Collection(
+            name=collection_name,
+            path=directory_path,
+            config=CollectionConfig.from_directory(directory_path),
+        )
+
+        cache = RequestFileCache.for_collection(directory_path) if use_cache else None
+        if lazy:
+            # Only the top level is read for now. Each folder is read when the
+            # collection for it is loaded.
+            root_collection._unscanned = True
+            root_collection._cache = cache
+            root_collection.load_requests()
+            return root_collection
+
+        collections_by_directory: dict[Path, Collection] = {}
+
+        def collection_for(file_path: Path) -> Collection:
+            """Return the collection for the file's directory, creating it if required."""
+            parent_directory = file_path.parent
+            collection = collections_by_directory.get(parent_directory)
+            if collection is not None:
+                return collection
+
+            path_string = str(file_path)
+            path_parts = (
+                path_string[len(directory) :].strip(os.path.sep).split(os.path.sep)
+            )
+            current_level = root_collection
+            subpath = root_collection.path
+            for part in path_parts[:-1]:
+                subpath = subpath / part
+                found = False
+                for child in current_level.children:
+                    if child.name == part:
+                        current_level = child
+                        found = True
+                        break
+
+                if not found:
+                    new_collection = Collection(name=part, path=subpath)
+                    current_level.children.append(new_collection)
+                    current_level = new_collection
+
+            collections_by_directory[parent_directory] = current_level
+            return current_level
+
+        loaded_requests = load_request_files(request_files, cache, use_processes=True)
+        for file_path, request in loaded_requests.items():
+            collection_for(file_path).requests.append(request)
 
         # Sort the requests and children at all levels of the tree
         def sort_collection(collection: Collection):
@@ -362,10 +694,7 @@ class Collection(BaseModel):
             collection.children.sort(key=lambda x: x.name)
 
             # Sort requests
-            method_order = {"GET": 0, "POST": 1, "PUT": 2, "PATCH": 3, "DELETE": 4}
-            collection.requests.sort(
-                key=lambda x: (method_order.get(x.method, 5), x.name)
-            )
+            sort_requests(collection.requests)
 
             # Recursively sort child collections
             for child in collection.children:
@@ -374,6 +703,92 @@ class Collection(BaseModel):
         sort_collection(root_collection)
         return root_collection
 
+    @property
+    def loaded(self) -> bool:
+        """True if the requests and sub-collections directly inside this collection
+        have been loaded.
+
+        Only collections created by `from_directory` with lazy loading enabled
+        can be unloaded."""
+        return not self._unscanned
+
+    def _scan(self) -> list[Path]:
+        """Read the collection's directory, adding an unloaded sub-collection for
+        each folder in it, and return the request files directly inside it."""
+        request_files: list[Path] = []
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            child = Collection(name=entry.name, path=Path(entry.path))
+                            child._unscanned = True
+                            child._cache = self._cache
+                            self.children.append(child)
+                    elif entry.name.endswith(".posting.yaml") and entry.is_file():
+                        request_files.append(Path(entry.path))
+        except OSError as e:
+            print(f"Failed to read {self.path}: {e}", file=sys.stderr)
+
+        self.children.sort(key=lambda child: child.name)
+        self._unscanned = False
+        return request_files
+
+    def load_requests(self) -> None:
+        """Read the request files and folders directly inside this collection, if
+        they haven't been read already. Child collections are left unloaded."""
+        if not self._unscanned:
+            return
+
+        request_files = self._scan()
+        loaded_requests = load_request_files(
+            request_files, self._cache, prune_cache=False
+        )
+        self.requests.extend(loaded_requests.values())
+        sort_requests(self.requests)
+
+    def load_all(self) -> None:
+        """Load every request in this collection and its children.
+
+        The folders are read first, and then the files of all unloaded collections
+        are read in a single batch.
+        """
+        scanned: list[tuple[Collection, list[Path]]] = []
+        stack = [self]
+        while stack:
+            collection = stack.pop()
+            if not collection.loaded:
+                scanned.append((collection, collection._scan()))
+            stack.extend(collection.children)
+
+        if not scanned:
+            return
+
+        loaded_requests = load_request_files(
+            [file_path for _, request_files in scanned for file_path in request_files],
+            scanned[0][0]._cache,
+            prune_cache=False,
+        )
+        for collection, request_files in scanned:
+            collection.requests.extend(
+                loaded_requests[file_path]
+                for file_path in request_files
+                if file_path in loaded_requests
+            )
+            sort_requests(collection.requests)
+
+    def iter_requests(self) -> Iterator[RequestModel]:
+        """Iterate over the requests in this collection and all of its children.
+
+        Any requests which haven't been loaded yet are loaded first."""
+        self.load_all()
+        yield from self._iter_loaded_requests()
+
+    def _iter_loaded_requests(self) -> Iterator[RequestModel]:
+        yield from self.requests
+        for child in self.children:
+            yield from child._iter_loaded_requests()
+
     def save_to_disk(self, path: Path) -> None:
         """Save the collection to a directory on disk."""
         if self.readme:
@@ -386,6 +801,17 @@ class Collection(BaseModel):
             child.save_to_disk(path / child.name)
 
 
+def request_sort_key(request: RequestModel) -> tuple[int, str]:
+    """The key requests are sorted by in the collection browser."""
+    method_order = {"GET": 0, "POST": 1, "PUT": 2, "PATCH": 3, "DELETE": 4}
+    return method_order.get(request.method, 5), request.name
+
+
+def sort_requests(requests: list[RequestModel]) -> None:
+    """Sort requests in place, in the order they're shown in the collection browser."""
+    requests.sort(key=request_sort_key)
+
+
 def load_request_from_yaml(file_path: str) -> RequestModel:
     """Load a request model from a YAML file.
 
@@ -395,6 +821,182 @@ def load_request_from_yaml(file_path: str) -> RequestModel:
     Returns:
         RequestModel: The request model loaded from the YAML file.
     """
-    with open(file_path, "r") as file:
-        data = yaml.safe_load(file)
+    with open(file_path, "r", encoding="utf-8") as file:
+        data = yaml.load(file, Loader=_YAML_LOADER)
         return RequestModel(**data, path=Path(file_path))
+
+
+@cache
+def _cache_version() -> str:
+    """Identifies the version of Posting and request model schema that cached
+    request models were created with."""
+    schema = json.dumps(RequestModel.model_json_schema(), sort_keys=True)
+    return f"{VERSION}-{hashlib.sha256(schema.encode()).hexdigest()[:16]}"
+
+
+class RequestFileCache:
+    """An on-disk cache of request models, keyed by the path, modification time
+    and size of the file they were loaded from.
+
+    A request whose file is unchanged since it was cached can be used without
+    parsing the YAML or validating the model again.
+    """
+
+    def __init__(self, cache_file: Path) -> None:
+        self.cache_file = cache_file
+        """The file the cache is stored in."""
+        self._entries: dict[str, tuple[FileFingerprint, RequestModel]] = {}
+        self._dirty = False
+
+    @classmethod
+    def for_collection(cls, directory: Path) -> RequestFileCache:
+        """Load the cache for the collection in the given directory."""
+        directory_hash = hashlib.sha256(str(directory.resolve()).encode()).hexdigest()
+        cache = cls(cache_directory() / "collections" / f"{directory_hash}.pickle")
+        cache.load()
+        return cache
+
+    def load(self) -> None:
+        """Read the cache from disk. A missing or unreadable cache is treated as empty."""
+        try:
+            with open(self.cache_file, "rb") as file:
+                version, entries = pickle.load(file)
+        except Exception:
+            return
+
+        # Models cached by a different version of Posting (or before the schema
+        # of the request model changed) may not match it, so they're discarded.
+        if version == _cache_version():
+            self._entries = entries
+
+    def get(self, path: Path, fingerprint: FileFingerprint) -> RequestModel | None:
+        """Return the cached request for the file, if the file is unchanged."""
+        entry = self._entries.get(str(path))
+        if entry is None or entry[0] != fingerprint:
+            return None
+        return entry[1]
+
+    def put(
+        self, path: Path, fingerprint: FileFingerprint, request: RequestModel
+    ) -> None:
+        """Add the request loaded from the file to the cache."""
+        self._entries[str(path)] = (fingerprint, request)
+        self._dirty = True
+
+    def save(self, keep: set[Path] | None = None) -> None:
+        """Write the cache to disk.
+
+        If `keep` is supplied, entries for files not in it are discarded.
+        Failing to write the cache is not an error - it'll be rebuilt next time.
+        """
+        if keep is not None:
+            keep_strings = {str(path) for path in keep}
+            stale = self._entries.keys() - keep_strings
+            if stale:
+                for path_string in stale:
+                    del self._entries[path_string]
+                self._dirty = True
+
+        if not self._dirty:
+            return
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so that another Posting process
+            # never reads a partially written cache.
+            temporary_file = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(temporary_file, "wb") as file:
+                pickle.dump((_cache_version(), self._entries), file)
+            temporary_file.replace(self.cache_file)
+        except Exception:
+            return
+        self._dirty = False
+
+
+def _read_yaml_file(file_path: Path) -> tuple[bool, Any]:
+    """Parse a YAML file, returning (True, data) or (False, error message).
+
+    Errors are returned rather than raised so the result can always be passed
+    back from a worker process.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            return True, yaml.load(file, Loader=_YAML_LOADER)
+    except Exception as e:
+        return False, str(e)
+
+
+def _read_yaml_files(
+    file_paths: list[Path], use_processes: bool = False
+) -> list[tuple[bool, Any]]:
+    """Parse YAML files, using a process pool if it's allowed and there are enough
+    of them."""
+    cpu_count = os.cpu_count() or 1
+    if use_processes and len(file_paths) >= _PROCESS_POOL_THRESHOLD and cpu_count > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(cpu_count, 8)) as executor:
+                return list(executor.map(_read_yaml_file, file_paths, chunksize=64))
+        except Exception:
+            # If the pool can't be used on this platform, parse in this process.
+            pass
+    return [_read_yaml_file(file_path) for file_path in file_paths]
+
+
+def load_request_files(
+    file_paths: list[Path],
+    cache: RequestFileCache | None = None,
+    prune_cache: bool = True,
+    use_processes: bool = False,
+) -> dict[Path, RequestModel]:
+    """Load request models from YAML files, using the cache where possible.
+
+    Files which can't be loaded are reported on stderr and omitted from the result.
+
+    Args:
+        file_paths: The paths of the `.posting.yaml` files to load.
+        cache: The cache to read unchanged requests from, and add new requests to.
+        prune_cache: Whether to discard cache entries for files other than those
+            loaded. This should be False when only part of a collection is loaded.
+        use_processes: Whether the files may be parsed by a pool of worker
+            processes. Starting processes (by forking, on most platforms) isn't
+            safe once the app is running with other threads, so this should only
+            be enabled for the initial load of a collection.
+
+    Returns:
+        A mapping of file path to the request loaded from it.
+    """
+    loaded: dict[Path, RequestModel] = {}
+    to_parse: list[tuple[Path, FileFingerprint]] = []
+    for file_path in file_paths:
+        try:
+            stat = file_path.stat()
+        except OSError as e:
+            print(f"Failed to load {file_path}: {e}", file=sys.stderr)
+            continue
+
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+        cached = cache.get(file_path, fingerprint) if cache else None
+        if cached is not None:
+            loaded[file_path] = cached
+        else:
+            to_parse.append((file_path, fingerprint))
+
+    parsed = _read_yaml_files(
+        [file_path for file_path, _ in to_parse], use_processes=use_processes
+    )
+    for (file_path, fingerprint), (success, data) in zip(to_parse, parsed):
+        try:
+            if not success:
+                raise ValueError(data)
+            request = RequestModel(**data, path=file_path)
+        except Exception as e:
+            print(f"Failed to load {file_path}: {e}", file=sys.stderr)
+            continue
+
+        loaded[file_path] = request
+        if cache is not None:
+            cache.put(file_path, fingerprint, request)
+
+    if cache is not None:
+        cache.save(keep=set(loaded) if prune_cache else None)
+    return loaded
@@ -75,6 +75,17 @@ class PostingProvider(Provider):
                 ),
             )
 
+            # Only show the environments which aren't the current one.
+            for environment in screen.environments.environments:
+                if environment != screen.environment:
+                    commands_to_show.append(
+                        (
+                            f"environment: {environment}",
+                            partial(screen.switch_environment, environment),
+                            f"Switch to the {environment} environment",
+                        ),
+                    )
+
         return tuple(commands_to_show)
 
     async def discover(self) -> Hits:
@@ -40,9 +40,33 @@ class ResponseSettings(BaseModel):
     prettify_json: bool = Field(default=True)
     """If enabled, JSON responses will be pretty-formatted."""
 
+    prettify_json_background_threshold: int = Field(default=256 * 1024, ge=0)
+    """JSON responses larger than this many characters are displayed unformatted
+    at first, and pretty-formatted in the background."""
+
     show_size_and_time: bool = Field(default=True)
     """If enabled, the size and time taken for the response will be displayed."""
 
+    max_display_bytes: int = Field(default=5 * 1024 * 1024, ge=0)
+    """The maximum number of bytes of a response body to show in the response
+    body text area. Only this much of the body is held in memory."""
+
+    spill_to_file: bool = Field(default=True)
+    """If enabled, response bodies larger than `max_display_bytes` are written in
+    full to a temporary file, so the rest of the body can still be viewed."""
+
+
+class HttpCacheSettings(BaseModel):
+    """Configuration for the HTTP response cache."""
+
+    enabled: bool = Field(default=False)
+    """If enabled, responses are cached on disk according to their caching
+    headers, and reused or revalidated when the same URL is requested again."""
+
+    max_size: int = Field(default=256 * 1024 * 1024, ge=0)
+    """The maximum total size of the cached response bodies, in bytes. When the
+    cache grows beyond this, the least recently used responses are removed."""
+
 
 class FocusSettings(BaseModel):
     """Configuration relating to focus."""
@@ -83,6 +107,31 @@ class CommandPaletteSettings(BaseModel):
     """If enabled, the command palette will display a preview of the selected theme when the cursor is over it."""
 
 
+class CollectionBrowserSettings(BaseModel):
+    """Configuration for the collection browser."""
+
+    lazy_load_threshold: int | None = Field(default=1000, ge=0)
+    """Collections containing more request files than this are loaded lazily:
+    the requests in a folder are only read when the folder is expanded.
+    If unset, collections are always loaded in full on startup."""
+
+    watch_interval: float | None = Field(default=None, gt=0)
+    """How often (in seconds) to check the collection directory for request files
+    which were added, changed or deleted outside of Posting. If unset (the
+    default), the collection directory is not watched."""
+
+
+class RunnerSettings(BaseModel):
+    """Configuration for sending many requests at once (e.g. running a folder)."""
+
+    concurrency: int = Field(default=8, ge=1)
+    """The maximum number of requests which may be in flight at once."""
+
+    per_host_limit: int | None = Field(default=None, ge=1)
+    """The maximum number of requests to a single host which may be in flight
+    at once. If unset, only the overall concurrency limit applies."""
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -115,6 +164,11 @@ class Settings(BaseSettings):
     using the `${VARIABLE_NAME}` syntax. When disabled, you are restricted to variables
     defined in any `.env` files explicitly supplied via the `--env` option."""
 
+    env_watch_interval: float | None = Field(default=None, gt=0)
+    """How often (in seconds) to check the `.env` files of the environments for
+    changes made outside of Posting. Changed files are reloaded, and the new
+    values are used by the next request. If unset, the files are not watched."""
+
     text_input: TextInputSettings = Field(default_factory=TextInputSettings)
     """General configuration for inputs and text area widgets."""
 
@@ -124,6 +178,17 @@ class Settings(BaseSettings):
     response: ResponseSettings = Field(default_factory=ResponseSettings)
     """Configuration for the response viewer."""
 
+    http_cache: HttpCacheSettings = Field(default_factory=HttpCacheSettings)
+    """Configuration for the HTTP response cache."""
+
+    dns_cache_ttl: float = Field(default=60.0, ge=0)
+    """How long, in seconds, to remember the addresses a hostname resolved to."""
+
+    preconnect: bool = Field(default=False)
+    """If enabled, selecting a request in the collection browser opens a connection
+    to its host in the background, so sending it doesn't wait for the connection
+    to be set up."""
+
     heading: HeadingSettings = Field(default_factory=HeadingSettings)
     """Configuration for the heading bar."""
 
@@ -162,6 +227,14 @@ class Settings(BaseSettings):
     focus: FocusSettings = Field(default_factory=FocusSettings)
     """Configuration for focus."""
 
+    runner: RunnerSettings = Field(default_factory=RunnerSettings)
+    """Configuration for sending many requests at once."""
+
+    collection_browser: CollectionBrowserSettings = Field(
+        default_factory=CollectionBrowserSettings
+    )
+    """Configuration for the collection browser."""
+
     @classmethod
     def settings_customise_sources(
         cls,
@@ -0,0 +1,69 @@
+"""Read the rows of a data file, for sending a request once per row.
+
+CSV files (with a header row) and JSON lines files (one object per line) are
+supported. Rows are read lazily, one at a time, so files with millions of rows
+don't need to fit in memory.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+from typing import Iterator
+
+from posting.variables import variable_value_from_json
+
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+
+
+class DataFileError(Exception):
+    """Raised when a data file can't be read."""
+
+
+def iter_rows(path: Path) -> Iterator[dict[str, str]]:
+    """Yield each row of a CSV or JSON lines file, as a mapping of variable name
+    to value.
+
+    The format is chosen by the file's suffix: `.jsonl` or `.ndjson` for JSON
+    lines, and CSV otherwise.
+
+    Raises:
+        DataFileError: If the file can't be read, or a row is invalid.
+    """
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            if path.suffix.lower() in JSONL_SUFFIXES:
+                yield from _iter_jsonl_rows(file)
+            else:
+                yield from _iter_csv_rows(file)
+    except OSError as e:
+        raise DataFileError(str(e)) from e
+    except UnicodeDecodeError as e:
+        raise DataFileError(f"{path} isn't valid UTF-8: {e}") from e
+
+
+def _iter_csv_rows(lines: Iterator[str]) -> Iterator[dict[str, str]]:
+    reader = csv.DictReader(lines, restval="")
+    if not reader.fieldnames:
+        return
+    try:
+        for row in reader:
+            # Values beyond the header row are collected under the key None.
+            row.pop(None, None)  # type: ignore[call-overload]
+            yield row
+    except csv.Error as e:
+        raise DataFileError(f"Invalid CSV on line {reader.line_num}: {e}") from e
+
+
+def _iter_jsonl_rows(lines: Iterator[str]) -> Iterator[dict[str, str]]:
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise DataFileError(f"Invalid JSON on line {line_number}: {e}") from e
+        if not isinstance(row, dict):
+            raise DataFileError(f"Line {line_number} isn't a JSON object.")
+        yield {str(key): variable_value_from_json(value) for key, value in row.items()}
@@ -0,0 +1,107 @@
+"""Detect files which have changed on disk by polling their modification times.
+
+Polling is used rather than OS-specific notification APIs (e.g. inotify) so the
+same behaviour applies on every platform and filesystem, including network
+mounts and containers where notifications are often unreliable.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable
+
+FileFingerprint = tuple[int, int]
+"""The modification time (in nanoseconds) and size of a file."""
+
+
+@dataclass
+class FileChanges:
+    """The files which changed between two scans."""
+
+    added: set[Path] = field(default_factory=set)
+    """Files which didn't exist in the previous scan."""
+    modified: set[Path] = field(default_factory=set)
+    """Files whose modification time or size changed since the previous scan."""
+    deleted: set[Path] = field(default_factory=set)
+    """Files which existed in the previous scan, but no longer exist."""
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+
+class PollingWatcher:
+    """Watches the files produced by a path source, such as a glob or a fixed set
+    of paths.
+
+    Call `check` periodically to find out which files have changed since it was
+    last called. The first call records the initial state of the files and
+    reports no changes.
+    """
+
+    def __init__(self, path_source: Callable[[], Iterable[Path]]) -> None:
+        self.path_source = path_source
+        """Returns the paths of the files to watch. It's called on every scan, so
+        files which match a glob are picked up as they're created."""
+        self._fingerprints: dict[Path, FileFingerprint] | None = None
+
+    def watched_paths(self) -> Iterable[Path]:
+        """Return the paths of the files to watch."""
+        return self.path_source()
+
+    def scan(self) -> dict[Path, FileFingerprint]:
+        """Return the fingerprint of every watched file which currently exists."""
+        fingerprints: dict[Path, FileFingerprint] = {}
+        for path in self.watched_paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                # The file was deleted while we were scanning.
+                continue
+            fingerprints[path] = (stat.st_mtime_ns, stat.st_size)
+        return fingerprints
+
+    def check(self) -> FileChanges:
+        """Scan the watched files and return the changes since the last check."""
+        current = self.scan()
+        previous = self._fingerprints
+        self._fingerprints = current
+        if previous is None:
+            return FileChanges()
+
+        return FileChanges(
+            added=current.keys() - previous.keys(),
+            modified={
+                path
+                for path, fingerprint in current.items()
+                if path in previous and previous[path] != fingerprint
+            },
+            deleted=previous.keys() - current.keys(),
+        )
+
+
+class FileWatcher(PollingWatcher):
+    """Watches the files matching a glob pattern below a directory.
+
+    Scanning a directory touches every file in it, so for large directories
+    `check` should be called from a thread rather than the event loop.
+    """
+
+    def __init__(self, root: Path, pattern: str = "*") -> None:
+        self.root = root
+        """The directory to watch (recursively)."""
+        self.pattern = pattern
+        """The glob pattern which files must match to be watched."""
+        super().__init__(lambda: self.root.rglob(self.pattern))
+
+
+class FileSetWatcher(PollingWatcher):
+    """Watches a fixed set of files, which may be in different directories.
+
+    A file which doesn't exist yet is reported as added when it's created.
+    """
+
+    def __init__(self, paths: Iterable[Path]) -> None:
+        self.paths = frozenset(paths)
+        """The files to watch."""
+        super().__init__(lambda: self.paths)
@@ -0,0 +1,421 @@
+"""A private, on-disk HTTP cache, following the caching rules of RFC 9111.
+
+Only successful responses to GET requests are stored. Each response is stored
+as two files named after a hash of its URL and the credentials (including
+cookies) it was requested with: the body, and a JSON file holding the status, headers and the time it was
+stored. Using an entry updates the modification time of its files, which is how
+the least recently used entries are found when the cache grows too large.
+
+The methods of `HttpCache` read and write files, so they block. In the app,
+they're called in a thread (with `asyncio.to_thread`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Literal
+
+import httpx
+
+CacheStatus = Literal["hit", "miss", "revalidated"]
+"""How a response was served with respect to the cache.
+
+- hit: the cached response was fresh, so no request was sent.
+- miss: the response came from the server.
+- revalidated: the server confirmed the cached response was still valid.
+"""
+
+_UNCACHED_HEADERS = {
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+    "set-cookie",
+}
+"""Headers which aren't stored. The body is stored decoded, so the headers
+describing its encoding don't apply, and cookies shouldn't be set again each
+time a cached response is used."""
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    """Parse a Cache-Control header into a mapping of directive to argument."""
+    directives: dict[str, str | None] = {}
+    if not value:
+        return directives
+    for directive in value.split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _parse_http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class CacheEntry:
+    """A response stored in the cache."""
+
+    url: str
+    status_code: int
+    http_version: str
+    reason_phrase: str
+    headers: list[tuple[str, str]]
+    """The response headers, excluding those which aren't stored."""
+    vary: dict[str, str | None]
+    """The values of the request headers named by the Vary header of the response."""
+    stored_at: float
+    """The time the response was received (or last revalidated)."""
+    size: int
+    """The size of the body in bytes."""
+    key: str = field(default="", repr=False)
+    """The key the entry is stored under. This isn't stored in the entry itself."""
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        del data["key"]
+        return json.dumps(data)
+
+    @property
+    def response_headers(self) -> httpx.Headers:
+        return httpx.Headers(self.headers)
+
+    def age(self, now: float | None = None) -> float:
+        """The age of the response in seconds, as defined by RFC 9111."""
+        if now is None:
+            now = time.time()
+        try:
+            initial_age = float(self.response_headers.get("age", 0))
+        except ValueError:
+            initial_age = 0.0
+        return initial_age + max(now - self.stored_at, 0.0)
+
+    def freshness_lifetime(self) -> float | None:
+        """How long the response is fresh for after it was generated, in seconds,
+        or None if the response doesn't say."""
+        headers = self.response_headers
+        directives = parse_cache_control(headers.get("cache-control"))
+        if (max_age := directives.get("max-age")) is not None:
+            try:
+                return float(max_age)
+            except ValueError:
+                return 0.0
+
+        expires = headers.get("expires")
+        if expires is not None:
+            expires_at = _parse_http_date(expires)
+            if expires_at is None:
+                # An invalid Expires header means the response has already expired.
+                return 0.0
+            date = _parse_http_date(headers.get("date")) or self.stored_at
+            return max(expires_at - date, 0.0)
+        return None
+
+    def is_fresh(self, request: httpx.Request) -> bool:
+        """Return True if the response can be used without revalidating it."""
+        request_directives = parse_cache_control(request.headers.get("cache-control"))
+        if "no-cache" in request_directives or "no-cache" in parse_cache_control(
+            self.response_headers.get("cache-control")
+        ):
+            return False
+
+        lifetime = self.freshness_lifetime()
+        if lifetime is None:
+            return False
+        if (max_age := request_directives.get("max-age")) is not None:
+            try:
+                lifetime = min(lifetime, float(max_age))
+            except ValueError:
+                pass
+        return self.age() < lifetime
+
+    def matches(self, request: httpx.Request) -> bool:
+        """Return True if the request selects this response (see the Vary header)."""
+        return all(
+            request.headers.get(name) == value for name, value in self.vary.items()
+        )
+
+
+class HttpCache:
+    """A size-bounded cache of HTTP responses in a directory.
+
+    The cache is only consulted and updated by calling its methods, so it's up to
+    the caller to decide which requests use it. Call `lookup` before sending a
+    request, then either use the entry if it's fresh, or send the request with
+    `add_conditional_headers` applied and pass the response to `store` or
+    `revalidated`.
+    """
+
+    def __init__(self, directory: Path, max_size: int) -> None:
+        self.directory = directory
+        """The directory the cache is stored in."""
+        self.max_size = max_size
+        """The maximum total size of the cached bodies, in bytes."""
+        self._size: int | None = None
+        self._lock = threading.Lock()
+        """Held while the size of the cache is being updated."""
+
+    @staticmethod
+    def _key(request: httpx.Request, credentials: str) -> str:
+        """The key of the response to a request: a hash of its URL, and of the
+        credentials it's sent with (including its cookies, which often identify
+        a session), so different users never share responses.
+
+        Other request headers named by the Vary header of a response are checked
+        when the entry is looked up (see `CacheEntry.matches`)."""
+        key = hashlib.sha256(str(request.url).encode())
+        key.update(b"\0" + request.headers.get("authorization", "").encode())
+        key.update(b"\0" + request.headers.get("cookie", "").encode())
+        key.update(b"\0" + credentials.encode())
+        return key.hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    @staticmethod
+    def is_cacheable_request(request: httpx.Request) -> bool:
+        """Return True if the cache may be used for the request at all."""
+        return request.method == "GET" and "no-store" not in parse_cache_control(
+            request.headers.get("cache-control")
+        )
+
+    def lookup(
+        self, request: httpx.Request, credentials: str = ""
+    ) -> CacheEntry | None:
+        """Find the cached response to the request, whether or not it's fresh.
+
+        Args:
+            request: The request to find the response to.
+            credentials: Identifies the credentials the request will be sent with
+                which aren't in its headers yet (e.g. the auth settings).
+        """
+        if not self.is_cacheable_request(request):
+            return None
+
+        key = self._key(request, credentials)
+        metadata_path, _ = self._paths(key)
+        try:
+            data = json.loads(metadata_path.read_text("utf-8"))
+            entry = CacheEntry(**data, key=key)
+        except (OSError, ValueError, TypeError):
+            return None
+        if entry.url != str(request.url) or not entry.matches(request):
+            return None
+        return entry
+
+    def add_conditional_headers(
+        self, request: httpx.Request, entry: CacheEntry
+    ) -> None:
+        """Add headers to the request asking the server to respond with 304 Not
+        Modified if the cached response is still valid."""
+        headers = entry.response_headers
+        if (etag := headers.get("etag")) and "if-none-match" not in request.headers:
+            request.headers["If-None-Match"] = etag
+        if (
+            last_modified := headers.get("last-modified")
+        ) and "if-modified-since" not in request.headers:
+            request.headers["If-Modified-Since"] = last_modified
+
+    def to_response(
+        self, request: httpx.Request, entry: CacheEntry
+    ) -> httpx.Response | None:
+        """Build a response from a cache entry.
+
+        Returns:
+            The response, or None if the body of the entry couldn't be read, in
+            which case the entry is removed.
+        """
+        started = time.perf_counter()
+        metadata_path, body_path = self._paths(entry.key)
+        try:
+            content = body_path.read_bytes()
+            # Mark the entry as recently used.
+            metadata_path.touch()
+            body_path.touch()
+        except OSError:
+            self.remove(entry)
+            return None
+        response = httpx.Response(
+            entry.status_code,
+            headers=entry.headers,
+            content=content,
+            request=request,
+            extensions={
+                "http_version": entry.http_version.encode("ascii"),
+                "reason_phrase": entry.reason_phrase.encode("ascii"),
+            },
+        )
+        response.elapsed = timedelta(seconds=time.perf_counter() - started)
+        return response
+
+    def store(
+        self, request: httpx.Request, response: httpx.Response, credentials: str = ""
+    ) -> None:
+        """Store a response, if its headers allow it to be cached.
+
+        The response body must have been read in full. The files of the entry are
+        replaced atomically, so a failed write never leaves a partial entry.
+
+        Args:
+            request: The request the response is for.
+            response: The response to store.
+            credentials: The credentials passed to `lookup` for the request.
+        """
+        if not self.is_cacheable_request(request) or response.status_code != 200:
+            return
+
+        headers = response.headers
+        directives = parse_cache_control(headers.get("cache-control"))
+        vary = [
+            name.strip().lower()
+            for name in headers.get("vary", "").split(",")
+            if name.strip()
+        ]
+        if "no-store" in directives or "*" in vary:
+            return
+
+        entry = CacheEntry(
+            url=str(request.url),
+            status_code=response.status_code,
+            http_version=response.http_version,
+            reason_phrase=response.reason_phrase,
+            headers=[
+                (name, value)
+                for name, value in headers.multi_items()
+                if name.lower() not in _UNCACHED_HEADERS
+            ],
+            vary={name: request.headers.get(name) for name in vary},
+            stored_at=time.time(),
+            size=len(response.content),
+        )
+        has_validator = "etag" in headers or "last-modified" in headers
+        if not has_validator and not entry.freshness_lifetime():
+            # The response could never be reused.
+            return
+        if entry.size > self.max_size:
+            return
+
+        key = self._key(request, credentials)
+        metadata_path, body_path = self._paths(key)
+        with self._lock:
+            previous_size = self._entry_size(body_path)
+            self._write(body_path, response.content)
+            self._write(metadata_path, entry.to_json().encode("utf-8"))
+            self._size = self.size() - previous_size + entry.size
+        self.evict(keep=key)
+
+    def revalidated(
+        self, request: httpx.Request, entry: CacheEntry, response: httpx.Response
+    ) -> httpx.Response | None:
+        """Update a cache entry after the server responded 304 Not Modified, and
+        return the cached response.
+
+        The headers of the 304 response replace those of the cached response, and
+        the time taken to revalidate is used as the elapsed time of the response.
+        If the body of the entry can no longer be read, the entry is removed and
+        None is returned.
+        """
+        headers = entry.response_headers
+        for name, value in response.headers.items():
+            if name.lower() not in _UNCACHED_HEADERS:
+                headers[name] = value
+        entry.headers = list(headers.multi_items())
+        entry.stored_at = time.time()
+
+        metadata_path, _ = self._paths(entry.key)
+        try:
+            self._write(metadata_path, entry.to_json().encode("utf-8"))
+        except OSError:
+            self.remove(entry)
+            return None
+        cached_response = self.to_response(request, entry)
+        if cached_response is not None:
+            cached_response.elapsed = response.elapsed
+        return cached_response
+
+    def remove(self, entry: CacheEntry) -> None:
+        """Remove an entry from the cache."""
+        metadata_path, body_path = self._paths(entry.key)
+        with self._lock:
+            size = self._entry_size(body_path)
+            metadata_path.unlink(missing_ok=True)
+            body_path.unlink(missing_ok=True)
+            if self._size is not None:
+                self._size = max(self._size - size, 0)
+
+    def _write(self, path: Path, data: bytes) -> None:
+        """Write a file atomically, by writing a temporary file and renaming it."""
+        descriptor, temporary_name = tempfile.mkstemp(
+            dir=self.directory, prefix=f".{path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary_name, path)
+        except BaseException:
+            Path(temporary_name).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _entry_size(body_path: Path) -> int:
+        try:
+            return body_path.stat().st_size
+        except OSError:
+            return 0
+
+    def size(self) -> int:
+        """The total size of the cached bodies, in bytes."""
+        if self._size is None:
+            self._size = sum(
+                self._entry_size(path) for path in self.directory.glob("*.body")
+            )
+        return self._size
+
+    def evict(self, keep: str | None = None) -> None:
+        """Remove the least recently used entries until the cache fits within
+        `max_size`.
+
+        Args:
+            keep: The key of an entry which should not be removed.
+        """
+        with self._lock:
+            self._evict(keep)
+
+    def _evict(self, keep: str | None) -> None:
+        if self.size() <= self.max_size:
+            return
+
+        bodies: list[tuple[float, int, Path]] = []
+        for body_path in self.directory.glob("*.body"):
+            try:
+                stat = body_path.stat()
+            except OSError:
+                continue
+            if body_path.stem != keep:
+                bodies.append((stat.st_mtime, stat.st_size, body_path))
+
+        size = sum(body_size for _, body_size, _ in bodies)
+        if keep is not None:
+            size += self._entry_size(self.directory / f"{keep}.body")
+
+        for _, body_size, body_path in sorted(bodies):
+            if size <= self.max_size:
+                break
+            body_path.with_suffix(".json").unlink(missing_ok=True)
+            body_path.unlink(missing_ok=True)
+            size -= body_size
+        self._size = size
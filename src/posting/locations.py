@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from xdg_base_dirs import xdg_config_home, xdg_data_home
+from xdg_base_dirs import xdg_cache_home, xdg_config_home, xdg_data_home
 
 
 def _posting_directory(root: Path) -> Path:
@@ -21,6 +21,13 @@ def theme_directory() -> Path:
     return theme_dir
 
 
+def http_cache_directory() -> Path:
+    """Return (possibly creating) the directory where HTTP responses are cached."""
+    http_cache_dir = data_directory() / "http-cache"
+    http_cache_dir.mkdir(exist_ok=True, parents=True)
+    return http_cache_dir
+
+
 def default_collection_directory() -> Path:
     """Return (possibly creating) the default collection directory."""
     return data_directory() / "default"
@@ -33,3 +40,8 @@ def config_directory() -> Path:
 
 def config_file() -> Path:
     return config_directory() / "config.yaml"
+
+
+def cache_directory() -> Path:
+    """Return (possibly creating) the application cache directory."""
+    return _posting_directory(xdg_cache_home())
@@ -1,8 +1,30 @@
 from dataclasses import dataclass
+from pathlib import Path
 import httpx
 from textual.events import Message
 
+from posting.http_cache import CacheStatus
+
 
 @dataclass
 class HttpResponseReceived(Message):
     response: httpx.Response
+    body_size: int | None = None
+    """The size of the complete body, if more than the response content was received."""
+    overflow_path: Path | None = None
+    """A file containing the complete body, if the response content was truncated."""
+    download_path: Path | None = None
+    """The file the body was written to, if it was downloaded rather than displayed."""
+    cache_status: CacheStatus | None = None
+    """How the response was served by the HTTP cache, if the cache is enabled."""
+    request_id: int | None = None
+    """The ID of the request the response is for (see `InFlightRequests`)."""
+
+
+@dataclass
+class HttpResponseProgress(Message):
+    bytes_downloaded: int
+    total_bytes: int | None
+    bytes_per_second: float
+    request_id: int | None = None
+    """The ID of the request whose response is being downloaded."""
@@ -0,0 +1,158 @@
+"""Limit the rate that requests are sent to each host, using token buckets."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+from posting.collection import RateLimit
+from posting.retry import TraceCallback, parse_retry_after
+
+MIN_RATE_FRACTION = 1 / 16
+"""How far below its configured rate a bucket may be slowed by 429 responses."""
+RECOVERY_FRACTION = 1 / 10
+"""How much of the configured rate is regained with each successful response."""
+
+
+class TokenBucket:
+    """A token bucket which adapts its rate when the server asks it to slow down.
+
+    Tokens are added at `current_rate` per second, up to `burst` tokens. Sending a
+    request takes one token. When the bucket is empty, requests reserve tokens
+    which haven't been added yet, and wait for them, so requests are released in
+    the order they arrived.
+
+    A 429 response halves the current rate, and successful responses restore it
+    gradually, in the manner of TCP congestion control.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        """The configured rate, in tokens per second."""
+        self.burst = burst
+        """The maximum number of tokens in the bucket."""
+        self.current_rate = rate
+        """The rate tokens are currently added at, which may be lower than the
+        configured rate if the server has responded with 429s."""
+        self.clock = clock
+        """Returns the current time in seconds, e.g. `time.monotonic`."""
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        # No tokens are added while the server has asked us to pause.
+        elapsed = max(now - max(self._updated, self._paused_until), 0.0)
+        self._tokens = min(self._tokens + elapsed * self.current_rate, self.burst)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token from the bucket.
+
+        Returns:
+            The number of seconds to wait before sending the request.
+        """
+        now = self.clock()
+        self._refill(now)
+        self._tokens -= 1
+        wait = -self._tokens / self.current_rate if self._tokens < 0 else 0.0
+        return max(self._paused_until - now, 0.0) + wait
+
+    def throttle(self, retry_after: float | None = None) -> None:
+        """Slow down after the server responded with 429 Too Many Requests.
+
+        Args:
+            retry_after: The number of seconds the server asked us to wait
+                before sending another request, if it said.
+        """
+        now = self.clock()
+        self._refill(now)
+        self.current_rate = max(self.current_rate / 2, self.rate * MIN_RATE_FRACTION)
+        # Don't allow the requests which were held back to go out in a burst.
+        self._tokens = min(self._tokens, 0.0)
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    def recover(self) -> None:
+        """Speed back up towards the configured rate after a successful response."""
+        if self.current_rate < self.rate:
+            self._refill(self.clock())
+            self.current_rate = min(
+                self.current_rate + self.rate * RECOVERY_FRACTION, self.rate
+            )
+
+
+class RateLimiter:
+    """Holds a token bucket for each host which has a rate limit."""
+
+    def __init__(
+        self,
+        limits: dict[str, RateLimit] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.limits = limits or {}
+        """The rate limits, keyed by host. The key "*" applies to other hosts."""
+        self.clock = clock
+        """Returns the current time in seconds, for the token buckets."""
+        self.sleep = sleep
+        """Waits for the given number of seconds before a request is sent."""
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def bucket_for(self, host: str) -> TokenBucket | None:
+        """Return the bucket for the host, or None if it isn't rate limited."""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            limit = self.limits.get(host) or self.limits.get("*")
+            if limit is None:
+                return None
+            bucket = TokenBucket(limit.rate, limit.burst, self.clock)
+            self._buckets[host] = bucket
+        return bucket
+
+    async def send(
+        self,
+        host: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        trace: TraceCallback | None = None,
+    ) -> httpx.Response:
+        """Wait until the host's rate limit allows a request, then send it.
+
+        If the request has to wait, the wait is reported to the trace callback as
+        `rate_limit.wait.*` events.
+
+        Args:
+            host: The host the request is being sent to.
+            send: Sends the request, and returns the response.
+            trace: The trace callback to report waiting to.
+
+        Returns:
+            The response.
+        """
+        bucket = self.bucket_for(host)
+        if bucket is None:
+            return await send()
+
+        delay = bucket.reserve()
+        if delay > 0:
+            info = {"host": host, "delay": delay}
+            if trace is not None:
+                await trace("rate_limit.wait.started", info)
+            await self.sleep(delay)
+            if trace is not None:
+                await trace("rate_limit.wait.complete", info)
+
+        response = await send()
+        if response.status_code == 429:
+            bucket.throttle(parse_retry_after(response.headers.get("retry-after")))
+        else:
+            bucket.recover()
+        return response
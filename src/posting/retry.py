@@ -0,0 +1,141 @@
+"""Retry requests which fail transiently, waiting longer between each attempt."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from posting.collection import RetryPolicy
+
+TraceCallback = Callable[[str, dict[str, Any]], Awaitable[None]]
+"""An httpx trace extension callback, which receives the name of an event and
+information about it."""
+
+
+async def _ignore_trace_event(event_name: str, info: dict[str, Any]) -> None:
+    pass
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse the value of a Retry-After header into a number of seconds.
+
+    The header can contain either a number of seconds or an HTTP date.
+
+    Returns:
+        The number of seconds to wait, or None if the value is missing or invalid.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(
+    policy: RetryPolicy,
+    retry_number: int,
+    response: httpx.Response | None = None,
+) -> float:
+    """Return how long to wait before a retry.
+
+    Args:
+        policy: The retry policy of the request.
+        retry_number: The number of the retry, starting from 1 for the first retry.
+        response: The response which is being retried, if there was one.
+
+    Returns:
+        The delay in seconds.
+    """
+    if response is not None and policy.respect_retry_after:
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        if retry_after is not None:
+            return min(retry_after, policy.backoff_max)
+
+    delay = min(policy.backoff_base * 2 ** (retry_number - 1), policy.backoff_max)
+    if policy.jitter:
+        delay = random.uniform(0, delay)
+    return delay
+
+
+def is_retryable_exception(policy: RetryPolicy, exception: Exception) -> bool:
+    """Return True if the policy says the exception should be retried."""
+    return any(
+        cls.__name__ in policy.retry_exceptions for cls in type(exception).__mro__
+    )
+
+
+async def send_with_retries(
+    send: Callable[[], Awaitable[httpx.Response]],
+    policy: RetryPolicy,
+    trace: TraceCallback | None = None,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+) -> httpx.Response:
+    """Send a request, retrying it according to the retry policy.
+
+    When a response is retried, it's closed without its body being read, so
+    `send` should send the request with `stream=True`.
+
+    If retries are enabled, each attempt and each delay between attempts is
+    reported to the trace callback as `retry.attempt.*` and `retry.backoff.*`
+    events, with the attempt number in the event info.
+
+    Args:
+        send: Sends the request once, and returns the response.
+        policy: The retry policy of the request.
+        trace: The trace callback to report attempts to.
+        sleep: Waits for the given number of seconds between attempts.
+
+    Returns:
+        The response to the final attempt, which may have a retryable status code
+        if every attempt failed.
+
+    Raises:
+        Exception: The exception raised by the final attempt, if it failed.
+    """
+    if trace is None or policy.max_attempts == 1:
+        trace = _ignore_trace_event
+
+    attempt = 1
+    while True:
+        await trace("retry.attempt.started", {"attempt": attempt})
+        attempts_left = attempt < policy.max_attempts
+        response: httpx.Response | None = None
+        try:
+            response = await send()
+        except Exception as e:
+            await trace("retry.attempt.failed", {"attempt": attempt, "error": e})
+            if not attempts_left or not is_retryable_exception(policy, e):
+                raise
+            reason = type(e).__name__
+        else:
+            await trace(
+                "retry.attempt.complete",
+                {"attempt": attempt, "status_code": response.status_code},
+            )
+            if not attempts_left or response.status_code not in policy.retry_statuses:
+                return response
+            reason = f"{response.status_code} {response.reason_phrase}"
+            await response.aclose()
+
+        delay = backoff_delay(policy, attempt, response)
+        await trace(
+            "retry.backoff.started",
+            {"attempt": attempt, "delay": delay, "reason": reason},
+        )
+        await sleep(delay)
+        await trace("retry.backoff.complete", {"attempt": attempt})
+        attempt += 1
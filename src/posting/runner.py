@@ -0,0 +1,496 @@
+"""Send requests from a collection without starting the TUI.
+
+This powers the `posting run` command, which is useful for smoke tests in CI
+and for scheduled health checks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import ChainMap
+from contextlib import AbstractAsyncContextManager, aclosing, nullcontext
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from graphlib import CycleError, TopologicalSorter
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Iterator, Mapping
+
+import httpx
+
+from posting.captures import CaptureError, capture_values
+from posting.client_pool import ClientKey, ClientPool
+from posting.collection import Collection, CollectionConfig, Cookie, RequestModel
+from posting.config import CertificateSettings
+from posting.save_request import FILE_SUFFIX
+from posting.rate_limit import RateLimiter
+from posting.retry import send_with_retries
+from posting.streaming import download_body
+from posting.version import USER_AGENT
+
+
+@dataclass
+class RequestResult:
+    """The outcome of sending a single request."""
+
+    request: RequestModel
+    """The request model that was sent (before variables were substituted)."""
+    method: str
+    """The HTTP method used."""
+    url: str
+    """The URL the request was sent to, after variable substitution."""
+    status_code: int | None = None
+    """The status code of the response, if one was received."""
+    reason_phrase: str | None = None
+    """The reason phrase of the response, if one was received."""
+    elapsed_ms: float | None = None
+    """The time taken to receive the response, in milliseconds."""
+    size: int | None = None
+    """The size of the response body in bytes."""
+    error: str | None = None
+    """A description of the error, if the request couldn't be sent."""
+    row: int | None = None
+    """The number of the data file row the request was sent for, starting from 1,
+    if the request was sent once per row of a data file."""
+    captured: dict[str, str] = field(default_factory=dict)
+    """The values captured from the response, keyed by variable name."""
+
+    @property
+    def ok(self) -> bool:
+        """True if a response was received and it wasn't a 4xx or 5xx."""
+        return (
+            self.error is None
+            and self.status_code is not None
+            and self.status_code < 400
+        )
+
+    def to_dict(self, root: Path | None = None) -> dict[str, Any]:
+        """Convert the result to a JSON-serialisable dict.
+
+        Args:
+            root: If supplied, the request path is reported relative to this directory.
+        """
+        path = self.request.path
+        if path is not None and root is not None:
+            try:
+                path = path.resolve().relative_to(root.resolve())
+            except ValueError:
+                pass
+
+        result: dict[str, Any] = {
+            "name": self.request.name,
+            "path": str(path) if path is not None else None,
+            "method": self.method,
+            "url": self.url,
+            "ok": self.ok,
+            "status_code": self.status_code,
+            "reason_phrase": self.reason_phrase,
+            "elapsed_ms": self.elapsed_ms,
+            "size": self.size,
+            "error": self.error,
+        }
+        if self.row is not None:
+            result["row"] = self.row
+        if self.captured:
+            # Only the names, since captured values are often secrets (e.g. tokens).
+            result["captured"] = list(self.captured)
+        return result
+
+
+class DependencyCycleError(Exception):
+    """Raised when requests depend on each other's captured values in a cycle,
+    so none of them can be sent first."""
+
+
+def dependency_graph(requests: list[RequestModel]) -> dict[int, set[int]]:
+    """Map the index of each request to the indices of the requests it depends on.
+
+    A request depends on every other request which captures a variable that it
+    refers to.
+
+    Raises:
+        DependencyCycleError: If the requests depend on each other in a cycle.
+    """
+    producers: dict[str, list[int]] = {}
+    for index, request in enumerate(requests):
+        for capture in request.captures:
+            producers.setdefault(capture.variable, []).append(index)
+
+    graph: dict[int, set[int]] = {}
+    for index, request in enumerate(requests):
+        referenced = {
+            name for names in request.variable_index().values() for name in names
+        }
+        graph[index] = {
+            producer
+            for name in referenced
+            for producer in producers.get(name, ())
+            if producer != index
+        }
+
+    try:
+        TopologicalSorter(graph).prepare()
+    except CycleError as e:
+        cycle = " -> ".join(_describe(requests[index]) for index in e.args[1])
+        raise DependencyCycleError(
+            f"Requests depend on each other's captured variables: {cycle}"
+        ) from e
+    return graph
+
+
+def _describe(request: RequestModel) -> str:
+    return request.name or (request.path.name if request.path else request.url)
+
+
+def select_requests(
+    collection: Collection, patterns: Iterable[str] = ()
+) -> list[RequestModel]:
+    """Return the requests in the collection which match any of the glob patterns.
+
+    A pattern is matched against the path of the request file relative to the
+    collection directory (with or without the `.posting.yaml` suffix), and against
+    the name of the request. If no patterns are supplied, every request is returned.
+    """
+    patterns = list(patterns)
+    requests = list(collection.iter_requests())
+    if not patterns:
+        return requests
+
+    root = collection.path.resolve()
+
+    def matches(request: RequestModel) -> bool:
+        candidates = [request.name]
+        if request.path is not None:
+            try:
+                relative_path = request.path.resolve().relative_to(root).as_posix()
+            except ValueError:
+                relative_path = request.path.as_posix()
+            candidates.append(relative_path)
+            candidates.append(relative_path.removesuffix(FILE_SUFFIX))
+        return any(
+            fnmatch(candidate, pattern)
+            for pattern in patterns
+            for candidate in candidates
+        )
+
+    return [request for request in requests if matches(request)]
+
+
+class RequestRunner:
+    """Sends request models using a shared pool of clients.
+
+    Cookies received in responses are stored, and attached to subsequent requests
+    which have the `attach_cookies` option enabled, as they are in the TUI.
+    """
+
+    def __init__(
+        self,
+        client_pool: ClientPool,
+        variables: dict[str, Any],
+        ssl_settings: CertificateSettings,
+        per_host_limit: int | None = None,
+        cookies: httpx.Cookies | None = None,
+        collection_config: CollectionConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
+        self.client_pool = client_pool
+        self.variables = variables
+        self.ssl_settings = ssl_settings
+        self.per_host_limit = per_host_limit
+        """The maximum number of requests to a single host which may be in flight
+        at once. If None, the number of requests per host is not limited."""
+        self.cookies = cookies if cookies is not None else httpx.Cookies()
+        self.collection_config = collection_config
+        """The config of the collection the requests belong to."""
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(
+                collection_config.rate_limits if collection_config else None
+            )
+        self.rate_limiter = rate_limiter
+        """Limits the rate of requests to each host."""
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def host_limiter(self, host: str) -> AbstractAsyncContextManager[Any]:
+        """Return the context manager which bounds concurrent requests to the host."""
+        if self.per_host_limit is None:
+            return nullcontext()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def send(
+        self,
+        request_model: RequestModel,
+        variables: Mapping[str, Any] | None = None,
+    ) -> RequestResult:
+        """Substitute variables into the request, send it, and return the outcome.
+
+        The request model passed in is not modified.
+
+        Args:
+            request_model: The request to send.
+            variables: Variables which take precedence over the runner's variables
+                for this request only (e.g. a row of a data file).
+        """
+        result = RequestResult(
+            request=request_model,
+            method=request_model.method,
+            url=request_model.url,
+        )
+        try:
+            request_model = request_model.render(
+                ChainMap(variables, self.variables) if variables else self.variables
+            )
+            result.url = request_model.url
+
+            options = request_model.options
+            if options.attach_cookies:
+                request_model.cookies = Cookie.from_httpx(self.cookies)
+
+            auth = request_model.auth.to_httpx_auth() if request_model.auth else None
+            client_key = ClientKey.from_options(
+                options,
+                self.ssl_settings,
+                auth_type=request_model.auth.type if request_model.auth else None,
+                collection_config=self.collection_config,
+            )
+            download_path = options.download_path
+            async with self.client_pool.client(client_key) as client:
+                request = request_model.to_httpx(client)
+                request.headers["User-Agent"] = USER_AGENT
+                if download_path and "accept-encoding" not in request.headers:
+                    request.headers["Accept-Encoding"] = "identity"
+                async with (
+                    self.host_limiter(request.url.host),
+                    asyncio.timeout(options.total_timeout),
+                ):
+                    response = await send_with_retries(
+                        lambda: self.rate_limiter.send(
+                            request.url.host,
+                            lambda: client.send(
+                                request,
+                                auth=auth,
+                                follow_redirects=options.follow_redirects,
+                                stream=True,
+                            ),
+                        ),
+                        options.retry,
+                    )
+                    try:
+                        if download_path:
+                            body = await download_body(
+                                response,
+                                Path(download_path).expanduser(),
+                                overwrite=options.overwrite_download,
+                            )
+                            size = body.size
+                        else:
+                            size = len(await response.aread())
+                    finally:
+                        await response.aclose()
+        except TimeoutError:
+            result.error = (
+                f"TimeoutError: the request didn't complete within "
+                f"{request_model.options.total_timeout} seconds"
+            )
+            return result
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            return result
+
+        self.cookies.update(response.cookies)
+        result.status_code = response.status_code
+        result.reason_phrase = response.reason_phrase
+        result.elapsed_ms = round(response.elapsed.total_seconds() * 1000, 2)
+        result.size = size
+        if request_model.captures:
+            try:
+                result.captured = capture_values(request_model.captures, response)
+            except CaptureError as e:
+                result.error = f"CaptureError: {e}"
+        return result
+
+    async def run(
+        self,
+        requests: Iterable[RequestModel],
+        concurrency: int = 1,
+        rows: Iterable[Mapping[str, Any]] | None = None,
+    ) -> AsyncIterator[RequestResult]:
+        """Send the requests, yielding each result as soon as it arrives.
+
+        Args:
+            requests: The requests to send. This is consumed lazily, so it may be
+                a generator producing more requests than would fit in memory.
+            concurrency: The maximum number of requests in flight at once. With a
+                concurrency of 1, requests are sent in order, one after another.
+            rows: If supplied, every request is sent once for each row, with the
+                row's values overlaid on the variables. This is also consumed
+                lazily (the requests are not).
+
+        Yields:
+            The result of each request, in the order they complete.
+        """
+        pending: Iterable[tuple[RequestModel, Mapping[str, Any] | None, int | None]]
+        if rows is None:
+            pending = ((request, None, None) for request in requests)
+        else:
+            requests = list(requests)
+            pending = (
+                (request, row, row_number)
+                for row_number, row in enumerate(rows, start=1)
+                for request in requests
+            )
+        pending = iter(pending)
+        results: asyncio.Queue[RequestResult] = asyncio.Queue(maxsize=concurrency)
+
+        async def worker() -> None:
+            # Workers share the iterator, so each request is taken exactly once.
+            for request, row, row_number in pending:
+                result = await self.send(request, row)
+                result.row = row_number
+                await results.put(result)
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(concurrency, 1))]
+        async with aclosing(self._collect_results(workers, results)) as collected:
+            async for result in collected:
+                yield result
+
+    async def run_chain(
+        self,
+        requests: Iterable[RequestModel],
+        concurrency: int = 1,
+        rows: Iterable[Mapping[str, Any]] | None = None,
+    ) -> AsyncIterator[RequestResult]:
+        """Send requests which use each other's captured values, yielding each
+        result as soon as it arrives.
+
+        A request which refers to a variable captured by other requests is sent
+        once they've all completed, with the captured values substituted into it.
+        Requests which don't depend on each other are sent concurrently. If a
+        request fails, the requests which depend on it are skipped.
+
+        Args:
+            requests: The requests to send.
+            concurrency: The maximum number of requests in flight at once.
+            rows: If supplied, the requests are sent once for each row (see `run`).
+                Each row has its own captured values, and up to `concurrency` rows
+                are in progress at once.
+
+        Yields:
+            The result of each request, in the order they complete.
+
+        Raises:
+            DependencyCycleError: If the requests depend on each other in a cycle.
+        """
+        requests = list(requests)
+        graph = dependency_graph(requests)
+        send_slots = asyncio.Semaphore(max(concurrency, 1))
+        results: asyncio.Queue[RequestResult] = asyncio.Queue(maxsize=concurrency)
+        pending: Iterator[tuple[int | None, Mapping[str, Any] | None]] = (
+            iter(enumerate(rows, start=1)) if rows is not None else iter([(None, None)])
+        )
+
+        async def worker() -> None:
+            for row_number, row in pending:
+                await self._send_graph(
+                    requests, graph, row, row_number, send_slots, results
+                )
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(concurrency, 1))]
+        async with aclosing(self._collect_results(workers, results)) as collected:
+            async for result in collected:
+                yield result
+
+    async def _send_graph(
+        self,
+        requests: list[RequestModel],
+        graph: dict[int, set[int]],
+        row: Mapping[str, Any] | None,
+        row_number: int | None,
+        send_slots: asyncio.Semaphore,
+        results: asyncio.Queue[RequestResult],
+    ) -> None:
+        """Send the requests in dependency order, each as soon as the requests it
+        depends on have completed."""
+        sorter = TopologicalSorter(graph)
+        sorter.prepare()
+        captured: dict[str, str] = {}
+        variables = ChainMap(captured, row or {})
+        failed: set[int] = set()
+        in_flight: dict[asyncio.Task[RequestResult], int] = {}
+
+        async def send(request: RequestModel) -> RequestResult:
+            async with send_slots:
+                return await self.send(request, variables)
+
+        try:
+            while sorter.is_active():
+                for index in sorter.get_ready():
+                    request = requests[index]
+                    if failed_dependencies := graph[index] & failed:
+                        failed.add(index)
+                        names = ", ".join(
+                            repr(_describe(requests[dependency]))
+                            for dependency in sorted(failed_dependencies)
+                        )
+                        await results.put(
+                            RequestResult(
+                                request=request,
+                                method=request.method,
+                                url=request.url,
+                                error=f"Skipped, since {names} failed",
+                                row=row_number,
+                            )
+                        )
+                        sorter.done(index)
+                    else:
+                        in_flight[asyncio.create_task(send(request))] = index
+
+                if not in_flight:
+                    # Skipping requests may have made others ready.
+                    continue
+                done, _ = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    index = in_flight.pop(task)
+                    result = task.result()
+                    result.row = row_number
+                    if result.ok:
+                        captured.update(result.captured)
+                    else:
+                        failed.add(index)
+                    await results.put(result)
+                    sorter.done(index)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def _collect_results(
+        self,
+        workers: list[asyncio.Task[None]],
+        results: asyncio.Queue[RequestResult],
+    ) -> AsyncIterator[RequestResult]:
+        """Yield results from the queue until every worker has finished."""
+        all_done = asyncio.ensure_future(asyncio.gather(*workers))
+        try:
+            while True:
+                next_result = asyncio.ensure_future(results.get())
+                await asyncio.wait(
+                    (next_result, all_done), return_when=asyncio.FIRST_COMPLETED
+                )
+                if next_result.done():
+                    yield next_result.result()
+                    continue
+
+                next_result.cancel()
+                # Surface any unexpected error raised in a worker.
+                all_done.result()
+                while not results.empty():
+                    yield results.get_nowait()
+                return
+        finally:
+            for task in workers:
+                task.cancel()
+            all_done.cancel()
@@ -0,0 +1,237 @@
+"""Read response bodies incrementally, so that huge responses don't have to be
+held in memory (or rendered) in their entirety.
+
+Writing to files is done in a thread (via `asyncio.to_thread`), so a slow disk
+doesn't block the event loop while a large body is written.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Callable
+
+import httpx
+
+ProgressCallback = Callable[[int, int | None, float], None]
+"""Called with the number of bytes downloaded so far, the total number of bytes
+(if the server sent a Content-Length), and the download rate in bytes per second."""
+
+
+@dataclass
+class StreamedBody:
+    """A summary of a response body which was read incrementally."""
+
+    size: int
+    """The size of the (decoded) body in bytes."""
+    truncated: bool
+    """True if only the start of the body is available from the response."""
+    overflow_path: Path | None = None
+    """If the body was truncated, a file containing the complete body."""
+    download_path: Path | None = None
+    """The file the body was downloaded to, if it was written to a file rather
+    than read (see `download_body`)."""
+    content: bytes = b""
+    """The (decoded) body, or as much of it as was kept in memory."""
+
+
+class _ProgressReporter:
+    """Calls a progress callback at most once per `interval` seconds."""
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        on_progress: ProgressCallback | None,
+        interval: float,
+    ) -> None:
+        self.response = response
+        self.on_progress = on_progress
+        self.interval = interval
+        try:
+            self.total_bytes: int | None = int(response.headers["content-length"])
+        except (KeyError, ValueError):
+            self.total_bytes = None
+        self.started = self.last_reported = time.monotonic()
+
+    def update(self) -> None:
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if now - self.last_reported >= self.interval:
+            self.last_reported = now
+            downloaded = self.response.num_bytes_downloaded
+            self.on_progress(
+                downloaded, self.total_bytes, downloaded / (now - self.started)
+            )
+
+
+def _create_overflow_file(content: bytes) -> IO[bytes]:
+    """Create the temporary file a truncated body is written to, starting with
+    the part of the body which has been read so far."""
+    overflow_file = tempfile.NamedTemporaryFile(
+        prefix="posting-response-", suffix=".body", delete=False
+    )
+    overflow_file.write(content)
+    return overflow_file
+
+
+async def read_body(
+    response: httpx.Response,
+    max_bytes: int,
+    spill_to_file: bool = True,
+    on_progress: ProgressCallback | None = None,
+    progress_interval: float = 0.1,
+) -> StreamedBody:
+    """Read the body of a response which was sent with `stream=True`.
+
+    At most `max_bytes` of the body are kept in memory, and returned as the
+    `content` of the result. Pass them to `with_content` once the response is
+    closed to get a response whose `content` and `text` can be used as usual
+    (although they'll only contain the start of the body).
+
+    Args:
+        response: The response to read the body of.
+        max_bytes: The maximum number of bytes to keep in memory.
+        spill_to_file: If True, and the body is larger than `max_bytes`, the
+            complete body is written to a temporary file.
+        on_progress: Called periodically while the body is being downloaded.
+        progress_interval: The minimum time, in seconds, between progress updates.
+
+    Returns:
+        The start of the body, its size, and where to find all of it if it was
+        truncated.
+    """
+    head = bytearray()
+    size = 0
+    overflow_file: IO[bytes] | None = None
+    progress = _ProgressReporter(response, on_progress, progress_interval)
+
+    try:
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if overflow_file is not None:
+                await asyncio.to_thread(overflow_file.write, chunk)
+            elif size <= max_bytes:
+                head += chunk
+            else:
+                if spill_to_file:
+                    overflow_file = await asyncio.to_thread(
+                        _create_overflow_file, head + chunk
+                    )
+                head += chunk[: max_bytes - len(head)]
+            progress.update()
+    except BaseException:
+        # Don't leave a partial copy of the body behind.
+        if overflow_file is not None:
+            overflow_file.close()
+            Path(overflow_file.name).unlink(missing_ok=True)
+        raise
+
+    overflow_path = None
+    if overflow_file is not None:
+        await asyncio.to_thread(overflow_file.close)
+        overflow_path = Path(overflow_file.name)
+
+    return StreamedBody(
+        size=size,
+        truncated=size > max_bytes,
+        overflow_path=overflow_path,
+        content=bytes(head),
+    )
+
+
+async def download_body(
+    response: httpx.Response,
+    path: Path,
+    overwrite: bool = False,
+    on_progress: ProgressCallback | None = None,
+    progress_interval: float = 0.1,
+) -> StreamedBody:
+    """Write the body of a response which was sent with `stream=True` to a file.
+
+    The body is written exactly as it was received, in chunks, without being
+    decoded or held in memory. If the server compressed the body (see the
+    Content-Encoding header), the file will be compressed too. The `content` of
+    the result is empty.
+
+    The body is written to a temporary file next to `path`, which is renamed to
+    `path` once the download is complete. If the download fails, the temporary
+    file is deleted, and any existing file at `path` is left untouched.
+
+    Args:
+        response: The response to download the body of.
+        path: The file to write the body to.
+        overwrite: Whether to replace the file if it already exists.
+        on_progress: Called periodically while the body is being downloaded.
+        progress_interval: The minimum time, in seconds, between progress updates.
+
+    Returns:
+        The size of the body, and the absolute path it was written to.
+
+    Raises:
+        FileExistsError: If the file exists, and `overwrite` is False.
+    """
+    path = path.absolute()
+    partial_file = await asyncio.to_thread(_create_partial_file, path, overwrite)
+    partial_path = Path(partial_file.name)
+    size = 0
+    progress = _ProgressReporter(response, on_progress, progress_interval)
+    try:
+        try:
+            async for chunk in response.aiter_raw():
+                await asyncio.to_thread(partial_file.write, chunk)
+                size += len(chunk)
+                progress.update()
+        finally:
+            await asyncio.to_thread(partial_file.close)
+        await asyncio.to_thread(_replace_file, partial_path, path, overwrite)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+
+    return StreamedBody(size=size, truncated=False, download_path=path)
+
+
+def _create_partial_file(path: Path, overwrite: bool) -> IO[bytes]:
+    """Create the temporary file a download is written to, next to `path`."""
+    if not overwrite and path.exists():
+        raise FileExistsError(f"{str(path)!r} already exists")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".part", delete=False
+    )
+
+
+def _replace_file(partial_path: Path, path: Path, overwrite: bool) -> None:
+    """Move a completed download into place."""
+    # The file may have been created while the body was being downloaded.
+    if not overwrite and path.exists():
+        raise FileExistsError(f"{str(path)!r} already exists")
+    os.replace(partial_path, path)
+
+
+def with_content(response: httpx.Response, content: bytes) -> httpx.Response:
+    """Return a copy of a streamed response, with the part of the body which was
+    read (see `StreamedBody.content`) as its content.
+
+    The body of a streamed response can only be read once, so this is how it's
+    made available as `response.content` and `response.text`. Call it after the
+    response is closed, so that the time it took is known.
+    """
+    copy = httpx.Response(
+        response.status_code,
+        content=content,
+        request=response.request,
+        extensions=response.extensions,
+        history=response.history,
+        default_encoding=response.default_encoding,
+    )
+    # Set the headers after the content, so that the content (which was decoded
+    # as it was read) isn't decoded again according to Content-Encoding.
+    copy.headers = response.headers
+    copy.elapsed = response.elapsed
+    return copy
@@ -0,0 +1,114 @@
+"""Compiled templates for substituting variables into requests.
+
+Substitution follows the rules of `string.Template` (`$name`, `${name}`, and `$$`
+for a literal `$`), but each template is parsed once, rather than every time a
+request is sent. Compiled templates are cached by their text, so requests with
+the same text in a field (e.g. `${BASE_URL}`) share a template.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from string import Template
+from typing import Any, Mapping
+
+_MISSING = object()
+
+
+RenderMemo = dict[str, tuple[tuple[Any, ...], str]]
+"""The values of the variables each template was last rendered with, and the
+result, keyed by the text of the template."""
+
+
+class CompiledTemplate:
+    """A template which has been split into literal text and variable names.
+
+    Compiled templates are shared, so they don't hold any state from rendering.
+    Instead, the caller can pass a memo to `render`, which remembers the values
+    of the variables the template was last rendered with, so rendering again with
+    the same values returns the previous result without substituting anything.
+    """
+
+    __slots__ = ("source", "variables", "_literals", "_names")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        """The text of the template."""
+        self._literals: list[str] | None = []
+        self._names: list[str] = []
+
+        if "$" not in source:
+            self._literals = [source]
+            self.variables: tuple[str, ...] = ()
+            """The names of the variables the template refers to."""
+            return
+
+        literal_start = 0
+        literal = ""
+        for match in Template.pattern.finditer(source):
+            if match.group("invalid") is not None:
+                # Let `string.Template` raise its usual error when rendering.
+                self._literals = None
+                continue
+            literal += source[literal_start : match.start()]
+            literal_start = match.end()
+            if match.group("escaped") is not None:
+                literal += "$"
+            else:
+                self._names.append(match.group("named") or match.group("braced"))
+                if self._literals is not None:
+                    self._literals.append(literal)
+                literal = ""
+        if self._literals is not None:
+            self._literals.append(literal + source[literal_start:])
+        self.variables = tuple(dict.fromkeys(self._names))
+
+    def render(
+        self, variables: Mapping[str, Any], memo: RenderMemo | None = None
+    ) -> str:
+        """Substitute the variables into the template.
+
+        Args:
+            variables: The values of the variables.
+            memo: Where to remember the result, so that it can be reused when the
+                template is next rendered with the same values.
+
+        Raises:
+            KeyError: If the template refers to a variable which isn't defined.
+            ValueError: If the template contains an invalid placeholder.
+        """
+        literals = self._literals
+        if literals is None:
+            return Template(self.source).substitute(variables)
+        if not self._names:
+            return literals[0]
+
+        if memo is not None:
+            values = tuple(variables.get(name, _MISSING) for name in self.variables)
+            last = memo.get(self.source)
+            if last is not None and last[0] == values:
+                return last[1]
+
+        parts = [literals[0]]
+        for name, literal in zip(self._names, literals[1:]):
+            parts.append(str(variables[name]))
+            parts.append(literal)
+        rendered = "".join(parts)
+        if memo is not None:
+            memo[self.source] = (values, rendered)
+        return rendered
+
+
+@lru_cache(maxsize=1024)
+def compile_template(source: str) -> CompiledTemplate:
+    """Return the compiled template for the text, compiling it if required."""
+    return CompiledTemplate(source)
+
+
+def render_template(
+    source: str, variables: Mapping[str, Any], memo: RenderMemo | None = None
+) -> str:
+    """Substitute variables into the text, using the cached compiled template."""
+    if "$" not in source:
+        return source
+    return compile_template(source).render(variables, memo)
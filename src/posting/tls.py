@@ -0,0 +1,171 @@
+"""SSL contexts which are shared between clients, and resume TLS sessions.
+
+Creating an SSL context means reading and parsing the CA bundle (and the client
+certificate, if there is one) from disk, which can take tens of milliseconds for
+a large corporate bundle. Contexts are therefore cached by their configuration
+(and the modification times of the files it refers to, so that an updated bundle
+or certificate is loaded again), so every client with the same SSL configuration
+uses the same context.
+
+Since the context outlives any one client or connection, it's also where TLS
+sessions are kept: a new connection to a host we've connected to before offers
+the server the previous session, so the server can skip the full handshake.
+"""
+
+from __future__ import annotations
+
+import os
+import ssl
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from weakref import WeakKeyDictionary
+
+import certifi
+import httpx
+
+from posting.types import CertTypes
+
+MAX_TLS_SESSIONS = 256
+"""The number of hosts to remember a TLS session with, per SSL context."""
+
+_CertFingerprint = tuple[str, int, int]
+"""The path, modification time (in nanoseconds) and size of a certificate file."""
+
+
+class TLSSessions:
+    """The most recent TLS session with each host, for the connections made with
+    one SSL context. The least recently used sessions are forgotten once there are
+    more than `max_hosts` of them."""
+
+    def __init__(self, max_hosts: int = MAX_TLS_SESSIONS) -> None:
+        self.max_hosts = max_hosts
+        self._sessions: OrderedDict[str, ssl.SSLSession] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, server_hostname: str) -> ssl.SSLSession | None:
+        session = self._sessions.get(server_hostname)
+        if session is not None:
+            self._sessions.move_to_end(server_hostname)
+        return session
+
+    def save(self, server_hostname: str, session: ssl.SSLSession | None) -> None:
+        if session is None:
+            return
+        self._sessions[server_hostname] = session
+        self._sessions.move_to_end(server_hostname)
+        while len(self._sessions) > self.max_hosts:
+            self._sessions.popitem(last=False)
+
+
+_TLS_SESSIONS: WeakKeyDictionary[ssl.SSLContext, TLSSessions] = WeakKeyDictionary()
+"""The TLS sessions of each SSL context created by `create_ssl_context`."""
+
+
+def tls_sessions(context: ssl.SSLContext) -> TLSSessions | None:
+    """Return the TLS sessions kept for an SSL context, if it resumes sessions."""
+    return _TLS_SESSIONS.get(context)
+
+
+class _ResumingSSLObject(ssl.SSLObject):
+    """A TLS connection which offers the server the previous session with the host,
+    and saves its own session for the next connection.
+
+    httpcore wraps connections using `SSLContext.wrap_bio`, which creates instances
+    of the context's `sslobject_class`. The session is saved after the handshake,
+    and again after the first read, since TLS 1.3 servers send their session
+    tickets after the handshake.
+    """
+
+    _session_offered = False
+    _session_saved_after_read = False
+
+    def do_handshake(self) -> None:
+        sessions = tls_sessions(self.context)
+        hostname = self.server_hostname
+        if sessions is None or hostname is None:
+            super().do_handshake()
+            return
+
+        if not self._session_offered:
+            # The handshake is retried until it completes, but the session can
+            # only be set before it starts.
+            self._session_offered = True
+            if self.session is None and (session := sessions.get(hostname)):
+                self.session = session
+        super().do_handshake()
+        sessions.save(hostname, self.session)
+
+    def read(self, len: int = 1024, buffer: bytearray | None = None) -> bytes | int:
+        data = super().read(len, buffer)
+        if not self._session_saved_after_read:
+            self._session_saved_after_read = True
+            sessions = tls_sessions(self.context)
+            if sessions is not None and self.server_hostname is not None:
+                sessions.save(self.server_hostname, self.session)
+        return data
+
+
+def _fingerprint(path: str | None) -> _CertFingerprint | None:
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        # Let creating the context report the problem.
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+def _default_ca_bundle() -> str:
+    # Respect the same environment variables as httpx.
+    return (
+        os.environ.get("SSL_CERT_FILE")
+        or os.environ.get("SSL_CERT_DIR")
+        or certifi.where()
+    )
+
+
+def create_ssl_context(
+    verify: str | bool, cert: CertTypes | None = None, http2: bool = False
+) -> ssl.SSLContext:
+    """Return the SSL context for the given configuration.
+
+    Contexts are cached, so calling this again with the same arguments returns
+    the same context (along with its TLS sessions), unless the CA bundle or the
+    client certificate has been modified since.
+
+    Args:
+        verify: Whether to verify the server's certificate, or the path of the CA
+            bundle (file or directory) to verify it with.
+        cert: The client certificate file, optionally followed by the key file and
+            the password of the key.
+        http2: Whether to offer HTTP/2 during the handshake (via ALPN).
+
+    Raises:
+        OSError: If the CA bundle or the client certificate couldn't be read.
+        ssl.SSLError: If the CA bundle or the client certificate is invalid.
+    """
+    if isinstance(cert, tuple) and len(cert) == 1:
+        cert = cert[0]
+    ca_bundle = (_default_ca_bundle() if verify is True else verify) or None
+    cert_files = [cert] if isinstance(cert, str) else list(cert or ())[:2]
+    fingerprints = tuple(_fingerprint(path) for path in [ca_bundle, *cert_files])
+    return _create_ssl_context(verify, cert or None, http2, fingerprints)
+
+
+@lru_cache(maxsize=32)
+def _create_ssl_context(
+    verify: str | bool,
+    cert: CertTypes | None,
+    http2: bool,
+    fingerprints: tuple[_CertFingerprint | None, ...],
+) -> ssl.SSLContext:
+    """Create an SSL context. The fingerprints of the files the configuration
+    refers to are only passed so that they're part of the cache key."""
+    context = httpx.create_ssl_context(cert=cert, verify=verify, http2=http2)
+    context.sslobject_class = _ResumingSSLObject
+    _TLS_SESSIONS[context] = TLSSessions()
+    return context
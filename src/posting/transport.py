@@ -0,0 +1,493 @@
+"""The network layer beneath httpx: hostname resolution, with caching, overrides
+and tracing, and connections opened in advance.
+
+httpcore resolves hostnames inside its `connect_tcp` trace event, so the time spent
+on DNS isn't visible in the trace. `ResolvingBackend` resolves hostnames itself,
+before handing an IP address to the real network backend, and reports the lookup
+as a `dns.resolve` event to the trace callback of the request being sent.
+
+httpcore also has no way to open a connection before a request is sent, so
+`ResolvingBackend.preconnect` opens one and holds onto it, and hands it over the
+next time httpcore asks for a connection to the same host.
+
+httpx's own transport doesn't accept a network backend, so `PoolTransport` gives
+one to the connection pool httpx creates.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import socket
+import ssl
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import partial
+from itertools import zip_longest
+from typing import Any, Awaitable, Callable, Iterable, Literal
+
+import httpcore
+import httpx
+from httpcore import AsyncNetworkBackend, AsyncNetworkStream
+
+from posting.retry import TraceCallback
+
+ResolutionSource = Literal["lookup", "cache", "override"]
+"""Where the addresses of a host came from."""
+
+PRECONNECT_MAX_AGE = 60.0
+"""How long, in seconds, a connection opened in advance is kept for. Servers close
+idle connections eventually, so older connections aren't worth handing over."""
+
+HAPPY_EYEBALLS_DELAY = 0.25
+"""How long, in seconds, to wait for a connection attempt to one address of a host
+before also trying the next address (see RFC 8305)."""
+
+RESOLVER_CACHE_SIZE = 256
+"""The maximum number of lookups a `Resolver` caches. Once it's full, the least
+recently used lookups are forgotten."""
+
+request_trace: ContextVar[TraceCallback | None] = ContextVar(
+    "request_trace", default=None
+)
+"""The trace callback of the request being sent by the current task, if any.
+
+The network backend isn't told which request a connection is being opened for,
+so the trace callback is passed to it via this context variable instead."""
+
+
+def is_ip_address(host: str) -> bool:
+    """Return True if the host is an IP address rather than a hostname."""
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def interleave_address_families(addresses: list[str]) -> list[str]:
+    """Reorder addresses to alternate between IPv6 and IPv4, starting with the
+    family of the most preferred address, as recommended by RFC 8305."""
+    if not addresses:
+        return addresses
+    ipv6 = [address for address in addresses if ":" in address]
+    ipv4 = [address for address in addresses if ":" not in address]
+    first, second = (ipv6, ipv4) if ":" in addresses[0] else (ipv4, ipv6)
+    return [
+        address
+        for pair in zip_longest(first, second)
+        for address in pair
+        if address is not None
+    ]
+
+
+class Resolver:
+    """Resolves hostnames to IP addresses, caching the results.
+
+    The system resolver doesn't tell us the TTL of the records it returns, so
+    results are cached for a fixed time instead.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        overrides: dict[str, str] | None = None,
+        max_size: int = RESOLVER_CACHE_SIZE,
+    ) -> None:
+        self.ttl = ttl
+        """How long, in seconds, to cache the result of a lookup."""
+        self.overrides = overrides or {}
+        """Addresses to use instead of looking up hosts, in the style of curl's
+        `--resolve`. Keys are either "host" or "host:port"."""
+        self.max_size = max_size
+        """The maximum number of lookups to cache."""
+        self._cache: OrderedDict[tuple[str, int], tuple[float, list[str]]] = (
+            OrderedDict()
+        )
+        self._pending: dict[tuple[str, int], asyncio.Task[list[str]]] = {}
+
+    def clear(self) -> None:
+        """Forget all cached lookups."""
+        self._cache.clear()
+
+    async def resolve(
+        self, host: str, port: int
+    ) -> tuple[list[str], ResolutionSource]:
+        """Return the IP addresses to connect to for a host, in order of preference.
+
+        Concurrent lookups of the same host share a single query.
+
+        Raises:
+            OSError: If the host couldn't be resolved.
+        """
+        override = self.overrides.get(f"{host}:{port}") or self.overrides.get(host)
+        if override is not None:
+            return [override], "override"
+
+        key = (host, port)
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, addresses = cached
+            if time.monotonic() < expires_at:
+                self._cache.move_to_end(key)
+                return addresses, "cache"
+            del self._cache[key]
+
+        # The lookup runs in a task of its own, rather than in the task of the
+        # first caller, so that cancelling any one caller doesn't cancel the
+        # lookup for the others.
+        lookup = self._pending.get(key)
+        if lookup is None:
+            lookup = asyncio.create_task(self._lookup_and_cache(host, port))
+            self._pending[key] = lookup
+            lookup.add_done_callback(partial(self._lookup_done, key))
+        return await asyncio.shield(lookup), "lookup"
+
+    async def _lookup_and_cache(self, host: str, port: int) -> list[str]:
+        addresses = await self._lookup(host, port)
+        self._cache[host, port] = (time.monotonic() + self.ttl, addresses)
+        self._cache.move_to_end((host, port))
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return addresses
+
+    def _lookup_done(
+        self, key: tuple[str, int], lookup: asyncio.Task[list[str]]
+    ) -> None:
+        del self._pending[key]
+        if not lookup.cancelled():
+            # Don't complain about an error if every caller was cancelled.
+            lookup.exception()
+
+    async def _lookup(self, host: str, port: int) -> list[str]:
+        results = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+        # Remove duplicates, keeping the order the system resolver prefers.
+        return list(dict.fromkeys(str(sockaddr[0]) for *_, sockaddr in results))
+
+
+@dataclass
+class _Preconnection:
+    stream: AsyncNetworkStream
+    """The connection, which is already wrapped in TLS if `ssl_context` is set."""
+    opened_at: float
+    ssl_context: ssl.SSLContext | None
+    server_hostname: str | None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.opened_at
+
+
+class _PrewarmedStream(AsyncNetworkStream):
+    """A connection which was opened in advance.
+
+    httpcore upgrades the connections it's given to TLS itself, so if the
+    connection was already upgraded with the same SSL context, upgrading it again
+    returns it as it is. If the request needs a different SSL context, a new
+    connection is opened instead.
+    """
+
+    def __init__(
+        self,
+        backend: ResolvingBackend,
+        preconnection: _Preconnection,
+        host: str,
+        port: int,
+    ) -> None:
+        self._backend = backend
+        self._preconnection = preconnection
+        self._stream = preconnection.stream
+        self._host = host
+        self._port = port
+
+    async def read(self, max_bytes: int, timeout: float | None = None) -> bytes:
+        return await self._stream.read(max_bytes, timeout)
+
+    async def write(self, buffer: bytes, timeout: float | None = None) -> None:
+        await self._stream.write(buffer, timeout)
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+    async def start_tls(
+        self,
+        ssl_context: ssl.SSLContext,
+        server_hostname: str | None = None,
+        timeout: float | None = None,
+    ) -> AsyncNetworkStream:
+        preconnection = self._preconnection
+        if preconnection.ssl_context is None:
+            return await self._stream.start_tls(ssl_context, server_hostname, timeout)
+        if (
+            preconnection.ssl_context is ssl_context
+            and preconnection.server_hostname == server_hostname
+        ):
+            return self._stream
+
+        await self._stream.aclose()
+        stream = await self._backend._connect(self._host, self._port, timeout)
+        return await stream.start_tls(ssl_context, server_hostname, timeout)
+
+    def get_extra_info(self, info: str) -> Any:
+        return self._stream.get_extra_info(info)
+
+
+class ResolvingBackend(AsyncNetworkBackend):
+    """A network backend which resolves hostnames with a `Resolver`.
+
+    If a host has several addresses, connections are attempted in the style of
+    Happy Eyeballs (RFC 8305): alternating between IPv6 and IPv4, a new attempt is
+    started whenever the previous one fails or hasn't connected within
+    `HAPPY_EYEBALLS_DELAY` seconds, and the first connection made is used. The
+    connect timeout applies to all of the attempts together, rather than to each.
+    Everything else is delegated to the wrapped backend.
+    """
+
+    def __init__(
+        self, resolver: Resolver, backend: AsyncNetworkBackend | None = None
+    ) -> None:
+        self.resolver = resolver
+        self._backend = backend or httpcore.AnyIOBackend()
+        self._preconnections: dict[tuple[str, int], _Preconnection] = {}
+
+    async def preconnect(
+        self,
+        host: str,
+        port: int,
+        ssl_context: ssl.SSLContext | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        """Open a connection to a host, to be used the next time httpcore opens a
+        connection to it.
+
+        Args:
+            host: The host to connect to.
+            port: The port to connect to.
+            ssl_context: The SSL context to upgrade the connection to TLS with,
+                or None for plain HTTP. This must be the SSL context of the client
+                which will send the request, for the connection to be used.
+            timeout: The timeout for each step of opening the connection.
+
+        Raises:
+            httpcore.ConnectError: If the connection couldn't be opened.
+            httpcore.ConnectTimeout: If opening the connection timed out.
+        """
+        stream = await self._connect(host, port, timeout)
+        if ssl_context is not None:
+            try:
+                stream = await stream.start_tls(ssl_context, host, timeout)
+                await self._read_session_tickets(stream)
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        previous = self._preconnections.pop((host, port), None)
+        if previous is not None:
+            await previous.stream.aclose()
+        self._preconnections[host, port] = _Preconnection(
+            stream, time.monotonic(), ssl_context, host if ssl_context else None
+        )
+
+    @staticmethod
+    async def _read_session_tickets(stream: AsyncNetworkStream) -> None:
+        """Read the session tickets a TLS 1.3 server sends after the handshake.
+
+        Otherwise the idle connection would have unread data waiting, which is
+        how a connection closed by the server is detected.
+        """
+        try:
+            data = await stream.read(1, timeout=0.1)
+        except httpcore.ReadTimeout:
+            # The connection is open, and there's nothing left to read.
+            return
+        if not data:
+            raise httpcore.ConnectError("The server closed the connection")
+        raise httpcore.ConnectError("The server sent data before the request")
+
+    async def _take_preconnection(self, host: str, port: int) -> _Preconnection | None:
+        preconnection = self._preconnections.pop((host, port), None)
+        if preconnection is None:
+            return None
+        # An idle connection which is readable has been closed by the server.
+        if preconnection.age > PRECONNECT_MAX_AGE or (
+            preconnection.stream.get_extra_info("is_readable")
+        ):
+            await preconnection.stream.aclose()
+            return None
+        return preconnection
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options: Iterable[httpcore.SOCKET_OPTION] | None = None,
+    ) -> AsyncNetworkStream:
+        preconnection = await self._take_preconnection(host, port)
+        if preconnection is not None:
+            if (trace := request_trace.get()) is not None:
+                await trace(
+                    "connection.prewarmed",
+                    {"host": host, "port": port, "age": preconnection.age},
+                )
+            return _PrewarmedStream(self, preconnection, host, port)
+        return await self._connect(
+            host,
+            port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+
+    async def _connect(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options: Iterable[httpcore.SOCKET_OPTION] | None = None,
+    ) -> AsyncNetworkStream:
+        if is_ip_address(host):
+            addresses = [host]
+        else:
+            addresses = await self._resolve(host, port, timeout)
+
+        connect = partial(
+            self._backend.connect_tcp,
+            port=port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+        if len(addresses) == 1:
+            return await connect(addresses[0])
+
+        try:
+            async with asyncio.timeout(timeout):
+                return await self._connect_staggered(
+                    interleave_address_families(addresses), connect
+                )
+        except TimeoutError as e:
+            raise httpcore.ConnectTimeout(f"Timed out connecting to {host!r}") from e
+
+    @staticmethod
+    async def _connect_staggered(
+        addresses: list[str],
+        connect: Callable[[str], Awaitable[AsyncNetworkStream]],
+    ) -> AsyncNetworkStream:
+        """Return a connection to the first of the addresses to accept one.
+
+        Raises:
+            httpcore.ConnectError: If no address accepted a connection.
+            httpcore.ConnectTimeout: If every connection attempt timed out.
+        """
+        waiting = list(addresses)
+        attempts: set[asyncio.Task[AsyncNetworkStream]] = set()
+        error: Exception | None = None
+        try:
+            while waiting or attempts:
+                if waiting:
+                    attempts.add(asyncio.create_task(connect(waiting.pop(0))))
+                done, attempts = await asyncio.wait(
+                    attempts,
+                    timeout=HAPPY_EYEBALLS_DELAY if waiting else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                streams: list[AsyncNetworkStream] = []
+                for attempt in done:
+                    try:
+                        streams.append(attempt.result())
+                    except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                        error = e
+                if streams:
+                    for extra_stream in streams[1:]:
+                        await extra_stream.aclose()
+                    return streams[0]
+            assert error is not None
+            raise error
+        finally:
+            # Abandon the attempts which are still in progress.
+            for attempt in attempts:
+                attempt.cancel()
+            for result in await asyncio.gather(*attempts, return_exceptions=True):
+                if isinstance(result, AsyncNetworkStream):
+                    await result.aclose()
+
+    async def _resolve(self, host: str, port: int, timeout: float | None) -> list[str]:
+        trace = request_trace.get()
+        info = {"host": host, "port": port}
+        if trace is not None:
+            await trace("dns.resolve.started", info)
+
+        try:
+            async with asyncio.timeout(timeout):
+                addresses, source = await self.resolver.resolve(host, port)
+        except TimeoutError as e:
+            if trace is not None:
+                await trace("dns.resolve.failed", {**info, "error": e})
+            raise httpcore.ConnectTimeout(f"Timed out resolving {host!r}") from e
+        except OSError as e:
+            if trace is not None:
+                await trace("dns.resolve.failed", {**info, "error": e})
+            raise httpcore.ConnectError(f"Couldn't resolve {host!r}: {e}") from e
+
+        if trace is not None:
+            await trace(
+                "dns.resolve.complete",
+                {**info, "addresses": addresses, "source": source},
+            )
+        return addresses
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: float | None = None,
+        socket_options: Iterable[httpcore.SOCKET_OPTION] | None = None,
+    ) -> AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class PoolTransport(httpx.AsyncHTTPTransport):
+    """httpx's transport, with its connections opened by the given network backend.
+
+    httpx builds the httpcore connection pool (or proxy pool) itself, but has no
+    option for the network backend, so it's swapped in once the pool is built.
+    Connections to a proxy are opened with the backend too, so the proxy's
+    hostname is resolved (and traced) like any other.
+
+    Args:
+        ssl_context: The SSL context for connections to HTTPS servers.
+        limits: The connection limits of the pool.
+        http2: Whether to use HTTP/2 with servers which support it.
+        proxy: The URL of an HTTP, HTTPS or SOCKS5 proxy to send requests via.
+        network_backend: The backend to open connections with, or None for
+            httpcore's default.
+
+    Raises:
+        ValueError: If the proxy URL is invalid.
+        ImportError: If the proxy is a SOCKS proxy, and `socksio` isn't installed.
+    """
+
+    def __init__(
+        self,
+        ssl_context: ssl.SSLContext,
+        limits: httpx.Limits,
+        http2: bool = False,
+        proxy: str | None = None,
+        network_backend: AsyncNetworkBackend | None = None,
+    ) -> None:
+        super().__init__(verify=ssl_context, limits=limits, http2=http2, proxy=proxy)
+        if network_backend is not None:
+            # Every httpcore pool opens its connections with `_network_backend`,
+            # including the connections to a proxy.
+            self._pool._network_backend = network_backend
@@ -1,26 +1,117 @@
 from __future__ import annotations
 from contextvars import ContextVar
+from dataclasses import dataclass, field
 from functools import lru_cache
 
+import json
 import re
 import os
+import threading
 from pathlib import Path
 from dotenv import dotenv_values
 from textual_autocomplete import TargetState
+from typing import Any, Iterable, Mapping
 
 
 _VARIABLES_PATTERN = re.compile(
     r"\$(?:([a-zA-Z_][a-zA-Z0-9_]*)|{([a-zA-Z_][a-zA-Z0-9_]*)})"
 )
 
-_initial_variables: dict[str, str | None] = {}
-VARIABLES: ContextVar[dict[str, str | None]] = ContextVar(
-    "variables", default=_initial_variables
+class _ActiveVariables:
+    """Holds the variables which are currently available.
+
+    Every task which inherits the context (e.g. every widget in the app) shares
+    the same holder, so replacing the variables in it is seen everywhere.
+    """
+
+    __slots__ = ("variables",)
+
+    def __init__(self, variables: dict[str, str | None]) -> None:
+        self.variables = variables
+
+
+_NO_VARIABLES = _ActiveVariables({})
+"""The holder used before any variables are set. It's shared by every context,
+so it's never modified."""
+
+VARIABLES: ContextVar[_ActiveVariables] = ContextVar(
+    "variables", default=_NO_VARIABLES
 )
 
 
 def get_variables() -> dict[str, str | None]:
-    return VARIABLES.get()
+    return VARIABLES.get().variables
+
+
+def set_variables(variables: dict[str, str | None]) -> None:
+    """Replace the variables which are currently available.
+
+    The variables are swapped in one step, so anything which fetched the
+    previous variables (e.g. a request which is being rendered) continues to
+    see all of the previous values, rather than a mixture of old and new.
+    """
+    active = VARIABLES.get()
+    if active is _NO_VARIABLES:
+        VARIABLES.set(_ActiveVariables(variables))
+    else:
+        active.variables = variables
+
+
+@dataclass
+class VariableChanges:
+    """How the available variables changed, e.g. after switching environment.
+
+    This is published by the app's `variables_changed_signal`, so widgets can
+    update only what depends on the variables which changed.
+    """
+
+    variables: dict[str, str | None]
+    """The variables which are now available."""
+    added: set[str] = field(default_factory=set)
+    """The names of variables which weren't previously defined."""
+    removed: set[str] = field(default_factory=set)
+    """The names of variables which are no longer defined."""
+    modified: set[str] = field(default_factory=set)
+    """The names of variables whose values changed."""
+
+    @classmethod
+    def between(
+        cls, old: dict[str, str | None], new: dict[str, str | None]
+    ) -> VariableChanges:
+        return cls(
+            variables=new,
+            added=new.keys() - old.keys(),
+            removed=old.keys() - new.keys(),
+            modified={
+                name
+                for name, value in new.items()
+                if name in old and old[name] != value
+            },
+        )
+
+    @property
+    def changed(self) -> set[str]:
+        """The names of the variables which were added, removed or modified."""
+        return self.added | self.removed | self.modified
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+
+def merge_variables(
+    file_variables: Iterable[Mapping[str, str | None]], use_host_environment: bool
+) -> dict[str, str | None]:
+    """Merge the variables from environment files, in order of precedence.
+
+    Variables from later files override those from earlier files, and variables
+    from the host environment (if it's used) override them all.
+    """
+    variables: dict[str, str | None] = {}
+    for values in file_variables:
+        variables.update(values)
+    if use_host_environment:
+        variables.update(os.environ)
+    return variables
 
 
 def load_variables(
@@ -30,23 +121,120 @@ def load_variables(
 
     This will make them available via the `get_variables` function."""
 
-    existing_variables = VARIABLES.get()
+    existing_variables = get_variables()
     if existing_variables:
-        return {key: value for key, value in existing_variables}
+        return dict(existing_variables)
 
-    variables: dict[str, str | None] = {
-        key: value
-        for file in environment_files
-        for key, value in dotenv_values(file).items()
-    }
-    if use_host_environment:
-        host_env_variables = {key: value for key, value in os.environ.items()}
-        variables = {**variables, **host_env_variables}
-
-    VARIABLES.set(variables)
+    variables = merge_variables(
+        (dotenv_values(file) for file in environment_files), use_host_environment
+    )
+    VARIABLES.set(_ActiveVariables(variables))
     return variables
 
 
+class Environments:
+    """The sets of environment files which can be switched between at runtime.
+
+    Each file is parsed once, and the merged variables of each environment are
+    kept, so switching to an environment doesn't read anything from disk.
+
+    Environments may be preloaded from a worker thread, so access to the parsed
+    files and merged variables is serialised with a lock.
+    """
+
+    def __init__(
+        self,
+        environments: Mapping[str, tuple[Path, ...]],
+        use_host_environment: bool,
+    ) -> None:
+        self.environments = dict(environments)
+        """The files of each environment, keyed by name, in order of precedence."""
+        self.use_host_environment = use_host_environment
+        self._file_variables: dict[Path, dict[str, str | None]] = {}
+        self._variables: dict[str, dict[str, str | None]] = {}
+        self._lock = threading.Lock()
+
+    def variables(self, name: str) -> dict[str, str | None]:
+        """Return the variables of the environment with the given name.
+
+        Raises:
+            KeyError: If there's no environment with the name.
+        """
+        with self._lock:
+            variables = self._variables.get(name)
+            if variables is None:
+                variables = merge_variables(
+                    (self._parse(path) for path in self.environments[name]),
+                    self.use_host_environment,
+                )
+                self._variables[name] = variables
+            return variables
+
+    def preload(self) -> None:
+        """Parse the files of every environment, ahead of switching to them."""
+        for name in self.environments:
+            self.variables(name)
+
+    @property
+    def files(self) -> set[Path]:
+        """The files of every environment."""
+        return {path for paths in self.environments.values() for path in paths}
+
+    def update_files(
+        self, file_variables: Mapping[Path, dict[str, str | None]]
+    ) -> set[str]:
+        """Replace the variables of files which have changed on disk.
+
+        Only the environments which use one of the files are merged again, and
+        the files which didn't change aren't parsed again.
+
+        Args:
+            file_variables: The variables now in each changed file (see
+                `parse_environment_file`).
+
+        Returns:
+            The names of the environments which use any of the files.
+        """
+        affected = {
+            name
+            for name, paths in self.environments.items()
+            if not file_variables.keys().isdisjoint(paths)
+        }
+        with self._lock:
+            self._file_variables.update(file_variables)
+            for name in affected:
+                self._variables.pop(name, None)
+        return affected
+
+    def _parse(self, path: Path) -> dict[str, str | None]:
+        variables = self._file_variables.get(path)
+        if variables is None:
+            variables = self._file_variables[path] = parse_environment_file(path)
+        return variables
+
+
+def parse_environment_file(path: Path) -> dict[str, str | None]:
+    """Return the variables defined in a `.env` file.
+
+    A file which doesn't exist (e.g. because it's being replaced) defines no
+    variables.
+    """
+    return dict(dotenv_values(path))
+
+
+def variable_value_from_json(value: Any) -> str:
+    """Convert a value decoded from JSON to the text substituted for a variable.
+
+    Strings are used as they are, null becomes an empty string, and numbers,
+    booleans, arrays and objects are substituted as they appear in JSON.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
 @lru_cache()
 def find_variables(template_str: str) -> list[tuple[str, int, int]]:
     return [
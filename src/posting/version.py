@@ -1,3 +1,5 @@
 from importlib.metadata import version
 
 VERSION = version("posting")
+
+USER_AGENT = f"Posting/{VERSION} (Terminal-based API client)"
@@ -2,20 +2,30 @@ from dataclasses import dataclass
 from functools import partial
 import os
 from pathlib import Path
-from typing import Union
+from threading import Lock
+from typing import Callable, Union
 from urllib.parse import urlparse
 from rich.style import Style
 from rich.text import Text, TextType
-from textual import on
+from textual import on, work
 from textual.app import ComposeResult
+from textual.binding import Binding
 from textual.containers import Vertical, VerticalScroll
 from textual.geometry import Region
 from textual.message import Message
 from textual.reactive import Reactive, reactive
 from textual.widgets import Static, Tree
 from textual.widgets.tree import TreeNode
+from textual.worker import Worker
 
-from posting.collection import Collection, RequestModel
+from posting.collection import (
+    Collection,
+    RequestModel,
+    load_request_from_yaml,
+    request_sort_key,
+)
+from posting.config import SETTINGS
+from posting.file_watcher import FileChanges, FileWatcher
 from posting.help_screen import HelpData
 from posting.widgets.collection.new_request_modal import (
     NewRequestData,
@@ -39,9 +49,14 @@ Shows all `*.posting.yaml` request files resolved from the specified collection
 Press `ctrl+n` to create a new request at the current cursor location.
 `j` and `k` can be used to navigate the tree.
 `J` and `K` jumps between sub-collections.
+Press `ctrl+r` to send every request in the sub-collection under the cursor.
 """,
     )
 
+    BINDINGS = [
+        Binding("ctrl+r", "run_collection", "Run folder", show=False),
+    ]
+
     COMPONENT_CLASSES = {
         "node-selected",
     }
@@ -65,6 +80,13 @@ Press `ctrl+n` to create a new request at the current cursor location.
             disabled=disabled,
         )
         self.cached_base_urls: set[str] = set()
+        self._unpopulated_nodes: set[TreeNode[CollectionNode]] = set()
+        """Collection nodes whose requests haven't been added to the tree yet,
+        because the collection is loaded lazily."""
+        self._load_lock = Lock()
+        """Held while a collection's files are being read by a worker thread."""
+        self._watcher: FileWatcher | None = None
+        self._watch_worker: Worker[None] | None = None
 
     @dataclass
     class RequestSelected(Message):
@@ -85,6 +107,29 @@ Press `ctrl+n` to create a new request at the current cursor location.
         def control(self) -> "CollectionTree":
             return self.tree
 
+    @dataclass
+    class RunCollection(Message):
+        """Posted when the user asks to send every request in a collection."""
+
+        collection: Collection
+        requests: list[RequestModel]
+        node: TreeNode[CollectionNode]
+        tree: "CollectionTree"
+
+        @property
+        def control(self) -> "CollectionTree":
+            return self.tree
+
+    @dataclass
+    class RequestFilesChanged(Message):
+        """Posted (from a thread) when request files change on disk."""
+
+        changes: FileChanges
+        requests: dict[Path, RequestModel]
+        """The requests loaded from the added and modified files."""
+        errors: dict[Path, str]
+        """Error messages for files which couldn't be loaded."""
+
     currently_open: Reactive[TreeNode[CollectionNode] | None] = reactive(None)
 
     def watch_currently_open(self, node: TreeNode[CollectionNode] | None) -> None:
@@ -171,6 +216,185 @@ Press `ctrl+n` to create a new request at the current cursor location.
             )
         )
 
+        watch_interval = SETTINGS.get().collection_browser.watch_interval
+        collection = self.root.data
+        if watch_interval is not None and isinstance(collection, Collection):
+            self._watcher = FileWatcher(collection.path, f"*{SUFFIX}")
+            # The first check records the initial state of the directory.
+            self.check_for_changes()
+            self.set_interval(watch_interval, self.check_for_changes)
+
+    def check_for_changes(self) -> None:
+        """Look for request files which have changed on disk, unless a check is
+        already in progress."""
+        if self._watch_worker is None or self._watch_worker.is_finished:
+            self._watch_worker = self._scan_request_files()
+
+    @work(thread=True, group="collection-watcher")
+    def _scan_request_files(self) -> None:
+        """Scan the collection directory and load any changed request files.
+
+        This runs in a thread so that the UI stays responsive while a large
+        collection is scanned.
+        """
+        watcher = self._watcher
+        if watcher is None:
+            return
+
+        changes = watcher.check()
+        if not changes:
+            return
+
+        requests: dict[Path, RequestModel] = {}
+        errors: dict[Path, str] = {}
+        for path in changes.added | changes.modified:
+            try:
+                requests[path] = load_request_from_yaml(str(path))
+            except Exception as e:
+                errors[path] = str(e)
+
+        self.post_message(self.RequestFilesChanged(changes, requests, errors))
+
+    @on(RequestFilesChanged)
+    def on_request_files_changed(self, event: RequestFilesChanged) -> None:
+        """Patch the tree to reflect request files changed outside of Posting."""
+        event.stop()
+        for path in event.changes.deleted:
+            self._remove_request_file(path)
+        for path, request in event.requests.items():
+            self._update_request_file(path, request)
+        self._refresh_cached_base_urls()
+
+        if event.errors:
+            root_path = self.root.data.path
+            file_names = ", ".join(
+                str(path.relative_to(root_path)) for path in sorted(event.errors)
+            )
+            self.notify(
+                title="Couldn't load changed requests",
+                message=file_names,
+                severity="warning",
+            )
+
+    def _collection_node_for(
+        self, path: Path, create: bool = False
+    ) -> TreeNode[CollectionNode] | None:
+        """Return the collection node for the directory a request file is in.
+
+        Args:
+            path: The path of a request file in the collection.
+            create: Whether to create any missing collection nodes.
+
+        Returns:
+            The collection node, or None if it doesn't exist (and `create` is False).
+        """
+        root_path = self.root.data.path
+        try:
+            parts = path.relative_to(root_path).parts[:-1]
+        except ValueError:
+            return None
+
+        pointer = self.root
+        subpath = root_path
+        for part in parts:
+            if pointer in self._unpopulated_nodes:
+                # The folder hasn't been read yet. Anything below it is found
+                # when it's loaded.
+                return pointer
+            subpath = subpath / part
+            collection_nodes = [
+                child for child in pointer.children if isinstance(child.data, Collection)
+            ]
+            for child in collection_nodes:
+                if child.data.name == part:
+                    pointer = child
+                    break
+            else:
+                if not create:
+                    return None
+                # Keep sub-collections sorted by name, as they are on startup.
+                following = next(
+                    (child for child in collection_nodes if child.data.name > part),
+                    None,
+                )
+                pointer = pointer.add(
+                    part, data=Collection(name=part, path=subpath), before=following
+                )
+        return pointer
+
+    def _find_request_node(
+        self, parent_node: TreeNode[CollectionNode], path: Path
+    ) -> TreeNode[CollectionNode] | None:
+        """Return the request node for the file directly below the given node."""
+        for child in parent_node.children:
+            if isinstance(child.data, RequestModel) and child.data.path == path:
+                return child
+        return None
+
+    def _update_request_file(self, path: Path, request: RequestModel) -> None:
+        """Add or update the node for a request file which was added or modified."""
+        parent_node = self._collection_node_for(path, create=True)
+        if parent_node is None:
+            return
+
+        if parent_node in self._unpopulated_nodes:
+            # The folder hasn't been read yet, so the file is found when it is.
+            return
+
+        node = self._find_request_node(parent_node, path)
+        if node is None:
+            # Insert the request in the same position it'd have on startup.
+            key = request_sort_key(request)
+            following = next(
+                (
+                    child
+                    for child in parent_node.children
+                    if not isinstance(child.data, RequestModel)
+                    or request_sort_key(child.data) > key
+                ),
+                None,
+            )
+            self.add_request(request, parent_node, before=following)
+            return
+
+        if node.data == request:
+            # The file was saved from Posting, so the node is already up to date.
+            return
+
+        node.data = request
+        node.set_label(request.name or "")
+        if node is self.currently_open:
+            self.notify(
+                title="Request changed on disk",
+                message=f"{request.name!r} was modified outside of Posting. "
+                "Saving it will overwrite those changes.",
+                severity="warning",
+            )
+
+    def _remove_request_file(self, path: Path) -> None:
+        """Remove the node for a request file which was deleted."""
+        parent_node = self._collection_node_for(path)
+        if parent_node is None:
+            return
+
+        if parent_node in self._unpopulated_nodes:
+            return
+
+        node = self._find_request_node(parent_node, path)
+        if node is None:
+            return
+
+        if node is self.currently_open:
+            self.currently_open = None
+        node.remove()
+
+        # Remove any sub-collections which no longer contain anything, since
+        # empty directories aren't shown on startup either.
+        while parent_node is not self.root and not parent_node.children:
+            empty_node = parent_node
+            parent_node = empty_node.parent or self.root
+            empty_node.remove()
+
     @on(Tree.NodeSelected)
     def on_node_selected(self, event: Tree.NodeSelected[CollectionNode]) -> None:
         event.stop()
@@ -179,6 +403,146 @@ Press `ctrl+n` to create a new request at the current cursor location.
             self._clear_line_cache()
             self.refresh()
 
+    @on(Tree.NodeExpanded)
+    def on_node_expanded(self, event: Tree.NodeExpanded[CollectionNode]) -> None:
+        if event.node in self._unpopulated_nodes:
+            self.load_node(event.node)
+
+    def add_collection(
+        self, parent_node: TreeNode[CollectionNode], collection: Collection
+    ) -> None:
+        """Add the contents of a collection to the tree below the given node.
+
+        Sub-collections which haven't been loaded yet are added without their
+        contents, which are added by `load_node` when the node is expanded.
+        """
+        if not collection.loaded:
+            self._unpopulated_nodes.add(parent_node)
+            return
+
+        # Add the requests (leaf nodes)
+        for request in collection.requests:
+            self.add_request(request, parent_node)
+
+        # Add the subcollections (child nodes)
+        for child_collection in collection.children:
+            child_node = parent_node.add(child_collection.name, data=child_collection)
+            self.add_collection(child_node, child_collection)
+
+    def load_node(
+        self,
+        node: TreeNode[CollectionNode],
+        recursive: bool = False,
+        callback: Callable[[], None] | None = None,
+    ) -> None:
+        """Load the contents of a lazily loaded collection node and add them to the tree.
+
+        The request files are read in a thread, so the UI stays responsive while
+        a large folder is loaded. The contents are added to the tree once they've
+        been read.
+
+        Args:
+            node: The collection node to load.
+            recursive: If True, load every collection below the node too.
+            callback: Called (on the main thread) once the contents have been
+                added to the tree.
+        """
+        collection = node.data
+        if not isinstance(collection, Collection):
+            return
+
+        if not self._has_unpopulated_nodes(node, recursive):
+            if callback is not None:
+                callback()
+            return
+
+        self._load_collection(node, collection, recursive, callback)
+
+    def _has_unpopulated_nodes(
+        self, node: TreeNode[CollectionNode], recursive: bool
+    ) -> bool:
+        """Return True if the node (or, if `recursive`, any node below it) still
+        needs its contents to be loaded."""
+        if node in self._unpopulated_nodes:
+            return True
+        if not recursive:
+            return False
+        for unpopulated_node in self._unpopulated_nodes:
+            ancestor = unpopulated_node.parent
+            while ancestor is not None:
+                if ancestor is node:
+                    return True
+                ancestor = ancestor.parent
+        return False
+
+    @work(thread=True, group="collection-loader")
+    def _load_collection(
+        self,
+        node: TreeNode[CollectionNode],
+        collection: Collection,
+        recursive: bool,
+        callback: Callable[[], None] | None,
+    ) -> None:
+        """Read the request files of a collection, then add them to the tree."""
+        # Loading the same collection from two threads at once would read its
+        # files twice.
+        with self._load_lock:
+            if recursive:
+                collection.load_all()
+            else:
+                collection.load_requests()
+        self.app.call_from_thread(self._populate_node, node, recursive)
+        if callback is not None:
+            self.app.call_from_thread(callback)
+
+    def _populate_node(
+        self, node: TreeNode[CollectionNode], recursive: bool = False
+    ) -> None:
+        """Add the contents of a loaded collection to the tree below its node."""
+        collection = node.data
+        if not isinstance(collection, Collection):
+            return
+
+        if node in self._unpopulated_nodes and collection.loaded:
+            self._unpopulated_nodes.discard(node)
+            self.add_collection(node, collection)
+
+        if recursive:
+            for child in node.children:
+                if isinstance(child.data, Collection):
+                    self._populate_node(child, recursive=True)
+
+    def action_run_collection(self) -> None:
+        """Run the collection under the cursor, or the one containing the request
+        under the cursor."""
+        node = self.cursor_node
+        while node is not None and not isinstance(node.data, Collection):
+            node = node.parent
+        if node is None or not isinstance(node.data, Collection):
+            return
+
+        def collect_requests(parent: TreeNode[CollectionNode]) -> list[RequestModel]:
+            requests: list[RequestModel] = []
+            for child in parent.children:
+                if isinstance(child.data, RequestModel):
+                    requests.append(child.data)
+                else:
+                    requests.extend(collect_requests(child))
+            return requests
+
+        def run_collection() -> None:
+            self.post_message(
+                self.RunCollection(
+                    collection=node.data,
+                    requests=collect_requests(node),
+                    node=node,
+                    tree=self,
+                )
+            )
+
+        # Every folder below the node is loaded before its requests are collected.
+        self.load_node(node, recursive=True, callback=run_collection)
+
     async def new_request_flow(self, initial_request: RequestModel | None) -> None:
         """Start the flow to create a new request.
 
@@ -327,29 +691,50 @@ Press `ctrl+n` to create a new request at the current cursor location.
         )
 
     def cache_request(self, request: RequestModel) -> None:
-        def get_base_url(url: str) -> str | None:
-            try:
-                parsed_url = urlparse(url)
-                # Check if the scheme and netloc are present
-                if parsed_url.scheme and parsed_url.netloc:
-                    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                    return base_url
-            except Exception:
-                return None
-
         base_url = get_base_url(request.url)
-        if base_url:
+        if base_url and base_url not in self.cached_base_urls:
             self.cached_base_urls.add(base_url)
-            # Post a message up to the screen so that it can inform
-            # the URL bar that the autocomplete suggestions have changed.
-            self.post_message(
-                # TODO: We should sort these cached URLs on frequency instead
-                # of alphabetically. Bring the most used URLs to the top.
-                self.RequestCacheUpdated(
-                    cached_base_urls=list(self.cached_base_urls),
-                    tree=self,
-                )
+            self._post_cached_base_urls()
+
+    def _refresh_cached_base_urls(self) -> None:
+        """Rebuild the cached base URLs from the requests currently in the tree."""
+        cached_base_urls: set[str] = set()
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node.data, RequestModel):
+                if base_url := get_base_url(node.data.url):
+                    cached_base_urls.add(base_url)
+            nodes.extend(node.children)
+
+        if cached_base_urls != self.cached_base_urls:
+            self.cached_base_urls = cached_base_urls
+            self._post_cached_base_urls()
+
+    def _post_cached_base_urls(self) -> None:
+        # Post a message up to the screen so that it can inform
+        # the URL bar that the autocomplete suggestions have changed.
+        self.post_message(
+            # TODO: We should sort these cached URLs on frequency instead
+            # of alphabetically. Bring the most used URLs to the top.
+            self.RequestCacheUpdated(
+                cached_base_urls=list(self.cached_base_urls),
+                tree=self,
             )
+        )
+
+
+def get_base_url(url: str) -> str | None:
+    """Return the scheme and host of the URL, if it has both."""
+    try:
+        parsed_url = urlparse(url)
+        # Check if the scheme and netloc are present
+        if parsed_url.scheme and parsed_url.netloc:
+            base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+            return base_url
+    except Exception:
+        return None
+    return None
 
 
 class RequestPreview(VerticalScroll):
@@ -425,24 +810,15 @@ class CollectionBrowser(Vertical):
         tree.show_guides = False
         self.border_subtitle = collection.name
 
-        def add_collection_to_tree(
-            parent_node: TreeNode[CollectionNode], collection: Collection
-        ) -> None:
-            # Add the requests (leaf nodes)
-            for request in collection.requests:
-                tree.add_request(request, parent_node)
-
-            # Add the subcollections (child nodes)
-            for child_collection in collection.children:
-                child_node = parent_node.add(
-                    child_collection.name, data=child_collection
-                )
-                add_collection_to_tree(child_node, child_collection)
-
         # Start building the tree from the root node
-        add_collection_to_tree(tree.root, collection)
+        tree.add_collection(tree.root, collection)
 
-        tree.root.expand_all()
+        if not tree._unpopulated_nodes:
+            tree.root.expand_all()
+        else:
+            # The collection is being loaded lazily, so sub-collections are only
+            # loaded (and expanded) on demand.
+            tree.root.expand()
         tree.cursor_line = 0
         yield tree
         yield RequestPreview()
@@ -17,7 +17,9 @@ from posting.help_screen import HelpData
 
 from posting.highlighters import VariablesAndUrlHighlighter
 from posting.variables import (
+    VariableChanges,
     extract_variable_name,
+    find_variables,
     get_variable_at_cursor,
     get_variables,
 )
@@ -27,6 +29,30 @@ from posting.widgets.response.response_trace import Event
 from posting.widgets.variable_autocomplete import VariableAutoComplete
 
 
+HTTP11_MARKER_EVENTS = (
+    "connection.connect_tcp",
+    "connection.start_tls",
+    "http11.send_request_headers",
+    "http11.send_request_body",
+    "http11.receive_response_headers",
+    "http11.receive_response_body",
+    "http11.response_closed",
+)
+"""The phases shown as markers in the URL bar for HTTP/1.1 requests."""
+
+HTTP2_MARKER_EVENTS = (
+    "connection.connect_tcp",
+    "connection.start_tls",
+    "http2.send_connection_init",
+    "http2.send_request_headers",
+    "http2.send_request_body",
+    "http2.receive_response_headers",
+    "http2.receive_response_body",
+    "http2.response_closed",
+)
+"""The phases shown as markers in the URL bar for HTTP/2 requests."""
+
+
 class UrlInput(PostingInput):
     """
     The URL input.
@@ -203,6 +229,7 @@ class UrlBar(Vertical):
         )
         self.screen.mount(self.auto_complete)
         self.app.theme_change_signal.subscribe(self, self.on_theme_change)
+        self.app.variables_changed_signal.subscribe(self, self.on_variables_changed)
 
     @on(Input.Changed)
     def on_change(self, event: Input.Changed) -> None:
@@ -214,8 +241,21 @@ class UrlBar(Vertical):
 
     @on(UrlInput.CursorMoved)
     def on_cursor_moved(self, event: UrlInput.CursorMoved) -> None:
+        self._update_variable_value_bar(event.cursor_position, event.value)
+
+    def on_variables_changed(self, changes: VariableChanges) -> None:
+        url_input = self.url_input
+        referenced = {name for name, _, _ in find_variables(url_input.value)}
+        if referenced.isdisjoint(changes.changed):
+            return
+        url_input.refresh()
+        if url_input.has_focus:
+            self._update_variable_value_bar(url_input.cursor_position, url_input.value)
+
+    def _update_variable_value_bar(self, cursor_position: int, value: str) -> None:
+        """Show the value of the variable at the cursor, if there is one."""
         variables = get_variables()
-        variable_at_cursor = get_variable_at_cursor(event.cursor_position, event.value)
+        variable_at_cursor = get_variable_at_cursor(cursor_position, value)
         try:
             variable_bar = self.variable_value_bar
         except NoMatches:
@@ -249,11 +289,18 @@ class UrlBar(Vertical):
 
     def log_event(self, event: Event, info: dict[str, Any]) -> None:
         """Log an event to the request trace."""
+        if event == "retry.attempt.started" and info["attempt"] > 1:
+            # Show the progress of the latest attempt.
+            self._trace_events.clear()
+        elif event in self._trace_events:
+            return
         self._trace_events.add(event)
-        markers = self._build_markers()
-        self.trace_markers.update(markers)
 
-        self.trace_markers.set_class(len(self._trace_events) > 0, "has-events")
+        # Only rebuild the markers if the event changes one of them.
+        event_base = event.rsplit(".", maxsplit=1)[0]
+        if event_base in HTTP11_MARKER_EVENTS or event_base in HTTP2_MARKER_EVENTS:
+            self.trace_markers.update(self._build_markers())
+            self.trace_markers.set_class(True, "has-events")
 
     def _build_markers(self) -> Text:
         def get_marker(event_base: str) -> Text:
@@ -270,19 +317,14 @@ class UrlBar(Vertical):
                 style = self.get_component_rich_style("not-started-marker")
                 return Text("■", style=style)
 
-        event_bases = [
-            "connection.connect_tcp",
-            "connection.start_tls",
-            "http11.send_request_headers",
-            "http11.send_request_body",
-            "http11.receive_response_headers",
-            "http11.receive_response_body",
-            "http11.response_closed",
-        ]
-
-        markers = {event: get_marker(event) for event in event_bases}
+        # The events which are emitted depend on the HTTP version which was
+        # negotiated for the connection.
+        if any(event.startswith("http2.") for event in self._trace_events):
+            event_bases = HTTP2_MARKER_EVENTS
+        else:
+            event_bases = HTTP11_MARKER_EVENTS
 
-        return Text.assemble(*markers.values())
+        return Text.assemble(*(get_marker(event) for event in event_bases))
 
     def clear_events(self) -> None:
         """Clear the events from the request trace."""
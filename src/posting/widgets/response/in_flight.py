@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from rich.text import Text
+from textual import on
+from textual.binding import Binding
+from textual.message import Message
+from textual.widgets import OptionList
+from textual.widgets.option_list import Option
+from textual.worker import Worker
+
+from posting.help_screen import HelpData
+from posting.messages import HttpResponseReceived
+from posting.widgets.response.response_area import human_readable_size
+from posting.widgets.response.response_trace import Event
+
+TraceRecord = tuple[Event, dict[str, Any], int]
+"""A trace event, its info, and when it happened (from `time.perf_counter_ns`)."""
+
+MAX_FINISHED_REQUESTS = 10
+"""How many finished requests are kept in the list, so their responses can be
+viewed again."""
+
+
+@dataclass
+class InFlightRequest:
+    """A request sent from the UI, and its response once it arrives."""
+
+    request_id: int
+    method: str
+    url: str
+    started: float
+    """When the request was sent (from `time.monotonic`)."""
+    worker: Worker[None] | None = None
+    """The worker sending the request, which is cancelled to cancel the request."""
+    bytes_downloaded: int = 0
+    total_bytes: int | None = None
+    finished: float | None = None
+    """When the request completed, failed or was cancelled."""
+    result: HttpResponseReceived | None = None
+    """The response, if one was received."""
+    error: str | None = None
+    """Why no response was received, if the request failed."""
+    viewed: bool = False
+    """Whether the response has been displayed."""
+    trace: list[TraceRecord] = field(default_factory=list)
+    """The trace events of the request, so its trace can be shown again when
+    the request is selected."""
+
+    @property
+    def in_flight(self) -> bool:
+        return self.finished is None
+
+    @property
+    def elapsed(self) -> float:
+        """The number of seconds the request was (or has been) in flight."""
+        end = time.monotonic() if self.finished is None else self.finished
+        return end - self.started
+
+
+class InFlightRequests(OptionList):
+    """Lists the requests which are being sent, and those sent recently.
+
+    Requests are sent concurrently, so a slow request doesn't stop others being
+    sent. Each response and trace is kept with the request which produced it:
+    selecting a request shows its trace, and its response once it has finished.
+
+    The list is hidden when no requests are in flight and every response has
+    been viewed.
+    """
+
+    help = HelpData(
+        title="Requests",
+        description="""\
+Requests which are being sent, and recently sent requests.
+Select a request to view its trace, and its response once it has finished.
+Press `delete` or `backspace` to cancel a request which is in flight,
+or to remove a finished request from the list.
+""",
+    )
+
+    DEFAULT_CSS = """\
+    InFlightRequests {
+        height: auto;
+        max-height: 6;
+        border: none;
+        padding: 0;
+        margin: 0 2 1 2;
+        background: transparent;
+        display: none;
+        &.-visible {
+            display: block;
+        }
+        &:focus {
+            border: none;
+        }
+    }
+    """
+
+    BINDINGS = [
+        Binding("delete,backspace", "cancel_request", "Cancel/remove"),
+    ]
+
+    @dataclass
+    class RequestSelected(Message):
+        """Posted when the user chooses a request to view its trace and response."""
+
+        request: InFlightRequest
+        requests: InFlightRequests
+
+        @property
+        def control(self) -> InFlightRequests:
+            return self.requests
+
+    def __init__(
+        self,
+        name: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+        disabled: bool = False,
+    ) -> None:
+        super().__init__(name=name, id=id, classes=classes, disabled=disabled)
+        self.requests: dict[int, InFlightRequest] = {}
+        """The requests in the list, keyed by request ID, oldest first."""
+        self.displayed_id: int | None = None
+        """The ID of the request whose response (or trace) is being displayed."""
+
+    def on_mount(self) -> None:
+        self._ticker = self.set_interval(0.25, self._refresh_in_flight, pause=True)
+
+    def add(self, request: InFlightRequest) -> None:
+        """Add a request which has just been sent."""
+        self.requests[request.request_id] = request
+        self.displayed_id = request.request_id
+        finished = [old for old in self.requests.values() if not old.in_flight]
+        for old in finished[:-MAX_FINISHED_REQUESTS]:
+            self._remove(old.request_id)
+        self.add_option(Option(self._prompt(request), id=str(request.request_id)))
+        self._ticker.resume()
+        self._refresh_all()
+
+    def get(self, request_id: int) -> InFlightRequest | None:
+        return self.requests.get(request_id)
+
+    def update_progress(
+        self, request_id: int, bytes_downloaded: int, total_bytes: int | None
+    ) -> None:
+        if (request := self.requests.get(request_id)) is not None:
+            request.bytes_downloaded = bytes_downloaded
+            request.total_bytes = total_bytes
+
+    def finish(
+        self,
+        request_id: int,
+        result: HttpResponseReceived | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Record the outcome of a request."""
+        request = self.requests.get(request_id)
+        if request is None or not request.in_flight:
+            return
+        request.finished = time.monotonic()
+        request.result = result
+        request.error = error
+        request.worker = None
+        if not any(request.in_flight for request in self.requests.values()):
+            self._ticker.pause()
+        self._refresh_all()
+
+    def show(self, request_id: int) -> None:
+        """Mark the request as the one being displayed."""
+        self.displayed_id = request_id
+        if (request := self.requests.get(request_id)) is not None:
+            request.viewed = True
+        self._refresh_all()
+
+    def action_cancel_request(self) -> None:
+        """Cancel the highlighted request, or remove it if it has finished."""
+        if self.highlighted is None:
+            return
+        option = self.get_option_at_index(self.highlighted)
+        assert option.id is not None
+        request = self.requests[int(option.id)]
+        if request.in_flight:
+            if request.worker is not None:
+                request.worker.cancel()
+            self.finish(request.request_id, error="cancelled")
+        else:
+            self._remove(request.request_id)
+            self._refresh_all()
+
+    @on(OptionList.OptionSelected)
+    def _on_option_selected(self, event: OptionList.OptionSelected) -> None:
+        event.stop()
+        assert event.option.id is not None
+        request = self.requests[int(event.option.id)]
+        self.post_message(self.RequestSelected(request, self))
+
+    def on_blur(self) -> None:
+        self._refresh_all()
+
+    def _remove(self, request_id: int) -> None:
+        del self.requests[request_id]
+        self.remove_option(str(request_id))
+
+    def _refresh_in_flight(self) -> None:
+        for request in self.requests.values():
+            if request.in_flight:
+                self.replace_option_prompt(
+                    str(request.request_id), self._prompt(request)
+                )
+
+    def _refresh_all(self) -> None:
+        for request in self.requests.values():
+            self.replace_option_prompt(str(request.request_id), self._prompt(request))
+        # Only take up space while there are requests to keep an eye on, or
+        # responses which haven't been looked at yet. Don't disappear while the
+        # user is choosing between responses, though.
+        self.set_class(
+            self.has_focus
+            or any(
+                request.in_flight or (request.result and not request.viewed)
+                for request in self.requests.values()
+            ),
+            "-visible",
+        )
+
+    def _prompt(self, request: InFlightRequest) -> Text:
+        prompt = Text()
+        prompt.append("▶ " if request.request_id == self.displayed_id else "  ")
+        if request.in_flight:
+            prompt.append("…  ", style="yellow")
+        elif request.result is not None:
+            status_code = request.result.response.status_code
+            if status_code < 300:
+                style = "green"
+            elif status_code < 400:
+                style = "yellow"
+            else:
+                style = "red"
+            prompt.append(f"{status_code}", style=f"b {style}")
+        else:
+            prompt.append("✕  ", style="red")
+
+        prompt.append(f" {request.method} ", style="b")
+        prompt.append(request.url)
+        prompt.append(f"  {request.elapsed:.1f}s", style="dim")
+        if request.in_flight and request.bytes_downloaded:
+            progress = human_readable_size(request.bytes_downloaded)
+            if request.total_bytes:
+                progress += f" of {human_readable_size(request.total_bytes)}"
+            prompt.append_text(Text.from_markup(f"  {progress}", style="dim"))
+        if request.error is not None:
+            prompt.append(f"  {request.error}", style="red")
+        return prompt
@@ -1,6 +1,13 @@
 import json
+from pathlib import Path
 import httpx
 from posting.config import SETTINGS
+from posting.http_cache import CacheStatus
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional dependency
+    orjson = None
 
 from posting.widgets.response.response_trace import ResponseTrace
 from posting.widgets.tabbed_content import PostingTabbedContent
@@ -9,11 +16,13 @@ from posting.widgets.response.cookies_table import CookiesTable
 from posting.widgets.response.response_body import ResponseTextArea
 from posting.widgets.response.response_headers import ResponseHeadersTable
 
+from textual import work
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.reactive import Reactive, reactive
 from textual.widgets import TabPane
 from textual.widgets._tabbed_content import ContentTabs
+from textual.worker import get_current_worker
 
 
 class ResponseTabbedContent(PostingTabbedContent):
@@ -40,6 +49,20 @@ class ResponseArea(Vertical):
     """
     response: Reactive[httpx.Response | None] = reactive(None)
 
+    body_size: int | None = None
+    """The size of the complete response body, if the response content only
+    contains the start of it."""
+
+    download_path: Path | None = None
+    """The file the response body was written to, if it was downloaded."""
+
+    cache_status: CacheStatus | None = None
+    """How the response was served by the HTTP cache, if it's enabled."""
+
+    _body_generation: int = 0
+    """Incremented each time a body is displayed, so that a body prettified in the
+    background can tell whether it's still the one being displayed."""
+
     def on_mount(self) -> None:
         self.border_title = "Response"
         self.add_class("section")
@@ -77,13 +100,21 @@ class ResponseArea(Vertical):
         response_text = response.text
         response_settings = SETTINGS.get().response
         if response_text_area.language == "json" and response_settings.prettify_json:
-            try:
-                response_text = json.dumps(
-                    json.loads(response_text), indent=2, ensure_ascii=False
-                )
-            except json.JSONDecodeError:
-                pass
+            threshold = response_settings.prettify_json_background_threshold
+            if len(response_text) > threshold:
+                # Show the body as-is straight away, and replace it with the
+                # pretty version when it's ready, to avoid blocking the UI.
+                self.prettify_in_background(response_text, self._body_generation + 1)
+            else:
+                self.workers.cancel_group(self, "prettify-json")
+                try:
+                    response_text = prettify_json(response_text)
+                except ValueError:
+                    pass
+        else:
+            self.workers.cancel_group(self, "prettify-json")
 
+        self._body_generation += 1
         response_text_area.text = response_text
 
         # Update the response headers table with the response headers.
@@ -113,7 +144,57 @@ class ResponseArea(Vertical):
 
         settings = SETTINGS.get()
         if settings.response.show_size_and_time:
-            self.border_subtitle = f"{human_readable_size(len(response.content))} in {response.elapsed.total_seconds() * 1000:.2f}[dim]ms[/]"
+            body_size = self.body_size
+            size = human_readable_size(
+                len(response.content) if body_size is None else body_size
+            )
+            if self.download_path is not None:
+                truncated = " [dim](saved to file)[/]"
+            elif body_size is not None:
+                truncated = " [dim](truncated)[/]"
+            else:
+                truncated = ""
+            if self.cache_status is not None:
+                truncated += f" [dim](cache {self.cache_status})[/]"
+            self.border_subtitle = f"{size}{truncated} in {response.elapsed.total_seconds() * 1000:.2f}[dim]ms[/]"
+        else:
+            self.border_subtitle = ""
+
+    def show_download_progress(
+        self, bytes_downloaded: int, total_bytes: int | None, bytes_per_second: float
+    ) -> None:
+        """Show the progress of a response body which is being downloaded."""
+        progress = human_readable_size(bytes_downloaded)
+        if total_bytes:
+            progress += f" of {human_readable_size(total_bytes)}"
+        self.border_subtitle = (
+            f"Downloading {progress} ({human_readable_size(bytes_per_second)}/s)"
+        )
+
+    @work(thread=True, exclusive=True, group="prettify-json")
+    def prettify_in_background(self, response_text: str, generation: int) -> None:
+        """Pretty-print a JSON body in a thread, then display it.
+
+        Starting this again (e.g. when a new response arrives) cancels the
+        previous run, so a stale body is never displayed.
+
+        Args:
+            response_text: The body to prettify.
+            generation: The `_body_generation` of the displayed body.
+        """
+        try:
+            pretty_text = prettify_json(response_text)
+        except ValueError:
+            return
+
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self._show_pretty_text, generation, pretty_text)
+
+    def _show_pretty_text(self, generation: int, pretty_text: str) -> None:
+        # Only replace the body if another hasn't been displayed since
+        # prettifying began.
+        if generation == self._body_generation:
+            self.text_editor.text_area.text = pretty_text
 
     @property
     def text_editor(self) -> TextEditor:
@@ -136,6 +217,25 @@ class ResponseArea(Vertical):
         return self.tabbed_content.query_one(ContentTabs)
 
 
+def prettify_json(text: str) -> str:
+    """Format a JSON document with an indent of 2.
+
+    orjson is used if it's installed, since it's many times faster than the
+    standard library for large documents.
+
+    Raises:
+        ValueError: If the text isn't valid JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(orjson.loads(text), option=orjson.OPT_INDENT_2).decode()
+        except (orjson.JSONDecodeError, TypeError):
+            # orjson is stricter than the json module (e.g. it rejects integers
+            # larger than 64 bits), so fall back to the json module.
+            pass
+    return json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+
+
 def content_type_to_language(content_type: str) -> str | None:
     """Given the value of an HTTP content-type header, return the name
     of the language to use in the response body text area."""
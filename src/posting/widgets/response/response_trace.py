@@ -1,8 +1,15 @@
 import time
+from dataclasses import dataclass
 from typing import Any, Literal
+
+from rich.console import Group, RenderableType
+from rich.table import Table
+from rich.text import Text
 from textual.app import ComposeResult
 from textual.containers import VerticalScroll
-from textual.widgets import Label
+from textual.widget import Widget
+
+from posting.http_cache import CacheStatus
 
 
 Event = Literal[
@@ -21,15 +28,173 @@ Event = Literal[
     "http11.send_request_body.started",
     "http11.send_request_body.complete",
     "http11.send_request_body.failed",
+    "http11.receive_response_headers.started",
+    "http11.receive_response_headers.complete",
+    "http11.receive_response_headers.failed",
     "http11.receive_response_body.started",
     "http11.receive_response_body.complete",
     "http11.receive_response_body.failed",
     "http11.response_closed.started",
     "http11.response_closed.complete",
     "http11.response_closed.failed",
+    "http2.send_connection_init.started",
+    "http2.send_connection_init.complete",
+    "http2.send_connection_init.failed",
+    "http2.send_request_headers.started",
+    "http2.send_request_headers.complete",
+    "http2.send_request_headers.failed",
+    "http2.send_request_body.started",
+    "http2.send_request_body.complete",
+    "http2.send_request_body.failed",
+    "http2.receive_remote_settings.started",
+    "http2.receive_remote_settings.complete",
+    "http2.receive_remote_settings.failed",
+    "http2.receive_response_headers.started",
+    "http2.receive_response_headers.complete",
+    "http2.receive_response_headers.failed",
+    "http2.receive_response_body.started",
+    "http2.receive_response_body.complete",
+    "http2.receive_response_body.failed",
+    "http2.response_closed.started",
+    "http2.response_closed.complete",
+    "http2.response_closed.failed",
+    "retry.attempt.started",
+    "retry.attempt.complete",
+    "retry.attempt.failed",
+    "retry.backoff.started",
+    "retry.backoff.complete",
+    "rate_limit.wait.started",
+    "rate_limit.wait.complete",
+    "dns.resolve.started",
+    "dns.resolve.complete",
+    "dns.resolve.failed",
+    "connection.prewarmed",
 ]
 
 
+PHASE_LABELS: dict[str, str] = {
+    "connection.connect_tcp": "TCP connect",
+    "connection.connect_unix_socket": "Socket connect",
+    "connection.start_tls": "TLS handshake",
+    "http2.send_connection_init": "HTTP/2 preface",
+    "http2.receive_remote_settings": "HTTP/2 settings",
+    "retry.attempt": "Attempt",
+    "retry.backoff": "Backoff",
+    "rate_limit.wait": "Rate limit",
+    "dns.resolve": "DNS lookup",
+}
+"""Human readable names for the phases of a request, keyed by trace event name."""
+for _protocol in ("http11", "http2"):
+    PHASE_LABELS.update(
+        {
+            f"{_protocol}.send_request_headers": "Send headers",
+            f"{_protocol}.send_request_body": "Send body",
+            f"{_protocol}.receive_response_headers": "Waiting (TTFB)",
+            f"{_protocol}.receive_response_body": "Download",
+            f"{_protocol}.response_closed": "Close",
+        }
+    )
+
+_CONNECT_PHASES = {"connection.connect_tcp", "connection.connect_unix_socket"}
+_REQUEST_START_PHASES = {"http11.send_request_headers", "http2.send_request_headers"}
+
+
+@dataclass
+class TracePhase:
+    """A phase of a request, such as connecting or downloading the body."""
+
+    label: str
+    started: int
+    """When the phase started (from `time.perf_counter_ns`)."""
+    ended: int | None = None
+    """When the phase completed or failed, or None if it's still in progress."""
+    failed: bool = False
+    note: str = ""
+    """Extra information shown next to the duration of the phase."""
+
+
+class TraceWaterfall(Widget):
+    """Displays the phases of a request as a waterfall chart.
+
+    The chart is rendered from the phases in a single pass, so recording an event
+    only updates some state and schedules a refresh, rather than mounting widgets.
+    """
+
+    DEFAULT_CSS = """\
+        TraceWaterfall {
+            height: auto;
+        }
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.phases: dict[str, TracePhase] = {}
+        """The phases of the request, keyed by event name (and attempt number)."""
+        self.connection_reused: bool | None = None
+        """Whether the request was sent on a connection which was already open,
+        or None if that isn't known yet."""
+        self.prewarmed_age: float | None = None
+        """If the request was sent on a connection opened in advance (see the
+        `preconnect` setting), how many seconds before it was opened."""
+        self.cache_status: CacheStatus | None = None
+        """How the response was served by the HTTP cache, if it's enabled."""
+
+    def render(self) -> RenderableType:
+        if not self.phases:
+            if self.cache_status == "hit":
+                return Text("Served from the HTTP cache. No request was sent.")
+            return Text("Send a request to view the trace.")
+
+        summary = Text()
+        if self.prewarmed_age is not None:
+            # The connect phases only show the time taken to hand the connection
+            # over, so make it clear that it was really opened earlier.
+            summary.append("Pre-warmed connection", style="b")
+            summary.append(
+                f" (opened {self.prewarmed_age:.2f}s before sending)", style="dim"
+            )
+        elif self.connection_reused is not None:
+            summary.append(
+                "Reused connection" if self.connection_reused else "New connection",
+                style="b",
+            )
+        if self.cache_status == "revalidated":
+            summary.append("  Revalidated cached response", style="dim")
+
+        first_started = min(phase.started for phase in self.phases.values())
+        last_event = max(
+            phase.ended or phase.started for phase in self.phases.values()
+        )
+        span = max(last_event - first_started, 1)
+        label_width = max(len(phase.label) for phase in self.phases.values())
+        bar_width = max(self.size.width - label_width - 12, 10)
+
+        table = Table.grid(padding=(0, 1))
+        table.add_column(style="b", no_wrap=True)
+        table.add_column(justify="right", no_wrap=True)
+        table.add_column(no_wrap=True)
+        for phase in self.phases.values():
+            ended = last_event if phase.ended is None else phase.ended
+            if phase.failed:
+                duration = Text("failed", style="red")
+                style = "red"
+            elif phase.ended is None:
+                duration = Text("waiting", style="yellow")
+                style = "yellow"
+            else:
+                duration = Text(f"{(ended - phase.started) / 1_000_000:.2f}ms")
+                style = "green"
+
+            offset = (phase.started - first_started) * bar_width // span
+            length = max((ended - phase.started) * bar_width // span, 1)
+            bar = Text.assemble(" " * offset, ("━" * length, style))
+            if phase.note:
+                bar.append(f" {phase.note}", style="dim")
+            table.add_row(phase.label, duration, bar)
+
+        return Group(summary, table) if summary else table
+
+
 class ResponseTrace(VerticalScroll):
     DEFAULT_CSS = """\
         ResponseTrace {
@@ -45,39 +210,149 @@ class ResponseTrace(VerticalScroll):
         disabled: bool = False,
     ) -> None:
         super().__init__(name=name, id=id, classes=classes, disabled=disabled)
-        self.events: dict[str, dict[str, float]] = {}
+        self.attempt = 1
+        """The attempt which events are currently being received for. If the
+        request is retried, events are labelled with the attempt they're from."""
+        self._complete = False
 
     def compose(self) -> ComposeResult:
         self.can_focus = False
-        if len(self.events) == 0:
-            yield Label("Send a request to view the trace.")
-        else:
-            for event_name, status_times in self.events.items():
-                if "completed" in status_times:
-                    duration_ns = status_times["completed"] - status_times["started"]
-                    duration_ms = duration_ns / 1000000
-                    yield Label(
-                        f"[b]{event_name}[/b]: [green]{duration_ms:.2f}ms[/green]"
-                    )
-                elif "failed" in status_times:
-                    yield Label(f"[b]{event_name}[/b]: [red]failed[/red]")
-                else:
-                    yield Label(f"[b]{event_name}[/b]: [yellow]waiting[/yellow]")
-
-    async def log_event(self, event_name: Event, info: dict[str, Any]) -> None:
-        event_name, status = event_name.rsplit(".", maxsplit=1)
-        events = self.events
+        yield TraceWaterfall()
+
+    async def log_event(
+        self, event_name: Event, info: dict[str, Any], timestamp: int | None = None
+    ) -> None:
+        """Record an event in the trace.
+
+        Args:
+            event_name: The name of the trace event.
+            info: The information httpcore (or Posting) sent with the event.
+            timestamp: When the event happened (from `time.perf_counter_ns`), if
+                it's being replayed, or None if it has just happened.
+        """
+        waterfall = self.waterfall
+        if self._complete:
+            # The first event of a new request replaces the previous trace.
+            self.clear()
+
+        if event_name == "connection.prewarmed":
+            waterfall.prewarmed_age = info["age"]
+            waterfall.refresh()
+            return
+
+        phase_name, status = event_name.rsplit(".", maxsplit=1)
+        label = PHASE_LABELS.get(phase_name, phase_name)
+        key = phase_name
+        if phase_name.startswith("retry."):
+            attempt = info["attempt"]
+            if phase_name == "retry.attempt" and status == "started":
+                self.attempt = attempt
+                waterfall.connection_reused = None
+                waterfall.prewarmed_age = None
+            key = f"{phase_name} #{attempt}"
+            label = f"{label} #{attempt}"
+        elif self.attempt > 1:
+            key = f"{phase_name} #{self.attempt}"
+            label = f"{label} #{self.attempt}"
+
+        phases = waterfall.phases
+        now = time.perf_counter_ns() if timestamp is None else timestamp
+        added = False
         match status:
             case "started":
-                events[event_name] = {"started": time.perf_counter_ns()}
-            case "complete":
-                events[event_name]["completed"] = time.perf_counter_ns()
-            case "failed":
-                events[event_name]["failed"] = time.perf_counter_ns()
+                added = key not in phases
+                phases[key] = TracePhase(label, started=now)
+                if phase_name == "dns.resolve":
+                    self._move_before_connect(key)
+                if phase_name in _CONNECT_PHASES:
+                    waterfall.connection_reused = False
+                elif (
+                    phase_name in _REQUEST_START_PHASES
+                    and waterfall.connection_reused is None
+                ):
+                    waterfall.connection_reused = True
+            case "complete" if key in phases:
+                phases[key].ended = now
+            case "failed" if key in phases:
+                phases[key].ended = now
+                phases[key].failed = True
             case _:
                 pass
 
-        await self.recompose()
+        if key in phases:
+            phase = phases[key]
+            if "status_code" in info:
+                phase.note = str(info["status_code"])
+            elif "error" in info:
+                phase.note = type(info["error"]).__name__
+            elif "reason" in info:
+                phase.note = f"{info['reason']}, {info['delay']:.2f}s"
+            elif "delay" in info:
+                phase.note = f"{info['delay']:.2f}s"
+            elif addresses := info.get("addresses"):
+                phase.note = addresses[0]
+                if info["source"] != "lookup":
+                    phase.note += f" ({info['source']})"
+            elif phase_name == "connection.start_tls" and status == "complete":
+                ssl_object = info["return_value"].get_extra_info("ssl_object")
+                if ssl_object is not None and ssl_object.session_reused:
+                    phase.note = "session resumed"
+
+        # Only a new row changes the height of the chart.
+        waterfall.refresh(layout=added)
+
+    def _move_before_connect(self, key: str) -> None:
+        """Move a phase above the connect phase which is in progress.
+
+        Hostnames are resolved while connecting, so the lookup starts after the
+        connect phase, but it reads better as the row above it.
+        """
+        phases = self.waterfall.phases
+        connecting = [
+            other
+            for other, phase in phases.items()
+            if phase.ended is None and other.split(" #")[0] in _CONNECT_PHASES
+        ]
+        if not connecting:
+            return
+        phase = phases.pop(key)
+        reordered: dict[str, TracePhase] = {}
+        for other, other_phase in phases.items():
+            if other == connecting[-1]:
+                reordered[key] = phase
+            reordered[other] = other_phase
+        self.waterfall.phases = reordered
+
+    def clear(self) -> None:
+        """Remove the trace, ready for the events of another request."""
+        self._complete = False
+        self.attempt = 1
+        waterfall = self.waterfall
+        waterfall.phases = {}
+        waterfall.connection_reused = None
+        waterfall.prewarmed_age = None
+        waterfall.cache_status = None
+        waterfall.refresh(layout=True)
+
+    def trace_complete(self, cache_status: CacheStatus | None = None) -> None:
+        """Mark the current trace as complete.
+
+        It stays on screen until the first event of the next request arrives.
+
+        Args:
+            cache_status: How the response was served by the HTTP cache.
+        """
+        self._complete = True
+        self.attempt = 1
+        waterfall = self.waterfall
+        if cache_status == "hit":
+            # No request was sent, so there are no events to show.
+            waterfall.phases = {}
+            waterfall.connection_reused = None
+            waterfall.prewarmed_age = None
+        waterfall.cache_status = cache_status
+        waterfall.refresh(layout=True)
 
-    def trace_complete(self) -> None:
-        self.events = {}
+    @property
+    def waterfall(self) -> TraceWaterfall:
+        return self.query_one(TraceWaterfall)
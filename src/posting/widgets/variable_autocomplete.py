@@ -1,4 +1,4 @@
-from typing import Callable
+from typing import Callable, Iterable
 from textual.widgets import Input, TextArea
 from textual.widgets.text_area import Selection
 from textual_autocomplete import (
@@ -9,6 +9,7 @@ from textual_autocomplete import (
 )
 
 from posting.variables import (
+    VariableChanges,
     find_variable_end,
     find_variable_start,
     get_variable_at_cursor,
@@ -46,12 +47,33 @@ class VariableAutoComplete(AutoComplete):
             classes,
             disabled,
         )
+        self._environment_candidates = variable_candidates is None
+        """Whether the variable candidates are the variables in the environment."""
         if variable_candidates is None:
-            variable_candidates = [
-                DropdownItem(main=f"${variable}") for variable in get_variables()
-            ]
+            variable_candidates = self._build_variable_candidates(get_variables())
         self.variable_candidates = variable_candidates
 
+    def on_mount(self) -> None:
+        if self._environment_candidates:
+            self.app.variables_changed_signal.subscribe(
+                self, self.on_variables_changed
+            )
+
+    def on_variables_changed(self, changes: VariableChanges) -> None:
+        if not (changes.added or changes.removed):
+            return
+        candidates = self.variable_candidates
+        assert isinstance(candidates, list)
+        removed = {f"${variable}" for variable in changes.removed}
+        added = [name for name in changes.variables if name in changes.added]
+        self.variable_candidates = [
+            candidate for candidate in candidates if str(candidate.main) not in removed
+        ] + self._build_variable_candidates(added)
+
+    @staticmethod
+    def _build_variable_candidates(variables: Iterable[str]) -> list[DropdownItem]:
+        return [DropdownItem(main=f"${variable}") for variable in variables]
+
     def get_candidates(self, target_state: TargetState) -> list[DropdownItem]:
         cursor = target_state.selection.end[1]
         text = target_state.text
@@ -1,5 +1,6 @@
 from posting.help_screen import HelpData
 from posting.highlighters import VariableHighlighter
+from posting.variables import VariableChanges, find_variables
 from posting.widgets.input import PostingInput
 
 from posting.widgets.variable_autocomplete import VariableAutoComplete
@@ -24,3 +25,10 @@ Press `tab` to both insert *and* shift focus.
             target=self,
         )
         self.screen.mount(self.auto_complete)
+        self.app.variables_changed_signal.subscribe(self, self.on_variables_changed)
+
+    def on_variables_changed(self, changes: VariableChanges) -> None:
+        # Only the variables which became (un)defined are highlighted differently.
+        defined_changed = changes.added | changes.removed
+        if any(name in defined_changed for name, _, _ in find_variables(self.value)):
+            self.refresh()
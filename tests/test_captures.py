@@ -0,0 +1,95 @@
+import httpx
+import pytest
+
+from posting.captures import (
+    CaptureError,
+    capture_value,
+    capture_values,
+    compile_pattern,
+    parse_json_path,
+)
+from posting.collection import Capture
+
+
+def make_response(body: str, headers: dict[str, str] | None = None) -> httpx.Response:
+    return httpx.Response(200, headers=headers, text=body)
+
+
+def test_json_path_is_split_into_steps():
+    assert parse_json_path("$") == ()
+    assert parse_json_path(" $.items[0]['id'] ") == ("items", 0, "id")
+    assert parse_json_path('$["a.b"][-1].c') == ("a.b", -1, "c")
+
+
+@pytest.mark.parametrize("path", ["items[0]", "$.items[*]", "$..id", "$.a[b]"])
+def test_unsupported_json_path_is_rejected(path: str):
+    with pytest.raises(CaptureError):
+        parse_json_path(path)
+
+
+def test_json_values_are_captured():
+    response = make_response(
+        '{"data": {"token": "abc", "ids": [1, 2, 3], "user": {"admin": true}}}'
+    )
+
+    def capture(expression: str) -> str:
+        return capture_value(Capture(variable="v", expression=expression), response)
+
+    assert capture("$.data.token") == "abc"
+    assert capture("$.data.ids[-1]") == "3"
+    assert capture("$.data.user") == '{"admin": true}'
+    with pytest.raises(CaptureError, match="not found"):
+        capture("$.data.ids[3]")
+    with pytest.raises(CaptureError, match="not found"):
+        capture("$.data.token.length")
+
+
+def test_json_capture_from_invalid_json():
+    capture = Capture(variable="v", expression="$.token")
+    with pytest.raises(CaptureError, match="isn't valid JSON"):
+        capture_value(capture, make_response("<html>"))
+
+
+def test_header_values_are_captured():
+    response = make_response("", headers={"Location": "/users/7"})
+
+    assert (
+        capture_value(
+            Capture(variable="v", source="header", expression="location"), response
+        )
+        == "/users/7"
+    )
+    with pytest.raises(CaptureError, match="no 'ETag' header"):
+        capture_value(Capture(variable="v", source="header", expression="ETag"), response)
+
+
+def test_regex_captures_the_first_group_or_the_whole_match():
+    response = make_response("token=abc123; expires=never")
+
+    def capture(expression: str) -> str:
+        return capture_value(
+            Capture(variable="v", source="regex", expression=expression), response
+        )
+
+    assert capture(r"token=(\w+)") == "abc123"
+    assert capture(r"expires=\w+") == "expires=never"
+    with pytest.raises(CaptureError, match="didn't match"):
+        capture(r"session=(\w+)")
+    with pytest.raises(CaptureError, match="Invalid regular expression"):
+        capture(r"token=(")
+
+
+def test_regular_expressions_are_compiled_once():
+    assert compile_pattern(r"id=(\d+)") is compile_pattern(r"id=(\d+)")
+
+
+def test_failed_capture_names_the_variable():
+    captures = [
+        Capture(variable="id", expression="$.id"),
+        Capture(variable="token", expression="$.token"),
+    ]
+    response = make_response('{"id": 1}')
+
+    with pytest.raises(CaptureError, match="Couldn't capture 'token'"):
+        capture_values(captures, response)
+    assert capture_values(captures[:1], response) == {"id": "1"}
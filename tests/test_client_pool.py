@@ -0,0 +1,127 @@
+import asyncio
+
+import httpx
+
+from posting.client_pool import ClientKey, ClientPool
+from posting.collection import CollectionConfig, Options
+from posting.config import CertificateSettings
+
+
+def key_for(options: Options, **kwargs) -> ClientKey:
+    return ClientKey.from_options(options, CertificateSettings(), **kwargs)
+
+
+def test_equal_keys_share_a_client():
+    async def run() -> None:
+        pool = ClientPool()
+        try:
+            async with pool.client(key_for(Options())) as first:
+                pass
+            async with pool.client(key_for(Options())) as second:
+                pass
+            assert first is second
+            assert len(pool) == 1
+        finally:
+            await pool.aclose()
+
+    asyncio.run(run())
+
+
+def test_differing_keys_get_separate_clients():
+    keys = [
+        key_for(Options()),
+        key_for(Options(verify_ssl=False)),
+        key_for(Options(proxy_url="http://proxy.invalid:8080")),
+        key_for(Options(http2=True)),
+        key_for(Options(), auth_type="basic"),
+    ]
+    assert len(set(keys)) == len(keys)
+
+    async def run() -> None:
+        pool = ClientPool(max_clients=len(keys))
+        try:
+            clients = []
+            for key in keys:
+                async with pool.client(key) as client:
+                    clients.append(client)
+            assert len({id(client) for client in clients}) == len(keys)
+        finally:
+            await pool.aclose()
+
+    asyncio.run(run())
+
+
+def test_client_certificate_is_part_of_the_key():
+    with_cert = ClientKey.from_options(
+        Options(), CertificateSettings(certificate_path="client.pem")
+    )
+
+    assert with_cert.cert == ("client.pem",)
+    assert with_cert != key_for(Options())
+
+
+def test_timeouts_are_applied_per_request_rather_than_per_client():
+    fast = Options(timeout=1.0)
+    slow = Options(timeout=30.0, connect_timeout=5.0)
+
+    assert key_for(fast) == key_for(slow)
+    assert fast.to_httpx_timeout() != slow.to_httpx_timeout()
+    assert slow.to_httpx_timeout().connect == 5.0
+
+
+def test_collection_config_can_enable_http2():
+    key = key_for(Options(), collection_config=CollectionConfig(http2=True))
+
+    assert key.http2
+    assert key == key_for(Options(http2=True))
+
+
+def test_least_recently_used_idle_client_is_closed():
+    async def run() -> None:
+        pool = ClientPool(max_clients=1)
+        first_key = key_for(Options())
+        try:
+            async with pool.client(first_key) as first:
+                pass
+            async with pool.client(key_for(Options(http2=True))):
+                # The first client isn't in use, so it's closed.
+                assert first.is_closed
+                assert first_key not in pool
+        finally:
+            await pool.aclose()
+
+    asyncio.run(run())
+
+
+def test_clients_in_use_are_not_evicted():
+    async def run() -> None:
+        pool = ClientPool(idle_timeout=0, max_clients=1)
+        try:
+            async with pool.client(key_for(Options())) as first:
+                async with pool.client(key_for(Options(http2=True))):
+                    assert not first.is_closed
+                    assert len(pool) == 2
+            # Once it's idle for longer than the timeout, it's closed.
+            await pool.evict_idle()
+            assert first.is_closed
+            assert len(pool) == 0
+        finally:
+            await pool.aclose()
+
+    asyncio.run(run())
+
+
+def test_aclose_closes_every_client():
+    async def run() -> None:
+        pool = ClientPool()
+        clients: list[httpx.AsyncClient] = []
+        for options in (Options(), Options(http2=True), Options(verify_ssl=False)):
+            async with pool.client(key_for(options)) as client:
+                clients.append(client)
+
+        await pool.aclose()
+
+        assert len(pool) == 0
+        assert all(client.is_closed for client in clients)
+
+    asyncio.run(run())
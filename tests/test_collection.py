@@ -0,0 +1,125 @@
+from pathlib import Path
+
+import pytest
+
+import posting.collection
+from posting.collection import COLLECTION_CONFIG_FILE, Collection, CollectionConfig
+
+
+def write_request(path: Path, name: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"name: {name}\nurl: https://example.com/{name}\n")
+
+
+def make_collection(root: Path) -> None:
+    write_request(root / "top.posting.yaml", "top")
+    write_request(root / "users" / "get.posting.yaml", "get user")
+    write_request(root / "users" / "admin" / "list.posting.yaml", "list admins")
+    write_request(root / "posts" / "get.posting.yaml", "get post")
+
+
+def names(collection: Collection) -> list[str]:
+    return [request.name for request in collection.requests]
+
+
+def test_small_collection_is_loaded_in_full(tmp_path: Path):
+    make_collection(tmp_path)
+
+    collection = Collection.from_directory(
+        str(tmp_path), use_cache=False, lazy_threshold=10
+    )
+
+    assert collection.loaded
+    assert [child.name for child in collection.children] == ["posts", "users"]
+    users = collection.children[1]
+    assert users.loaded
+    assert names(users) == ["get user"]
+    assert names(users.children[0]) == ["list admins"]
+
+
+def test_large_collection_reads_only_the_top_level(tmp_path: Path):
+    make_collection(tmp_path)
+
+    collection = Collection.from_directory(
+        str(tmp_path), use_cache=False, lazy_threshold=1
+    )
+
+    assert names(collection) == ["top"]
+    posts, users = collection.children
+    assert not users.loaded
+    assert users.requests == [] and users.children == []
+
+    users.load_requests()
+
+    assert users.loaded
+    assert names(users) == ["get user"]
+    admin = users.children[0]
+    assert admin.name == "admin" and not admin.loaded
+    assert not posts.loaded
+
+
+def test_load_all_reads_every_folder(tmp_path: Path):
+    make_collection(tmp_path)
+    (tmp_path / ".hidden").mkdir()
+    write_request(tmp_path / ".hidden" / "secret.posting.yaml", "secret")
+
+    collection = Collection.from_directory(
+        str(tmp_path), use_cache=False, lazy_threshold=1
+    )
+
+    assert sorted(request.name for request in collection.iter_requests()) == [
+        "get post",
+        "get user",
+        "list admins",
+        "top",
+    ]
+    assert [child.name for child in collection.children] == ["posts", "users"]
+
+
+def test_config_is_found_above_a_request_file(tmp_path: Path):
+    make_collection(tmp_path)
+    (tmp_path / COLLECTION_CONFIG_FILE).write_text(
+        "http2: true\nresolve:\n  api.example.com: 127.0.0.1\n"
+    )
+
+    config = CollectionConfig.for_request_file(
+        tmp_path / "users" / "admin" / "list.posting.yaml"
+    )
+
+    assert config.http2
+    assert config.resolve == {"api.example.com": "127.0.0.1"}
+
+
+def test_process_pool_is_only_used_for_the_initial_load(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    pools: list[object] = []
+
+    class RecordingPool:
+        def __init__(self, *args, **kwargs) -> None:
+            pools.append(self)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info) -> None:
+            pass
+
+        def map(self, function, items, chunksize=1):
+            return map(function, items)
+
+    monkeypatch.setattr(posting.collection, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(posting.collection, "_PROCESS_POOL_THRESHOLD", 1)
+    monkeypatch.setattr(posting.collection.os, "cpu_count", lambda: 4)
+    make_collection(tmp_path)
+
+    Collection.from_directory(str(tmp_path), use_cache=False)
+    assert len(pools) == 1
+
+    # Loading lazily happens while the app is running, so no processes are started.
+    collection = Collection.from_directory(
+        str(tmp_path), use_cache=False, lazy_threshold=1
+    )
+    collection.load_all()
+    assert len(pools) == 1
+    assert len(list(collection.iter_requests())) == 4
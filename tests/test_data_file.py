@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+
+from posting.data_file import DataFileError, iter_rows
+
+
+def test_csv_rows_are_keyed_by_the_header(tmp_path: Path):
+    path = tmp_path / "users.csv"
+    path.write_text("id,name\n1,alice\n2\n3,carol,extra,values\n")
+
+    assert list(iter_rows(path)) == [
+        {"id": "1", "name": "alice"},
+        # Missing values are empty, and values beyond the header are ignored.
+        {"id": "2", "name": ""},
+        {"id": "3", "name": "carol"},
+    ]
+
+
+def test_empty_csv_has_no_rows(tmp_path: Path):
+    path = tmp_path / "empty.csv"
+    path.write_text("")
+
+    assert list(iter_rows(path)) == []
+
+
+def test_jsonl_rows_skip_blank_lines(tmp_path: Path):
+    path = tmp_path / "users.jsonl"
+    path.write_text('{"id": 1, "tags": ["a"]}\n\n   \n{"id": 2, "name": null}\n')
+
+    assert list(iter_rows(path)) == [
+        {"id": "1", "tags": '["a"]'},
+        {"id": "2", "name": ""},
+    ]
+
+
+def test_jsonl_row_must_be_an_object(tmp_path: Path):
+    path = tmp_path / "users.ndjson"
+    path.write_text('{"id": 1}\n[1, 2]\n')
+
+    rows = iter_rows(path)
+    assert next(rows) == {"id": "1"}
+    with pytest.raises(DataFileError, match="Line 2 isn't a JSON object"):
+        next(rows)
+
+
+def test_invalid_json_is_reported_with_its_line(tmp_path: Path):
+    path = tmp_path / "users.jsonl"
+    path.write_text('{"id": 1}\n{"id": \n')
+
+    with pytest.raises(DataFileError, match="Invalid JSON on line 2"):
+        list(iter_rows(path))
+
+
+def test_invalid_utf8_is_reported(tmp_path: Path):
+    path = tmp_path / "users.csv"
+    path.write_bytes(b"id,name\n1,\xff\xfe\n")
+
+    with pytest.raises(DataFileError, match="isn't valid UTF-8"):
+        list(iter_rows(path))
+
+
+def test_missing_file_is_reported(tmp_path: Path):
+    with pytest.raises(DataFileError):
+        list(iter_rows(tmp_path / "missing.csv"))
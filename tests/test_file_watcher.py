@@ -0,0 +1,53 @@
+import os
+from pathlib import Path
+
+from posting.file_watcher import FileSetWatcher, FileWatcher
+
+
+def touch(path: Path, text: str) -> None:
+    path.write_text(text)
+    # Make sure the change is seen even if the mtime resolution is coarse.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_directory_watcher_reports_matching_files(tmp_path: Path):
+    (tmp_path / "nested").mkdir()
+    kept = tmp_path / "kept.posting.yaml"
+    changed = tmp_path / "nested" / "changed.posting.yaml"
+    deleted = tmp_path / "deleted.posting.yaml"
+    for path in (kept, changed, deleted):
+        path.write_text("name: x\n")
+    watcher = FileWatcher(tmp_path, "*.posting.yaml")
+
+    assert not watcher.check()
+
+    touch(changed, "name: y\n")
+    deleted.unlink()
+    added = tmp_path / "nested" / "added.posting.yaml"
+    added.write_text("name: z\n")
+    (tmp_path / "ignored.txt").write_text("")
+
+    changes = watcher.check()
+    assert changes.added == {added}
+    assert changes.modified == {changed}
+    assert changes.deleted == {deleted}
+    assert not watcher.check()
+
+
+def test_file_set_watcher_reports_files_created_later(tmp_path: Path):
+    existing = tmp_path / "shared.env"
+    missing = tmp_path / "dev.env"
+    existing.write_text("A=1\n")
+    watcher = FileSetWatcher([existing, missing])
+
+    assert not watcher.check()
+
+    missing.write_text("B=2\n")
+    touch(existing, "A=2\n")
+    (tmp_path / "other.env").write_text("C=3\n")
+
+    changes = watcher.check()
+    assert changes.added == {missing}
+    assert changes.modified == {existing}
+    assert changes.deleted == set()
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import httpx
+
+from posting.http_cache import HttpCache
+
+
+def make_response(request: httpx.Request, body: bytes = b"hello") -> httpx.Response:
+    return httpx.Response(
+        200,
+        headers={"Cache-Control": "max-age=60"},
+        content=body,
+        request=request,
+    )
+
+
+def test_stored_response_is_served(tmp_path: Path):
+    cache = HttpCache(tmp_path, max_size=1024)
+    request = httpx.Request("GET", "https://example.com/thing")
+    cache.store(request, make_response(request))
+
+    entry = cache.lookup(request)
+    assert entry is not None and entry.is_fresh(request)
+    response = cache.to_response(request, entry)
+    assert response is not None
+    assert response.content == b"hello"
+    # Only the entry's files are left behind, not the temporary files.
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".body", ".json"]
+
+
+def test_responses_are_not_shared_between_credentials(tmp_path: Path):
+    cache = HttpCache(tmp_path, max_size=1024)
+    request = httpx.Request("GET", "https://example.com/me")
+    cache.store(request, make_response(request, b"alice"), credentials="alice")
+
+    assert cache.lookup(request, credentials="alice") is not None
+    assert cache.lookup(request, credentials="bob") is None
+    assert cache.lookup(request) is None
+
+    bearer_request = httpx.Request(
+        "GET", "https://example.com/me", headers={"Authorization": "Bearer x"}
+    )
+    assert cache.lookup(bearer_request, credentials="alice") is None
+
+
+def test_responses_are_not_shared_between_cookie_sessions(tmp_path: Path):
+    cache = HttpCache(tmp_path, max_size=1024)
+
+    def request_with_session(session: str) -> httpx.Request:
+        return httpx.Request(
+            "GET", "https://example.com/me", headers={"Cookie": f"session={session}"}
+        )
+
+    alice = request_with_session("alice")
+    cache.store(alice, make_response(alice, b"alice"))
+
+    assert cache.lookup(request_with_session("alice")) is not None
+    assert cache.lookup(request_with_session("bob")) is None
+    assert cache.lookup(httpx.Request("GET", "https://example.com/me")) is None
+
+
+def test_response_is_only_used_for_matching_vary_headers(tmp_path: Path):
+    cache = HttpCache(tmp_path, max_size=1024)
+    english = httpx.Request(
+        "GET", "https://example.com/page", headers={"Accept-Language": "en"}
+    )
+    response = make_response(english, b"hello")
+    response.headers["Vary"] = "Accept-Language"
+    cache.store(english, response)
+
+    assert cache.lookup(english) is not None
+    french = httpx.Request(
+        "GET", "https://example.com/page", headers={"Accept-Language": "fr"}
+    )
+    assert cache.lookup(french) is None
+
+
+def test_entry_with_unreadable_body_is_removed(tmp_path: Path):
+    cache = HttpCache(tmp_path, max_size=1024)
+    request = httpx.Request("GET", "https://example.com/thing")
+    cache.store(request, make_response(request))
+    entry = cache.lookup(request)
+    assert entry is not None
+
+    for body_path in tmp_path.glob("*.body"):
+        body_path.unlink()
+
+    assert cache.to_response(request, entry) is None
+    assert cache.lookup(request) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path):
+    cache = HttpCache(tmp_path, max_size=8)
+    first = httpx.Request("GET", "https://example.com/first")
+    second = httpx.Request("GET", "https://example.com/second")
+    cache.store(first, make_response(first, b"12345"))
+    cache.store(second, make_response(second, b"67890"))
+
+    assert cache.lookup(first) is None
+    assert cache.lookup(second) is not None
+    assert cache.size() == 5
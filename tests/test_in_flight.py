@@ -0,0 +1,80 @@
+import asyncio
+from pathlib import Path
+
+from posting.app import Posting
+from posting.collection import Collection, Options
+from posting.config import Settings
+from posting.widgets.response.in_flight import InFlightRequests
+
+
+def test_each_request_keeps_its_own_trace(tmp_path: Path):
+    async def run() -> None:
+        release = asyncio.Event()
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            request = await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n")
+            await writer.drain()
+            if request.startswith(b"GET /slow"):
+                # Hold the body back, so the request stays in flight.
+                await release.wait()
+            writer.write(b"ok")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        collection = Collection.from_directory(str(tmp_path), use_cache=False)
+        app = Posting(Settings(), (), collection)
+        async with app.run_test() as pilot:
+            screen = app.screen
+            requests = screen.query_one(InFlightRequests)
+            waterfall = screen.response_trace.waterfall
+            # The slow request mustn't time out while it's held back.
+            screen.request_options.load_options(Options(timeout=60.0))
+
+            def phase_ended(name: str) -> bool | None:
+                phase = waterfall.phases.get(name)
+                return None if phase is None else phase.ended is not None
+
+            async def send(path: str, until_event: str) -> None:
+                """Send a request, and wait until it has emitted the trace event."""
+                screen.url_input.value = f"http://127.0.0.1:{port}{path}"
+                screen.send_via_worker()
+                request_id = requests.displayed_id
+                assert request_id is not None
+                async with asyncio.timeout(10):
+                    while not any(
+                        event == until_event
+                        for event, *_ in requests.requests[request_id].trace
+                    ):
+                        await pilot.pause(0.05)
+                await pilot.pause()
+
+            await send("/slow", "http11.receive_response_body.started")
+            await send("/fast", "http11.response_closed.complete")
+            assert requests.displayed_id == 2
+            assert phase_ended("http11.receive_response_body") is True
+
+            # The events of the slow request were recorded while the fast
+            # request was displayed, and are shown once it's selected.
+            requests.focus()
+            requests.highlighted = 0
+            await pilot.press("enter")
+            await pilot.pause()
+            assert requests.displayed_id == 1
+            assert phase_ended("http11.receive_response_headers") is True
+            assert phase_ended("http11.receive_response_body") is False
+            assert "http11.receive_response_body.started" in (
+                screen.url_bar._trace_events
+            )
+
+            # Events which arrive while it's displayed are shown as they arrive.
+            release.set()
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            assert phase_ended("http11.receive_response_body") is True
+
+        server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,131 @@
+import asyncio
+
+import httpx
+import pytest
+
+from posting.collection import RateLimit
+from posting.rate_limit import MIN_RATE_FRACTION, RateLimiter, TokenBucket
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_is_sent_immediately_then_requests_wait():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+
+    waits = [bucket.reserve() for _ in range(5)]
+
+    assert waits == [0.0, 0.0, 0.0, 0.5, 1.0]
+
+
+def test_tokens_refill_at_the_rate_up_to_the_burst():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+
+    clock.now += 0.5
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+    # A long quiet period only refills the bucket up to the burst.
+    clock.now += 100
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, pytest.approx(0.5)]
+
+
+def test_each_host_has_its_own_bucket():
+    limiter = RateLimiter(
+        {"api.example.com": RateLimit(rate=1), "*": RateLimit(rate=5, burst=2)},
+        clock=Clock(),
+    )
+
+    api = limiter.bucket_for("api.example.com")
+    other = limiter.bucket_for("other.example.com")
+    another = limiter.bucket_for("another.example.com")
+
+    assert api is not None and api.rate == 1
+    assert other is not None and other.rate == 5 and other.burst == 2
+    assert another is not None and another is not other
+    assert limiter.bucket_for("api.example.com") is api
+    assert RateLimiter().bucket_for("api.example.com") is None
+
+
+def test_throttle_halves_the_rate_down_to_a_minimum():
+    clock = Clock()
+    bucket = TokenBucket(rate=16, burst=4, clock=clock)
+
+    bucket.throttle()
+    assert bucket.current_rate == 8
+    # The tokens saved up are discarded, so held back requests don't burst.
+    assert bucket.reserve() == pytest.approx(1 / 8)
+
+    for _ in range(10):
+        bucket.throttle()
+    assert bucket.current_rate == 16 * MIN_RATE_FRACTION
+
+
+def test_throttle_pauses_for_retry_after():
+    clock = Clock()
+    bucket = TokenBucket(rate=1, burst=1, clock=clock)
+
+    bucket.throttle(retry_after=3)
+
+    assert bucket.reserve() == pytest.approx(3 + 2)
+    # No tokens are added during the pause.
+    clock.now += 3
+    assert bucket.reserve() == pytest.approx(2 + 2)
+
+
+def test_recover_restores_the_rate_gradually():
+    clock = Clock()
+    bucket = TokenBucket(rate=10, clock=clock)
+    bucket.throttle()
+    assert bucket.current_rate == 5
+
+    rates = []
+    for _ in range(7):
+        bucket.recover()
+        rates.append(bucket.current_rate)
+
+    assert rates == pytest.approx([6, 7, 8, 9, 10, 10, 10])
+
+
+def test_limiter_slows_down_after_429():
+    clock = Clock()
+    sleeps: list[float] = []
+
+    async def sleep(delay: float) -> None:
+        sleeps.append(delay)
+        clock.now += delay
+
+    limiter = RateLimiter(
+        {"*": RateLimit(rate=4, burst=2)}, clock=clock, sleep=sleep
+    )
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(200),
+            httpx.Response(200),
+        ]
+    )
+
+    async def send() -> httpx.Response:
+        return next(responses)
+
+    async def run() -> list[int]:
+        return [
+            (await limiter.send("api.example.com", send)).status_code
+            for _ in range(3)
+        ]
+
+    assert asyncio.run(run()) == [429, 200, 200]
+    bucket = limiter.bucket_for("api.example.com")
+    assert bucket is not None
+    # The second request waited out the Retry-After, plus a token at half the rate.
+    assert sleeps[0] == pytest.approx(2 + 0.5)
+    assert bucket.current_rate == pytest.approx(2 + 0.4 * 2)
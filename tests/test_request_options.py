@@ -0,0 +1,80 @@
+import asyncio
+from pathlib import Path
+
+from posting.app import Posting
+from posting.collection import (
+    Collection,
+    Options,
+    RequestModel,
+    RetryPolicy,
+    load_request_from_yaml,
+)
+from posting.config import Settings
+from posting.widgets.request.request_options import RequestOptions
+
+
+def load_and_export(
+    options: Options, collection_path: Path, retry_attempts: str | None = None
+) -> Options:
+    """Load the options into the widget, and export them again once the widget
+    has handled the resulting change events.
+
+    If `retry_attempts` is supplied, it's entered into its input after loading.
+    """
+
+    async def run() -> Options:
+        collection = Collection.from_directory(str(collection_path), use_cache=False)
+        app = Posting(Settings(), (), collection)
+        async with app.run_test() as pilot:
+            widget = app.query_one(RequestOptions)
+            widget.load_options(options)
+            await pilot.pause()
+            if retry_attempts is not None:
+                widget.retry_attempts_input.value = retry_attempts
+                await pilot.pause()
+            return widget.to_model()
+
+    return asyncio.run(run())
+
+
+def test_every_option_survives_loading_and_saving(tmp_path: Path):
+    options = Options(
+        follow_redirects=False,
+        verify_ssl=False,
+        attach_cookies=False,
+        proxy_url="http://proxy.invalid:8080",
+        timeout=12.5,
+        connect_timeout=2.0,
+        total_timeout=60.0,
+        download_path="out.bin",
+        overwrite_download=True,
+        http2=True,
+        retry=RetryPolicy(
+            max_attempts=4,
+            backoff_base=0.25,
+            backoff_max=8.0,
+            jitter=False,
+            retry_statuses=[503],
+            retry_exceptions=["TransportError"],
+            respect_retry_after=False,
+        ),
+    )
+
+    exported = load_and_export(options, tmp_path)
+
+    assert exported == options
+    path = tmp_path / "request.posting.yaml"
+    RequestModel(name="r", url="https://example.com", options=exported).save_to_disk(
+        path
+    )
+    assert load_request_from_yaml(str(path)).options.retry == options.retry
+
+
+def test_editing_an_option_keeps_the_options_without_widgets(tmp_path: Path):
+    options = Options(
+        retry=RetryPolicy(jitter=False, retry_exceptions=["TransportError"])
+    )
+
+    exported = load_and_export(options, tmp_path, retry_attempts="3")
+
+    assert exported.retry == options.retry.model_copy(update={"max_attempts": 3})
@@ -0,0 +1,164 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Iterator
+
+import httpx
+import pytest
+
+from posting.collection import RetryPolicy
+from posting.retry import backoff_delay, parse_retry_after, send_with_retries
+
+
+def test_backoff_grows_exponentially_up_to_the_cap():
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=3.0, jitter=False)
+
+    delays = [backoff_delay(policy, retry_number) for retry_number in range(1, 6)]
+
+    assert delays == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_jitter_picks_a_delay_up_to_the_backoff():
+    policy = RetryPolicy(backoff_base=1.0, backoff_max=30.0, jitter=True)
+
+    delays = [backoff_delay(policy, 3) for _ in range(200)]
+
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_retry_after_replaces_the_backoff_up_to_the_cap():
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=10.0, jitter=False)
+
+    def delay_for(retry_after: str) -> float:
+        response = httpx.Response(503, headers={"Retry-After": retry_after})
+        return backoff_delay(policy, 1, response)
+
+    assert delay_for("4") == 4.0
+    assert delay_for("120") == 10.0
+    assert delay_for("soon") == 0.5
+    assert (
+        backoff_delay(
+            policy.model_copy(update={"respect_retry_after": False}),
+            1,
+            httpx.Response(503, headers={"Retry-After": "4"}),
+        )
+        == 0.5
+    )
+
+
+def test_retry_after_in_seconds():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(" 0 ") == 0.0
+
+
+def test_retry_after_as_an_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    delay = parse_retry_after(format_datetime(retry_at, usegmt=True))
+
+    assert delay is not None and 28 <= delay <= 30
+    # Dates in the past mean the request can be retried immediately.
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "-5", "1.5", "Someday, 99"])
+def test_invalid_retry_after_is_ignored(value: str | None):
+    assert parse_retry_after(value) is None
+
+
+class Server:
+    """A mock server which gives each of the responses in turn. An exception is
+    raised instead of responding if the item is an exception."""
+
+    def __init__(self, *responses: httpx.Response | Exception) -> None:
+        self._responses: Iterator[httpx.Response | Exception] = iter(responses)
+        self.requests = 0
+        self.sleeps: list[float] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        response = next(self._responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+
+    def send(self, policy: RetryPolicy) -> httpx.Response:
+        async def run() -> httpx.Response:
+            transport = httpx.MockTransport(self.handle)
+            async with httpx.AsyncClient(transport=transport) as client:
+                request = client.build_request("GET", "https://example.com/")
+                return await send_with_retries(
+                    lambda: client.send(request, stream=True),
+                    policy,
+                    sleep=self.sleep,
+                )
+
+        return asyncio.run(run())
+
+
+POLICY = RetryPolicy(max_attempts=3, backoff_base=1.0, jitter=False)
+
+
+def test_retryable_status_is_retried():
+    server = Server(httpx.Response(503), httpx.Response(502), httpx.Response(200))
+
+    response = server.send(POLICY)
+
+    assert response.status_code == 200
+    assert server.requests == 3
+    assert server.sleeps == [1.0, 2.0]
+
+
+def test_retryable_exception_is_retried():
+    server = Server(httpx.ConnectError("Connection refused"), httpx.Response(200))
+
+    assert server.send(POLICY).status_code == 200
+    assert server.sleeps == [1.0]
+
+
+def test_other_exceptions_are_raised_immediately():
+    server = Server(httpx.ReadTimeout("Timed out"), httpx.Response(200))
+
+    with pytest.raises(httpx.ReadTimeout):
+        server.send(POLICY)
+    assert server.requests == 1
+
+
+def test_other_statuses_are_returned_immediately():
+    server = Server(httpx.Response(500), httpx.Response(200))
+
+    assert server.send(POLICY).status_code == 500
+    assert server.requests == 1
+
+
+def test_gives_up_after_max_attempts():
+    server = Server(*(httpx.Response(503) for _ in range(5)))
+
+    assert server.send(POLICY).status_code == 503
+    assert server.requests == 3
+
+    server = Server(*(httpx.ConnectError("Connection refused") for _ in range(5)))
+    with pytest.raises(httpx.ConnectError):
+        server.send(POLICY)
+    assert server.requests == 3
+    assert server.sleeps == [1.0, 2.0]
+
+
+def test_retry_after_is_honoured():
+    server = Server(
+        httpx.Response(429, headers={"Retry-After": "7"}), httpx.Response(200)
+    )
+
+    assert server.send(POLICY).status_code == 200
+    assert server.sleeps == [7.0]
+
+
+def test_retries_are_disabled_by_default():
+    server = Server(httpx.Response(503), httpx.Response(200))
+
+    assert server.send(RetryPolicy()).status_code == 503
+    assert server.sleeps == []
@@ -0,0 +1,183 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+import pytest
+
+from posting.client_pool import ClientPool
+from posting.collection import Capture, RequestModel
+from posting.config import CertificateSettings
+from posting.runner import (
+    DependencyCycleError,
+    RequestResult,
+    RequestRunner,
+    dependency_graph,
+)
+
+
+async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Respond to each request with its path as JSON, with the status code given
+    by a `/status/<code>` path."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    path = head.split(b" ")[1].decode()
+    status = int(path.split("/")[2]) if path.startswith("/status/") else 200
+    body = json.dumps({"path": path}).encode()
+    writer.write(
+        f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    writer.close()
+
+
+def run_against_server(
+    send: Callable[[RequestRunner, str], Awaitable[list[RequestResult]]],
+    variables: dict[str, Any] | None = None,
+) -> list[RequestResult]:
+    """Start a local server, and send requests to it with a new runner."""
+
+    async def run() -> list[RequestResult]:
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        pool = ClientPool()
+        runner = RequestRunner(pool, dict(variables or {}), CertificateSettings())
+        try:
+            return await send(runner, f"http://127.0.0.1:{port}")
+        finally:
+            await pool.aclose()
+            server.close()
+
+    return asyncio.run(run())
+
+
+async def collect(results: AsyncIterator[RequestResult]) -> list[RequestResult]:
+    return [result async for result in results]
+
+
+def test_requests_are_sent_once_per_row():
+    requests = [
+        RequestModel(name="user", url="${BASE_URL}/users/$id"),
+        RequestModel(name="posts", url="${BASE_URL}/users/$id/posts"),
+    ]
+    # The second row overrides the base URL with a port nothing listens on.
+    rows = [{"id": "1"}, {"id": "2", "BASE_URL": "http://127.0.0.1:1"}]
+
+    async def send(runner: RequestRunner, base_url: str) -> list[RequestResult]:
+        runner.variables["BASE_URL"] = base_url
+        return await collect(runner.run(requests, concurrency=2, rows=iter(rows)))
+
+    results = run_against_server(send)
+
+    by_row = sorted((result.row, result.request.name) for result in results)
+    assert by_row == [(1, "posts"), (1, "user"), (2, "posts"), (2, "user")]
+    assert all(result.ok == (result.row == 1) for result in results)
+    # The request models themselves aren't modified by rendering.
+    assert requests[0].url == "${BASE_URL}/users/$id"
+
+
+def test_rows_override_the_runner_variables():
+    requests = [RequestModel(name="user", url="${BASE_URL}/users/$id")]
+
+    async def send(runner: RequestRunner, base_url: str) -> list[RequestResult]:
+        runner.variables["BASE_URL"] = base_url
+        return await collect(runner.run(requests, rows=[{"id": "7"}, {}]))
+
+    results = run_against_server(send, variables={"id": "0"})
+
+    assert [(result.row, result.url.rsplit("/", 1)[1]) for result in results] == [
+        (1, "7"),
+        (2, "0"),
+    ]
+    assert all(result.ok for result in results)
+
+
+def capturing(name: str, url: str, variable: str) -> RequestModel:
+    """A request which captures the path it was sent to into the variable."""
+    return RequestModel(
+        name=name, url=url, captures=[Capture(variable=variable, expression="$.path")]
+    )
+
+
+def test_requests_depend_on_the_requests_capturing_their_variables():
+    requests = [
+        RequestModel(name="profile", url="$BASE_URL/me?token=$token"),
+        capturing("login", "$BASE_URL/login", "token"),
+        RequestModel(name="health", url="$BASE_URL/health"),
+        # Escaped dollars aren't references to the captured variable.
+        RequestModel(name="price", url="$BASE_URL/price/$$token"),
+    ]
+
+    assert dependency_graph(requests) == {0: {1}, 1: set(), 2: set(), 3: set()}
+
+
+def test_dependency_cycle_is_reported():
+    requests = [
+        capturing("first", "$BASE_URL/$second", "first"),
+        capturing("second", "$BASE_URL/$first", "second"),
+    ]
+
+    with pytest.raises(DependencyCycleError, match="first|second"):
+        dependency_graph(requests)
+
+
+def test_captured_values_are_used_by_later_requests():
+    requests = [
+        RequestModel(name="profile", url="${BASE_URL}/me${token}"),
+        capturing("login", "${BASE_URL}/login", "token"),
+    ]
+
+    async def send(runner: RequestRunner, base_url: str) -> list[RequestResult]:
+        runner.variables["BASE_URL"] = base_url
+        return await collect(runner.run_chain(requests, concurrency=2))
+
+    results = run_against_server(send)
+
+    assert [result.request.name for result in results] == ["login", "profile"]
+    assert results[0].captured == {"token": "/login"}
+    assert results[1].ok and results[1].url.endswith("/me/login")
+
+
+def test_dependents_of_a_failed_request_are_skipped():
+    requests = [
+        capturing("login", "${BASE_URL}/status/500", "token"),
+        RequestModel(name="profile", url="${BASE_URL}/me${token}"),
+        capturing("posts", "${BASE_URL}/posts${token}", "post"),
+        RequestModel(name="post", url="${BASE_URL}${post}"),
+        RequestModel(name="health", url="${BASE_URL}/health"),
+    ]
+
+    async def send(runner: RequestRunner, base_url: str) -> list[RequestResult]:
+        runner.variables["BASE_URL"] = base_url
+        return await collect(runner.run_chain(requests, concurrency=2))
+
+    results = {result.request.name: result for result in run_against_server(send)}
+
+    assert results["login"].status_code == 500
+    assert results["profile"].error == "Skipped, since 'login' failed"
+    assert results["posts"].error == "Skipped, since 'login' failed"
+    # Requests which depend on a skipped request are skipped too.
+    assert results["post"].error == "Skipped, since 'posts' failed"
+    assert results["post"].status_code is None
+    assert results["health"].ok
+
+
+def test_each_row_has_its_own_captured_values():
+    requests = [
+        capturing("login", "${BASE_URL}/login/$user", "token"),
+        RequestModel(name="profile", url="${BASE_URL}/me${token}"),
+    ]
+    rows = [{"user": "alice"}, {"user": "bob"}]
+
+    async def send(runner: RequestRunner, base_url: str) -> list[RequestResult]:
+        runner.variables["BASE_URL"] = base_url
+        return await collect(runner.run_chain(requests, concurrency=2, rows=rows))
+
+    results = run_against_server(send)
+
+    profiles = sorted(
+        (result.row, result.url.split("/me", 1)[1])
+        for result in results
+        if result.request.name == "profile"
+    )
+    assert profiles == [(1, "/login/alice"), (2, "/login/bob")]
+    assert all(result.ok for result in results)
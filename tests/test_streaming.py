@@ -0,0 +1,134 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+import pytest
+
+from posting.streaming import download_body, read_body
+
+T = TypeVar("T")
+
+CHUNKS = [b"0123456789"] * 5
+
+
+def with_streamed_response(
+    handle: Callable[[httpx.Response], Awaitable[T]],
+    headers: dict[str, str] | None = None,
+) -> T:
+    """Send a request to a mock server which responds with `CHUNKS`, one at a time,
+    and pass the streamed response to `handle`."""
+
+    async def body() -> AsyncIterator[bytes]:
+        for chunk in CHUNKS:
+            yield chunk
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers=headers, content=body())
+
+    async def run() -> T:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            request = client.build_request("GET", "https://example.com/large")
+            response = await client.send(request, stream=True)
+            try:
+                return await handle(response)
+            finally:
+                await response.aclose()
+
+    return asyncio.run(run())
+
+
+def test_small_body_is_read_in_full():
+    body = with_streamed_response(lambda response: read_body(response, 1000))
+
+    assert body.size == 50
+    assert not body.truncated
+    assert body.content == b"".join(CHUNKS)
+    assert body.overflow_path is None
+
+
+def test_large_body_is_truncated_and_spilled_to_a_file():
+    body = with_streamed_response(lambda response: read_body(response, 15))
+
+    assert body.size == 50
+    assert body.truncated
+    assert body.content == b"012345678901234"
+    assert body.overflow_path is not None
+    try:
+        assert body.overflow_path.read_bytes() == b"".join(CHUNKS)
+    finally:
+        body.overflow_path.unlink()
+
+
+def test_large_body_is_only_truncated_without_spilling():
+    body = with_streamed_response(
+        lambda response: read_body(response, 15, spill_to_file=False)
+    )
+
+    assert body.truncated
+    assert body.content == b"012345678901234"
+    assert body.overflow_path is None
+
+
+def test_progress_is_reported_as_the_body_arrives():
+    progress: list[tuple[int, int | None]] = []
+
+    with_streamed_response(
+        lambda response: read_body(
+            response,
+            1000,
+            on_progress=lambda done, total, rate: progress.append((done, total)),
+            progress_interval=0,
+        ),
+        headers={"Content-Length": "50"},
+    )
+
+    assert progress == [(10, 50), (20, 50), (30, 50), (40, 50), (50, 50)]
+
+
+def test_download_writes_the_body_to_the_file(tmp_path: Path):
+    path = tmp_path / "downloads" / "large.bin"
+
+    body = with_streamed_response(lambda response: download_body(response, path))
+
+    assert body.size == 50
+    assert body.download_path == path
+    assert path.read_bytes() == b"".join(CHUNKS)
+    # Only the downloaded file is left, not the temporary file it was written to.
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_download_doesnt_overwrite_an_existing_file(tmp_path: Path):
+    path = tmp_path / "large.bin"
+    path.write_bytes(b"existing")
+
+    with pytest.raises(FileExistsError):
+        with_streamed_response(lambda response: download_body(response, path))
+
+    assert path.read_bytes() == b"existing"
+    assert list(tmp_path.iterdir()) == [path]
+
+    with_streamed_response(
+        lambda response: download_body(response, path, overwrite=True)
+    )
+    assert path.read_bytes() == b"".join(CHUNKS)
+
+
+def test_failed_download_leaves_the_existing_file_alone(tmp_path: Path):
+    path = tmp_path / "large.bin"
+    path.write_bytes(b"existing")
+
+    async def fail_midway(response: httpx.Response) -> None:
+        def on_progress(done: int, total: int | None, rate: float) -> None:
+            if done >= 20:
+                raise RuntimeError("Connection lost")
+
+        await download_body(
+            response, path, overwrite=True, on_progress=on_progress, progress_interval=0
+        )
+
+    with pytest.raises(RuntimeError):
+        with_streamed_response(fail_midway)
+
+    assert path.read_bytes() == b"existing"
+    assert list(tmp_path.iterdir()) == [path]
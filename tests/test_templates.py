@@ -0,0 +1,65 @@
+import pytest
+
+from posting.collection import Header, RequestModel
+from posting.templates import compile_template, render_template
+from posting.variables import SubstitutionError
+
+
+def test_escaped_dollars_are_not_variables():
+    template = compile_template("x $$abc ${name} $foo $name")
+
+    assert template.variables == ("name", "foo")
+    assert template.render({"name": "n", "foo": 1}) == "x $abc n 1 n"
+
+
+def test_invalid_placeholder_is_reported_when_rendering():
+    template = compile_template("x $$abc ${a.b} $foo")
+
+    assert template.variables == ("foo",)
+    with pytest.raises(ValueError):
+        template.render({"foo": "bar", "a.b": "c"})
+
+
+def test_missing_variable_raises_key_error():
+    with pytest.raises(KeyError):
+        render_template("$$literal ${BASE_URL}/users", {})
+    assert render_template("$$literal", {}) == "$literal"
+
+
+def test_memo_is_reused_only_while_values_are_unchanged():
+    memo = {}
+    source = "${BASE_URL}/users/$id"
+
+    assert render_template(source, {"BASE_URL": "a", "id": 1}, memo) == "a/users/1"
+    assert memo[source] == (("a", 1), "a/users/1")
+    assert render_template(source, {"BASE_URL": "a", "id": 2}, memo) == "a/users/2"
+    # Without a memo, nothing is remembered on the shared compiled template.
+    assert render_template(source, {"BASE_URL": "b", "id": 3}) == "b/users/3"
+    assert memo[source] == (("a", 2), "a/users/2")
+
+
+def test_variable_index_uses_the_parsed_names():
+    request = RequestModel(
+        url="${BASE_URL}/price/$$USD",
+        headers=[Header(name="Authorization", value="Bearer $token $$token")],
+        description="No variables here",
+    )
+
+    assert request.variable_index() == {
+        "url": ("BASE_URL",),
+        "headers[0].value": ("token",),
+    }
+
+
+def test_render_substitutes_variables_into_a_copy():
+    request = RequestModel(url="${BASE_URL}/$$path/$id")
+
+    rendered = request.render({"BASE_URL": "https://example.com", "id": 1})
+    assert rendered.url == "https://example.com/$path/1"
+    assert request.url == "${BASE_URL}/$$path/$id"
+
+    rendered = request.render({"BASE_URL": "https://example.org", "id": 1})
+    assert rendered.url == "https://example.org/$path/1"
+
+    with pytest.raises(SubstitutionError):
+        request.render({"BASE_URL": "https://example.com"})
@@ -0,0 +1,36 @@
+import os
+import shutil
+from pathlib import Path
+
+import certifi
+
+from posting.tls import TLSSessions, create_ssl_context, tls_sessions
+
+
+def test_contexts_are_shared_until_the_ca_bundle_changes(tmp_path: Path):
+    ca_bundle = tmp_path / "ca.pem"
+    shutil.copy(certifi.where(), ca_bundle)
+
+    context = create_ssl_context(str(ca_bundle))
+    assert create_ssl_context(str(ca_bundle)) is context
+    assert tls_sessions(context) is not None
+
+    stat = ca_bundle.stat()
+    os.utime(ca_bundle, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    reloaded = create_ssl_context(str(ca_bundle))
+    assert reloaded is not context
+    assert create_ssl_context(str(ca_bundle)) is reloaded
+
+
+def test_least_recently_used_sessions_are_forgotten():
+    sessions = TLSSessions(max_hosts=2)
+    first, second, third = object(), object(), object()
+    sessions.save("a.example", first)  # type: ignore[arg-type]
+    sessions.save("b.example", second)  # type: ignore[arg-type]
+    assert sessions.get("a.example") is first
+    sessions.save("c.example", third)  # type: ignore[arg-type]
+
+    assert len(sessions) == 2
+    assert sessions.get("b.example") is None
+    assert sessions.get("a.example") is first
+    assert sessions.get("c.example") is third
@@ -0,0 +1,255 @@
+import asyncio
+import time
+
+import httpcore
+import httpx
+import pytest
+
+from posting.client_pool import ClientKey, ClientPool
+from posting.transport import (
+    ResolvingBackend,
+    Resolver,
+    interleave_address_families,
+)
+
+
+class SlowResolver(Resolver):
+    def __init__(self, addresses: list[str], delay: float = 0.05) -> None:
+        super().__init__()
+        self.addresses = addresses
+        self.delay = delay
+        self.lookups = 0
+
+    async def _lookup(self, host: str, port: int) -> list[str]:
+        self.lookups += 1
+        await asyncio.sleep(self.delay)
+        return self.addresses
+
+
+class FakeStream(httpcore.AsyncNetworkStream):
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.closed = False
+
+    async def read(self, max_bytes: int, timeout: float | None = None) -> bytes:
+        return b""
+
+    async def write(self, buffer: bytes, timeout: float | None = None) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class FakeBackend(httpcore.AsyncNetworkBackend):
+    """Connects to each address after a delay, or fails if the delay is None."""
+
+    def __init__(self, delays: dict[str, float | None]) -> None:
+        self.delays = delays
+        self.attempted: list[str] = []
+
+    async def connect_tcp(self, host, port, timeout=None, **kwargs):
+        self.attempted.append(host)
+        delay = self.delays[host]
+        if delay is None:
+            raise httpcore.ConnectError(f"Connection to {host} refused")
+        await asyncio.sleep(delay)
+        return FakeStream(host)
+
+
+def test_concurrent_lookups_share_a_query():
+    async def run() -> None:
+        resolver = SlowResolver(["192.0.2.1"])
+        results = await asyncio.gather(
+            resolver.resolve("example.com", 443),
+            resolver.resolve("example.com", 443),
+        )
+        assert results == [(["192.0.2.1"], "lookup")] * 2
+        assert resolver.lookups == 1
+        assert await resolver.resolve("example.com", 443) == (["192.0.2.1"], "cache")
+
+    asyncio.run(run())
+
+
+def test_cancelling_the_first_caller_doesnt_cancel_the_lookup():
+    async def run() -> None:
+        resolver = SlowResolver(["192.0.2.1"])
+        first = asyncio.create_task(resolver.resolve("example.com", 443))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(resolver.resolve("example.com", 443))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == (["192.0.2.1"], "lookup")
+        assert first.cancelled()
+        assert resolver.lookups == 1
+
+    asyncio.run(run())
+
+
+def test_lookup_errors_are_raised_to_every_caller():
+    class FailingResolver(Resolver):
+        async def _lookup(self, host: str, port: int) -> list[str]:
+            await asyncio.sleep(0.01)
+            raise OSError("Name or service not known")
+
+    async def run() -> None:
+        resolver = FailingResolver()
+        results = await asyncio.gather(
+            resolver.resolve("example.com", 443),
+            resolver.resolve("example.com", 443),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, OSError) for result in results)
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_lookups_are_forgotten():
+    async def run() -> None:
+        resolver = SlowResolver(["192.0.2.1"], delay=0)
+        resolver.max_size = 2
+        await resolver.resolve("a.example.com", 443)
+        await resolver.resolve("b.example.com", 443)
+        await resolver.resolve("a.example.com", 443)
+        await resolver.resolve("c.example.com", 443)
+
+        assert await resolver.resolve("a.example.com", 443) == (
+            ["192.0.2.1"],
+            "cache",
+        )
+        assert await resolver.resolve("b.example.com", 443) == (
+            ["192.0.2.1"],
+            "lookup",
+        )
+        assert resolver.lookups == 4
+
+    asyncio.run(run())
+
+
+def test_address_families_are_interleaved():
+    addresses = ["2001:db8::1", "2001:db8::2", "192.0.2.1", "192.0.2.2"]
+    assert interleave_address_families(addresses) == [
+        "2001:db8::1",
+        "192.0.2.1",
+        "2001:db8::2",
+        "192.0.2.2",
+    ]
+    assert interleave_address_families(["192.0.2.1", "2001:db8::1"]) == [
+        "192.0.2.1",
+        "2001:db8::1",
+    ]
+
+
+def test_slow_address_doesnt_delay_the_connection():
+    async def run() -> None:
+        backend = FakeBackend({"2001:db8::1": 10.0, "192.0.2.1": 0.0})
+        resolver = SlowResolver(["2001:db8::1", "192.0.2.1"], delay=0)
+        resolving_backend = ResolvingBackend(resolver, backend)
+
+        started = time.monotonic()
+        stream = await resolving_backend.connect_tcp("example.com", 443, timeout=5)
+
+        assert isinstance(stream, FakeStream)
+        assert stream.address == "192.0.2.1"
+        assert time.monotonic() - started < 1
+
+    asyncio.run(run())
+
+
+def test_failed_address_is_skipped_immediately():
+    async def run() -> None:
+        backend = FakeBackend({"192.0.2.1": None, "192.0.2.2": 0.0})
+        resolver = SlowResolver(["192.0.2.1", "192.0.2.2"], delay=0)
+        resolving_backend = ResolvingBackend(resolver, backend)
+
+        stream = await resolving_backend.connect_tcp("example.com", 443, timeout=5)
+
+        assert isinstance(stream, FakeStream)
+        assert stream.address == "192.0.2.2"
+        assert backend.attempted == ["192.0.2.1", "192.0.2.2"]
+
+    asyncio.run(run())
+
+
+def test_timeout_applies_to_all_attempts_together():
+    async def run() -> None:
+        backend = FakeBackend({"192.0.2.1": 10.0, "192.0.2.2": 10.0})
+        resolver = SlowResolver(["192.0.2.1", "192.0.2.2"], delay=0)
+        resolving_backend = ResolvingBackend(resolver, backend)
+
+        started = time.monotonic()
+        with pytest.raises(httpcore.ConnectTimeout):
+            await resolving_backend.connect_tcp("example.com", 443, timeout=0.5)
+        assert time.monotonic() - started < 2
+
+    asyncio.run(run())
+
+
+def test_every_address_failing_raises_connect_error():
+    async def run() -> None:
+        backend = FakeBackend({"192.0.2.1": None, "192.0.2.2": None})
+        resolver = SlowResolver(["192.0.2.1", "192.0.2.2"], delay=0)
+        resolving_backend = ResolvingBackend(resolver, backend)
+
+        with pytest.raises(httpcore.ConnectError):
+            await resolving_backend.connect_tcp("example.com", 443, timeout=5)
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("from_environment", [False, True])
+def test_proxy_connections_use_the_network_backend(
+    from_environment: bool, monkeypatch: pytest.MonkeyPatch
+):
+    async def run() -> None:
+        received: list[bytes] = []
+
+        async def proxy(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            received.append(await reader.readuntil(b"\r\n\r\n"))
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 7\r\n\r\nproxied")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(proxy, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        # The proxy's hostname only resolves through the resolver's overrides.
+        resolver = Resolver(overrides={"proxy.invalid": "127.0.0.1"})
+        pool = ClientPool(network_backend=ResolvingBackend(resolver))
+        proxy_url = f"http://proxy.invalid:{port}"
+        if from_environment:
+            monkeypatch.setenv("HTTP_PROXY", proxy_url)
+            monkeypatch.setenv("NO_PROXY", "excluded.invalid")
+        key = ClientKey(
+            verify=True,
+            cert=(),
+            proxy=None if from_environment else proxy_url,
+            auth_type=None,
+        )
+        try:
+            async with pool.client(key) as client:
+                response = await client.get("http://example.invalid/path")
+        finally:
+            await pool.aclose()
+            server.close()
+
+        assert response.text == "proxied"
+        assert received[0].startswith(b"GET http://example.invalid/path HTTP/1.1")
+
+    asyncio.run(run())
+
+
+def test_connection_errors_are_raised_as_httpx_errors():
+    async def run() -> None:
+        backend = FakeBackend({"192.0.2.1": None})
+        resolver = Resolver(overrides={"example.invalid": "192.0.2.1"})
+        pool = ClientPool(network_backend=ResolvingBackend(resolver, backend))
+        key = ClientKey(verify=True, cert=(), proxy=None, auth_type=None)
+        try:
+            async with pool.client(key) as client:
+                with pytest.raises(httpx.ConnectError):
+                    await client.get("http://example.invalid/")
+        finally:
+            await pool.aclose()
+
+    asyncio.run(run())
@@ -0,0 +1,95 @@
+import contextvars
+from pathlib import Path
+
+from posting.variables import (
+    Environments,
+    VariableChanges,
+    get_variables,
+    parse_environment_file,
+    set_variables,
+)
+
+
+def test_set_variables_without_a_holder_leaves_other_contexts_alone():
+    def set_in_new_context() -> dict[str, str | None]:
+        set_variables({"token": "abc"})
+        return get_variables()
+
+    assert contextvars.Context().run(set_in_new_context) == {"token": "abc"}
+    # The shared default was replaced in that context, not modified.
+    assert contextvars.Context().run(get_variables) == {}
+
+
+def test_set_variables_is_seen_by_contexts_sharing_the_holder():
+    def run() -> None:
+        set_variables({"token": "abc"})
+        child = contextvars.copy_context()
+        set_variables({"token": "def"})
+        assert child.run(get_variables) == {"token": "def"}
+
+    contextvars.Context().run(run)
+
+
+def test_variable_changes_between_two_sets_of_variables():
+    old = {"kept": "1", "changed": "a", "cleared": "x", "removed": "gone"}
+    new = {"kept": "1", "changed": "b", "cleared": None, "added": "new"}
+
+    changes = VariableChanges.between(old, new)
+
+    assert changes.variables is new
+    assert changes.added == {"added"}
+    assert changes.removed == {"removed"}
+    assert changes.modified == {"changed", "cleared"}
+    assert changes.changed == {"added", "removed", "changed", "cleared"}
+    assert changes
+
+
+def test_no_variable_changes_is_falsy():
+    changes = VariableChanges.between({"a": "1"}, {"a": "1"})
+
+    assert not changes
+    assert changes.changed == set()
+
+
+def test_update_files_merges_only_the_affected_environments(tmp_path: Path):
+    shared = tmp_path / "shared.env"
+    dev = tmp_path / "dev.env"
+    prod = tmp_path / "prod.env"
+    shared.write_text("BASE_URL=https://example.com\nNAME=shared\n")
+    dev.write_text("NAME=dev\n")
+    prod.write_text("NAME=prod\n")
+    environments = Environments(
+        {"dev": (shared, dev), "prod": (shared, prod), "solo": (prod,)},
+        use_host_environment=False,
+    )
+    environments.preload()
+    solo = environments.variables("solo")
+
+    dev.write_text("NAME=dev2\nDEBUG=1\n")
+    affected = environments.update_files({dev: parse_environment_file(dev)})
+
+    assert affected == {"dev"}
+    assert environments.variables("dev") == {
+        "BASE_URL": "https://example.com",
+        "NAME": "dev2",
+        "DEBUG": "1",
+    }
+    assert environments.variables("solo") is solo
+
+
+def test_update_files_uses_the_supplied_variables(tmp_path: Path):
+    shared = tmp_path / "shared.env"
+    dev = tmp_path / "dev.env"
+    shared.write_text("NAME=shared\n")
+    dev.write_text("NAME=dev\n")
+    environments = Environments(
+        {"dev": (shared, dev), "prod": (shared,)}, use_host_environment=False
+    )
+    assert environments.variables("dev") == {"NAME": "dev"}
+
+    # The file which wasn't updated isn't read again, even though it's gone.
+    shared.unlink()
+    affected = environments.update_files({dev: {}})
+
+    assert affected == {"dev"}
+    assert environments.variables("dev") == {"NAME": "shared"}